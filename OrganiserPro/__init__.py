@@ -3,20 +3,53 @@ OrganiserPro - A powerful tool for organizing, deduplicating, and managing files
 
 This package provides a command-line interface for sorting files by type, date, or size,
 and for finding and handling duplicate files.
+
+The names below are imported from their submodules on first access (PEP 562),
+so ``import OrganiserPro`` stays cheap and doesn't pull in click or rich.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 # Version of the OrganiserPro package
 __version__ = "0.1.0"
 
-from .cli import cli
-from .dedupe import find_duplicates, find_duplicates_cli, handle_duplicates
-from .sorter import sort_by_date, sort_by_type
-
 __all__ = [
     "cli",
     "sort_by_type",
     "sort_by_date",
+    "sort_by_size",
     "find_duplicates",
     "find_duplicates_cli",
     "handle_duplicates",
 ]
+
+# Public name -> submodule it is imported from
+_LAZY_IMPORTS = {
+    "cli": ".main",
+    "sort_by_type": ".sorter",
+    "sort_by_date": ".sorter",
+    "sort_by_size": ".sorter",
+    "find_duplicates": ".dedupe",
+    "find_duplicates_cli": ".dedupe",
+    "handle_duplicates": ".dedupe",
+}
+
+if TYPE_CHECKING:
+    from .dedupe import find_duplicates, find_duplicates_cli, handle_duplicates
+    from .main import cli
+    from .sorter import sort_by_date, sort_by_size, sort_by_type
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache it
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,501 @@
+"""Asyncio versions of the sort and dedupe operations.
+
+Each function returns a Job right away. Await it for the result, or iterate
+it with ``async for`` to receive Progress updates first::
+
+    job = aio.sort_by_type("~/Downloads")
+    async for progress in job:
+        print(progress.phase, progress.completed, progress.total)
+    print(job.result.files_moved)
+
+The blocking work (listing, stat'ing, hashing and moving) runs on a thread
+dedicated to the job, in batches of at most ``batch_size`` files, so the
+event loop is never blocked and many jobs can run side by side. Cancelling
+the task that runs a job stops it at the next batch boundary: the batch in
+flight is finished in the background and nothing further is done.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .dedupe import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_HASH_ALGORITHM,
+    DEFAULT_HEAD_SIZE,
+    DEFAULT_IO_STRATEGY,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_TAIL_SIZE,
+    IO_STRATEGIES,
+    DedupeStats,
+    HashingContext,
+    check_candidates,
+    new_hasher,
+)
+from .hashcache import HashCache
+from .planner import Move, MovePlan, execute_plan
+from .sizegroups import SizeGroups
+from .sorter import (
+    DEFAULT_SIZE_THRESHOLDS,
+    BucketFunction,
+    SortResult,
+    date_bucket,
+    plan_batches,
+    size_bucket,
+    type_bucket,
+)
+from .walker import FileEntry, walk_by_directory
+
+R = TypeVar("R")
+T = TypeVar("T")
+
+# Files listed, hashed or moved per trip to the job's thread
+ASYNC_BATCH_SIZE = 1000
+
+
+@dataclass
+class Progress:
+    """A progress update from a running job.
+
+    Attributes:
+        phase: "scan" while files are being listed (and planned, for sorts),
+               "hash" while duplicate candidates are checked, "move" while
+               files are being moved
+        completed: Files done so far in this phase
+        total: Files this phase will handle, if known yet
+    """
+
+    phase: str
+    completed: int
+    total: Optional[int] = None
+
+
+@dataclass
+class _Done(Generic[R]):
+    """Last item produced by a job's steps, carrying its result."""
+
+    value: R
+
+
+JobSteps = AsyncIterator[Union[Progress, _Done[R]]]
+
+
+class Job(Generic[R]):
+    """A sort or dedupe operation, run when awaited or iterated."""
+
+    def __init__(self, steps: "JobSteps[R]") -> None:
+        self._steps = steps
+        self._done: Optional[_Done[R]] = None
+
+    def __aiter__(self) -> AsyncIterator[Progress]:
+        return self._progress()
+
+    async def _progress(self) -> AsyncIterator[Progress]:
+        async for step in self._steps:
+            if isinstance(step, _Done):
+                self._done = step
+            else:
+                yield step
+
+    def __await__(self) -> Generator[Any, None, R]:
+        return self._wait().__await__()
+
+    async def _wait(self) -> R:
+        async for _ in self:
+            pass
+        return self.result
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has run to completion."""
+        return self._done is not None
+
+    @property
+    def result(self) -> R:
+        """The job's result.
+
+        Raises:
+            RuntimeError: If the job hasn't run to completion
+        """
+        if self._done is None:
+            raise RuntimeError("The job hasn't finished")
+        return self._done.value
+
+
+class _JobThread:
+    """Runs a job's blocking steps one at a time on a thread of its own.
+
+    Steps never overlap, so objects tied to a thread (like SQLite
+    connections) can be created and used by them, and cleanup submitted
+    on close runs after a step still in flight from a cancelled job.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="organiserpro-job"
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def close(self, cleanup: Optional[Callable[[], None]] = None) -> None:
+        if cleanup is not None:
+            self._executor.submit(cleanup)
+        self._executor.shutdown(wait=False)
+
+
+def _check_directory(directory: str) -> Path:
+    """Resolve a directory to work on.
+
+    Raises:
+        NotADirectoryError: If it doesn't exist or isn't a directory
+    """
+    path = Path(directory).expanduser().resolve()
+    if not path.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+    return path
+
+
+def _scan_batch(
+    walker: Iterator[Tuple[str, List[FileEntry]]],
+    size_groups: SizeGroups,
+    stats: DedupeStats,
+    batch_size: int,
+) -> bool:
+    """Add directories from a walk to size groups until batch_size files.
+
+    Returns:
+        bool: False once the walk is exhausted
+    """
+    added = 0
+    for current, files in walker:
+        size_groups.add_directory(current, files)
+        stats.files_scanned += len(files)
+        stats.bytes_scanned += sum(entry.size for entry in files)
+        added += len(files)
+        if added >= batch_size:
+            return True
+    return False
+
+
+def _next_candidates(
+    groups: Iterator[Tuple[int, List[FileEntry]]], batch_size: int
+) -> List[FileEntry]:
+    """Collect complete same-size groups until batch_size files."""
+    batch: List[FileEntry] = []
+    for _, group in groups:
+        batch.extend(group)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+async def _dedupe_steps(
+    directory: str,
+    recursive: bool,
+    head_size: int,
+    tail_size: int,
+    cache_path: Optional[str],
+    workers: int,
+    low_memory: bool,
+    memory_budget: int,
+    algorithm: str,
+    block_size: int,
+    io_strategy: str,
+    drop_cache: bool,
+    batch_size: int,
+) -> "JobSteps[Dict[str, List[Path]]]":
+    """Steps of an async find_duplicates()."""
+    new_hasher(algorithm)
+    if io_strategy not in IO_STRATEGIES:
+        raise ValueError(f"Unknown I/O strategy {io_strategy!r}")
+    dir_path = _check_directory(directory)
+
+    thread = _JobThread()
+    stats = DedupeStats(algorithm=algorithm)
+    size_groups: Optional[SizeGroups] = None
+    cache: Optional[HashCache] = None
+    hashers = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def record_error(path: str, error: OSError) -> None:
+        # Jobs never print; unreadable files are skipped as in quiet mode
+        stats.errors.append((path, str(error)))
+
+    walker = walk_by_directory(dir_path, recursive=recursive, on_error=record_error)
+
+    def cleanup() -> None:
+        if size_groups is not None:
+            size_groups.close()
+        if cache is not None:
+            cache.close()
+        if hashers is not None:
+            hashers.shutdown()
+
+    try:
+        # Created on the job's thread, which is the only one using them
+        size_groups = await thread.run(
+            SizeGroups, memory_budget if low_memory else None
+        )
+        if cache_path:
+            cache = await thread.run(HashCache, cache_path)
+
+        while await thread.run(_scan_batch, walker, size_groups, stats, batch_size):
+            yield Progress("scan", stats.files_scanned)
+        yield Progress("scan", stats.files_scanned, stats.files_scanned)
+
+        stats.bytes_skipped_by_size = await thread.run(size_groups.unique_bytes)
+        stats.hard_links_skipped = size_groups.hard_links
+        total = (
+            None
+            if size_groups.spilled
+            else await thread.run(size_groups.candidate_count)
+        )
+        files_by_hash: Dict[str, List[Path]] = defaultdict(list)
+        ctx = HashingContext(
+            head_size=head_size,
+            tail_size=tail_size,
+            algorithm=algorithm,
+            block_size=block_size,
+            io_strategy=io_strategy,
+            drop_cache=drop_cache,
+            cache=cache,
+            stats=stats,
+            executor=hashers,
+            window=max(1, workers) * 16,
+            advance=_no_progress,
+            on_error=record_error,
+        )
+        groups = size_groups.groups()
+        checked = 0
+        while True:
+            batch = await thread.run(_next_candidates, groups, batch_size)
+            if not batch:
+                break
+            stats.size_candidates += len(batch)
+            await thread.run(check_candidates, batch, files_by_hash, ctx)
+            checked += len(batch)
+            yield Progress("hash", checked, total)
+
+        yield _Done({h: paths for h, paths in files_by_hash.items() if len(paths) > 1})
+    finally:
+        thread.close(cleanup)
+
+
+def _no_progress(files: int, nbytes: int) -> None:
+    """Per-file progress callback for the hashing stages; jobs report per batch."""
+
+
+def find_duplicates(
+    directory: str,
+    recursive: bool = False,
+    head_size: int = DEFAULT_HEAD_SIZE,
+    tail_size: int = DEFAULT_TAIL_SIZE,
+    cache_path: Optional[str] = None,
+    workers: int = 1,
+    low_memory: bool = False,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    io_strategy: str = DEFAULT_IO_STRATEGY,
+    drop_cache: bool = False,
+    batch_size: int = ASYNC_BATCH_SIZE,
+) -> "Job[Dict[str, List[Path]]]":
+    """Find duplicate files in a directory without blocking the event loop.
+
+    Works like OrganiserPro.dedupe.find_duplicates(); see there for the
+    arguments. The hash cache is given as a path because it is opened on
+    the job's thread.
+
+    Returns:
+        Job[Dict[str, List[Path]]]: Resolves to a dictionary mapping file
+            hashes to lists of duplicate file paths
+
+    Raises:
+        NotADirectoryError: When run, if directory isn't a directory
+        ValueError: When run, if the algorithm or I/O strategy is unknown
+    """
+    return Job(
+        _dedupe_steps(
+            directory,
+            recursive,
+            head_size,
+            tail_size,
+            cache_path,
+            workers,
+            low_memory,
+            memory_budget,
+            algorithm,
+            block_size,
+            io_strategy,
+            drop_cache,
+            batch_size,
+        )
+    )
+
+
+async def _sort_steps(
+    directory: str,
+    bucket_of: BucketFunction,
+    sorted_by: str,
+    workers: int,
+    recursive: bool,
+    batch_size: int,
+) -> "JobSteps[SortResult]":
+    """Steps of an async sort."""
+    source_dir = _check_directory(directory)
+    thread = _JobThread()
+    start = time.perf_counter()
+    result = SortResult(sorted_by=sorted_by)
+    planned = 0
+
+    def on_unreadable(path: str, error: OSError) -> None:
+        result.errors.append((path, f"Could not access: {error}"))
+
+    failed_moves: Set[str] = set()
+
+    def on_error(move: Move, error: OSError) -> None:
+        failed_moves.add(move.source)
+        result.errors.append((move.source, str(error)))
+
+    batches = plan_batches(
+        source_dir,
+        bucket_of,
+        recursive,
+        batch_size=batch_size,
+        on_error=on_unreadable,
+    )
+    try:
+        while True:
+            batch: Optional[Tuple[MovePlan, Any]] = await thread.run(
+                next, batches, None
+            )
+            if batch is None:
+                break
+            plan = batch[0]
+            planned += len(plan)
+            result.files_scanned += len(plan) + plan.unchanged + len(plan.errors)
+            result.files_unchanged += plan.unchanged
+            result.directories += len(plan.by_directory())
+            result.errors.extend(plan.errors)
+            if not plan.moves:
+                continue
+            yield Progress("scan", planned)
+            for chunk in plan.chunks(batch_size):
+                result.files_moved += await thread.run(
+                    execute_plan, chunk, on_error, workers
+                )
+                result.moves.extend(
+                    move for move in chunk if move.source not in failed_moves
+                )
+                yield Progress("move", result.files_moved, planned)
+        result.seconds = time.perf_counter() - start
+        yield _Done(result)
+    finally:
+        thread.close()
+
+
+def sort_by_type(
+    directory: str,
+    workers: int = 1,
+    recursive: bool = False,
+    batch_size: int = ASYNC_BATCH_SIZE,
+) -> "Job[SortResult]":
+    """Sort files into subdirectories by file type without blocking.
+
+    Args:
+        directory: Directory to sort
+        workers: Number of threads used to move files
+        recursive: If True, also sort every subdirectory into its own buckets
+        batch_size: Files listed or moved per step; a cancelled job stops
+                    after the step in flight
+
+    Returns:
+        Job[SortResult]: Resolves to what the sort did
+
+    Raises:
+        NotADirectoryError: When run, if directory isn't a directory
+    """
+    return Job(
+        _sort_steps(directory, type_bucket, "type", workers, recursive, batch_size)
+    )
+
+
+def sort_by_date(
+    directory: str,
+    date_format: str = "%Y-%m",
+    workers: int = 1,
+    recursive: bool = False,
+    batch_size: int = ASYNC_BATCH_SIZE,
+) -> "Job[SortResult]":
+    """Sort files into subdirectories by modification date without blocking.
+
+    Args:
+        directory: Directory to sort
+        date_format: Format string for the buckets (see sorter.sort_by_date())
+        workers: Number of threads used to move files
+        recursive: If True, also sort every subdirectory into its own buckets
+        batch_size: Files listed or moved per step; a cancelled job stops
+                    after the step in flight
+
+    Returns:
+        Job[SortResult]: Resolves to what the sort did
+
+    Raises:
+        NotADirectoryError: When run, if directory isn't a directory
+    """
+    return Job(
+        _sort_steps(
+            directory, date_bucket(date_format), "date", workers, recursive, batch_size
+        )
+    )
+
+
+def sort_by_size(
+    directory: str,
+    thresholds: Sequence[int] = DEFAULT_SIZE_THRESHOLDS,
+    workers: int = 1,
+    recursive: bool = False,
+    batch_size: int = ASYNC_BATCH_SIZE,
+) -> "Job[SortResult]":
+    """Sort files into subdirectories by size without blocking.
+
+    Args:
+        directory: Directory to sort
+        thresholds: Bucket boundaries in bytes
+        workers: Number of threads used to move files
+        recursive: If True, also sort every subdirectory into its own buckets
+        batch_size: Files listed or moved per step; a cancelled job stops
+                    after the step in flight
+
+    Returns:
+        Job[SortResult]: Resolves to what the sort did
+
+    Raises:
+        NotADirectoryError: When run, if directory isn't a directory
+    """
+    return Job(
+        _sort_steps(
+            directory, size_bucket(thresholds), "size", workers, recursive, batch_size
+        )
+    )
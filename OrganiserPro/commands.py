@@ -1,14 +1,169 @@
 """CLI command implementations for OrganiserPro."""
 
+import functools
 from pathlib import Path
-from typing import Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import click
-from rich.console import Console
+from click.core import ParameterSource
+
+from .console import lazy_console
+from .defaults import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_EXECUTOR,
+    DEFAULT_HASH_ALGORITHM,
+    DEFAULT_HEAD_SIZE,
+    DEFAULT_IO_STRATEGY,
+    DEFAULT_MAX_AGE_DAYS,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_TAIL_SIZE,
+    EXECUTORS,
+    IO_STRATEGIES,
+    LINK_MODES,
+    WATCH_BACKENDS,
+)
+
+if TYPE_CHECKING:
+    from .dupindex import DuplicateIndex
+
+# The modules doing the work (and sqlite3, mmap and cProfile) are imported in
+# the commands that use them, so the CLI starts without loading them all
+
+console = lazy_console()
+
+
+def stats_options(command: Callable[..., int]) -> Callable[..., int]:
+    """Add --stats, --stats-json and --profile to a command.
+
+    With any of them given, the command runs with an instrument collector
+    active (and under cProfile for --profile) and the results are reported
+    once it returns.
+    """
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        show_stats: bool,
+        stats_json: Optional[str],
+        profile: bool,
+        **kwargs: Any,
+    ) -> int:
+        if not (show_stats or stats_json or profile):
+            return command(*args, **kwargs)
+
+        import cProfile
+
+        from . import instrument
+
+        name = click.get_current_context().info_name or command.__name__
+        profiler = cProfile.Profile() if profile else None
+        with instrument.collect(name) as run:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                result = command(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+        if profiler is not None:
+            profile_path = Path(f"organiserpro-{name}.prof").resolve()
+            profiler.dump_stats(str(profile_path))
+            console.print(f"Profile written to {profile_path}")
+        if show_stats:
+            instrument.print_run_stats(run, out=console)
+        if stats_json:
+            instrument.write_json(run, stats_json)
+        return result
+
+    options = [
+        click.option(
+            "--stats",
+            "show_stats",
+            is_flag=True,
+            help="Print per-phase timings and I/O counters when done",
+        ),
+        click.option(
+            "--stats-json",
+            type=click.Path(dir_okay=False, writable=True),
+            help="Write per-phase timings and I/O counters to this JSON file",
+        ),
+        click.option(
+            "--profile",
+            is_flag=True,
+            help="Profile the run with cProfile into organiserpro-COMMAND.prof",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
 
-from .sorter import sort_by_type as sort_by_type_impl, sort_by_date as sort_by_date_impl
+def _state_file(
+    directory: str, incremental: bool, state_file: Optional[str]
+) -> Optional[str]:
+    """Resolve the --incremental and --state-file options of a sort command."""
+    if state_file:
+        return str(Path(state_file).expanduser().resolve())
+    if incremental:
+        from .sortstate import default_state_path
 
-console = Console()
+        return str(default_state_path(directory))
+    return None
+
+
+def quiet_option(command: Callable[..., int]) -> Callable[..., int]:
+    """Add --quiet to a command."""
+    return click.option(
+        "--quiet",
+        "-q",
+        is_flag=True,
+        help="Only print errors, skipping progress and summaries",
+    )(command)
+
+
+# dedupe options of the in-directory search that an index lookup can't use
+_NOT_WITH_INDEX = (
+    "use_cache",
+    "cache_path",
+    "cache_max_entries",
+    "cache_max_age",
+    "executor",
+    "low_memory",
+    "memory_budget",
+    "io_strategy",
+    "drop_cache",
+)
+
+
+def _given_options(names: Collection[str]) -> List[click.Parameter]:
+    """Return the named options of the current command that were set explicitly."""
+    ctx = click.get_current_context()
+    return [
+        param
+        for param in ctx.command.params
+        if param.name in names
+        and ctx.get_parameter_source(param.name) not in (None, ParameterSource.DEFAULT)
+    ]
+
+
+def _print_errors(errors: Sequence[Tuple[str, str]]) -> None:
+    """Print the errors of a quiet sort, which reports nothing itself."""
+    for path, message in errors:
+        console.print(f"[red]Error processing {path}: {message}")
 
 
 @click.command(name="sort-by-type")
@@ -19,21 +174,57 @@ console = Console()
 @click.option(
     "--dry-run", is_flag=True, help="Show what would be done without making changes"
 )
-def sort_by_type(directory: str, dry_run: bool) -> int:
-    """Sort files in DIRECTORY by file type."""
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to move concurrently",
+    show_default=True,
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    help="Also sort every subdirectory, each into its own buckets",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Skip directories unchanged since the last incremental run",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False, path_type=str),
+    help="State file for incremental runs (implies --incremental)",
+    default=None,
+)
+@quiet_option
+@stats_options
+def sort_by_type(
+    directory: str,
+    dry_run: bool,
+    workers: int,
+    recursive: bool,
+    incremental: bool,
+    state_file: Optional[str],
+    quiet: bool,
+) -> int:
+    """Sort files in DIRECTORY by file type.
+
+    Symlinks and dot-files are left where they are.
+    """
+    from .sorter import sort_by_type as sort_by_type_impl
+
     directory = str(Path(directory).resolve())
-    if dry_run:
-        exts = set(
-            p.suffix.lower()
-            for p in Path(directory).iterdir()
-            if p.is_file() and not p.name.startswith(".")
-        )
-        console.print(
-            "Would group files by type into folders: "
-            f"{', '.join(exts) if exts else 'No files found'}"
-        )
-        return 0
-    sort_by_type_impl(directory=directory, dry_run=dry_run)
+    result = sort_by_type_impl(
+        directory=directory,
+        dry_run=dry_run,
+        workers=workers,
+        recursive=recursive,
+        state_file=_state_file(directory, incremental, state_file),
+        quiet=quiet,
+    )
+    if quiet:
+        _print_errors(result.errors)
     return 0
 
 
@@ -50,16 +241,178 @@ def sort_by_type(directory: str, dry_run: bool) -> int:
 @click.option(
     "--dry-run", is_flag=True, help="Show what would be done without making changes"
 )
-def sort_by_date(directory: str, date_format: str, dry_run: bool) -> int:
-    """Sort files in DIRECTORY by date."""
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to move concurrently",
+    show_default=True,
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    help="Also sort every subdirectory, each into its own buckets",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Skip directories unchanged since the last incremental run",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False, path_type=str),
+    help="State file for incremental runs (implies --incremental)",
+    default=None,
+)
+@quiet_option
+@stats_options
+def sort_by_date(
+    directory: str,
+    date_format: str,
+    dry_run: bool,
+    workers: int,
+    recursive: bool,
+    incremental: bool,
+    state_file: Optional[str],
+    quiet: bool,
+) -> int:
+    """Sort files in DIRECTORY by date.
+
+    Symlinks and dot-files are left where they are.
+    """
+    from .sorter import sort_by_date as sort_by_date_impl
+
     directory = str(Path(directory).resolve())
-    if dry_run:
-        console.print(
-            "Would sort files by date with format "
-            f"'{date_format}' in directory: {directory}"
-        )
-        return 0
-    sort_by_date_impl(directory=directory, date_format=date_format, dry_run=dry_run)
+    result = sort_by_date_impl(
+        directory=directory,
+        date_format=date_format,
+        dry_run=dry_run,
+        workers=workers,
+        recursive=recursive,
+        state_file=_state_file(directory, incremental, state_file),
+        quiet=quiet,
+    )
+    if quiet:
+        _print_errors(result.errors)
+    return 0
+
+
+def _parse_thresholds(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[List[int]]:
+    """Parse a comma-separated list of sizes for --thresholds."""
+    if value is None:
+        return None
+    from .sorter import parse_size
+
+    try:
+        return [parse_size(size) for size in value.split(",") if size.strip()]
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from None
+
+
+def _check_hash_algorithm(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[str]:
+    """Check --hash against the registered hash algorithms.
+
+    The registry depends on which optional hashers are installed, so it is
+    only loaded once --hash is given (or defaulted), not to build the option.
+    """
+    if value is None:
+        return None
+    from .dedupe import HASH_ALGORITHMS
+
+    if value not in HASH_ALGORITHMS:
+        available = ", ".join(repr(name) for name in sorted(HASH_ALGORITHMS))
+        raise click.BadParameter(f"{value!r} is not one of {available}.")
+    return value
+
+
+# Help for --hash; the optional hashers are only available where installed
+_HASH_HELP = (
+    "Hash algorithm used to compare files: sha256, blake2b, or xxh64, "
+    "xxh3_128 and blake3 when installed"
+)
+
+
+@click.command(name="sort-by-size")
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--thresholds",
+    callback=_parse_thresholds,
+    help="Comma-separated bucket boundaries, e.g. '1MB,100MB,1GB' (the default)",
+)
+@click.option(
+    "--log-base",
+    type=click.IntRange(min=2),
+    help="Use logarithmic buckets from 1KB to 1TB, each this many times larger",
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Show what would be done without making changes"
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to move concurrently",
+    show_default=True,
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    help="Also sort every subdirectory, each into its own buckets",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Skip directories unchanged since the last incremental run",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False, path_type=str),
+    help="State file for incremental runs (implies --incremental)",
+    default=None,
+)
+@quiet_option
+@stats_options
+def sort_by_size(
+    directory: str,
+    thresholds: Optional[List[int]],
+    log_base: Optional[int],
+    dry_run: bool,
+    workers: int,
+    recursive: bool,
+    incremental: bool,
+    state_file: Optional[str],
+    quiet: bool,
+) -> int:
+    """Sort files in DIRECTORY by size.
+
+    Symlinks and dot-files are left where they are.
+    """
+    if thresholds is not None and log_base is not None:
+        raise click.UsageError("--thresholds and --log-base can't be combined")
+    from .sorter import DEFAULT_SIZE_THRESHOLDS, log_size_thresholds
+    from .sorter import sort_by_size as sort_by_size_impl
+
+    if log_base is not None:
+        thresholds = log_size_thresholds(log_base)
+    directory = str(Path(directory).resolve())
+    result = sort_by_size_impl(
+        directory=directory,
+        thresholds=thresholds if thresholds is not None else DEFAULT_SIZE_THRESHOLDS,
+        dry_run=dry_run,
+        workers=workers,
+        recursive=recursive,
+        state_file=_state_file(directory, incremental, state_file),
+        quiet=quiet,
+    )
+    if quiet:
+        _print_errors(result.errors)
     return 0
 
 
@@ -88,23 +441,187 @@ def sort_by_date(directory: str, date_format: str, dry_run: bool) -> int:
     help="Move duplicate files to this directory",
     default=None,
 )
+@click.option(
+    "--link",
+    type=click.Choice(LINK_MODES),
+    help=(
+        "Replace duplicates with hard links to, or reflink clones of, the kept "
+        "file; a clone keeps the duplicate's mode and times, and its owner "
+        "if run as root"
+    ),
+    default=None,
+)
+@click.option(
+    "--verify/--no-verify",
+    default=True,
+    help="Compare duplicates byte for byte with the kept file before "
+    "deleting, moving or linking them; --no-verify trusts the digests",
+    show_default=True,
+)
 @click.option(
     "--dry-run",
     is_flag=True,
     help="Show what would be done without making changes",
     default=False,
 )
+@click.option(
+    "--head-size",
+    type=click.IntRange(min=0),
+    default=DEFAULT_HEAD_SIZE,
+    help="Bytes sampled from the start of same-size files before full hashing",
+    show_default=True,
+)
+@click.option(
+    "--tail-size",
+    type=click.IntRange(min=0),
+    default=DEFAULT_TAIL_SIZE,
+    help="Bytes sampled from the end of same-size files before full hashing",
+    show_default=True,
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=False,
+    help="Reuse file digests from previous runs (stored under the XDG cache dir)",
+    show_default=True,
+)
+@click.option(
+    "--cache-path",
+    type=click.Path(dir_okay=False, path_type=str),
+    help="Hash cache file to use (implies --cache)",
+    default=None,
+)
+@click.option(
+    "--cache-max-entries",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_ENTRIES,
+    help="Evict least recently used cache entries beyond this count",
+    show_default=True,
+)
+@click.option(
+    "--cache-max-age",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_MAX_AGE_DAYS,
+    help="Evict cache entries unused for this many days",
+    show_default=True,
+)
+@click.option(
+    "--against-index",
+    is_flag=True,
+    default=False,
+    help="Find files that duplicate anything in the index (see 'index build') "
+    "instead of comparing files within DIRECTORY",
+)
+@click.option(
+    "--index-path",
+    type=click.Path(dir_okay=False, path_type=str),
+    help="Index file to use (implies --against-index)",
+    default=None,
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to hash concurrently",
+    show_default=True,
+)
+@click.option(
+    "--executor",
+    type=click.Choice(EXECUTORS),
+    default=DEFAULT_EXECUTOR,
+    help="Hash with --workers threads, or processes for hashers that hold the GIL",
+    show_default=True,
+)
+@click.option(
+    "--low-memory",
+    is_flag=True,
+    default=False,
+    help="Spill scan records to a temporary file instead of holding them in memory",
+)
+@click.option(
+    "--memory-budget",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+    help="Memory in MB for scan records before spilling (with --low-memory)",
+    show_default=True,
+)
+@click.option(
+    "--hash",
+    "algorithm",
+    metavar="NAME",
+    callback=_check_hash_algorithm,
+    default=DEFAULT_HASH_ALGORITHM,
+    help=_HASH_HELP,
+    show_default=True,
+)
+@click.option(
+    "--block-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_BLOCK_SIZE,
+    help="Bytes read per call when hashing whole files",
+    show_default=True,
+)
+@click.option(
+    "--io-strategy",
+    type=click.Choice(IO_STRATEGIES),
+    default=DEFAULT_IO_STRATEGY,
+    help="How whole files are read: plain reads, one reused buffer, or mmap",
+    show_default=True,
+)
+@click.option(
+    "--drop-cache",
+    is_flag=True,
+    help="Drop hashed files from the OS page cache (where supported)",
+)
+@quiet_option
+@stats_options
 def dedupe(
     target_dir: str,
     recursive: bool,
     delete: bool,
     move_to: Optional[str],
+    link: Optional[str],
+    verify: bool,
     dry_run: bool,
+    head_size: int,
+    tail_size: int,
+    use_cache: bool,
+    cache_path: Optional[str],
+    cache_max_entries: int,
+    cache_max_age: float,
+    against_index: bool,
+    index_path: Optional[str],
+    workers: int,
+    executor: str,
+    low_memory: bool,
+    memory_budget: int,
+    algorithm: str,
+    block_size: int,
+    io_strategy: str,
+    drop_cache: bool,
+    quiet: bool,
 ) -> int:
     """Find and handle duplicate files in DIRECTORY.
 
-    DIRECTORY: The directory to search for duplicate files in.
+    DIRECTORY: The directory to search for duplicate files in. Symlinks and
+    dot-files are skipped, so a link is never matched against its target.
     """
+    hash_settings: Dict[str, Any] = {
+        "algorithm": algorithm,
+        "head_size": head_size,
+        "tail_size": tail_size,
+    }
+    if against_index or index_path:
+        conflicting = _given_options(_NOT_WITH_INDEX)
+        if conflicting:
+            flags = ", ".join(param.opts[0] for param in conflicting)
+            raise click.UsageError(f"{flags} can't be combined with --against-index")
+        # Settings left out are taken from the index; given ones must match it
+        given = {param.name for param in _given_options(hash_settings)}
+        for name in hash_settings:
+            if name not in given:
+                hash_settings[name] = None
+
     try:
         # Resolve the directory path
         resolved_dir = str(Path(target_dir).resolve())
@@ -116,8 +633,18 @@ def dedupe(
             console.print("Dry run: No files will be modified")
             return 0
 
-        # Call the deduplication function
         from .dedupe import find_duplicates_cli
+        from .dupindex import default_index_path
+        from .hashcache import default_cache_path
+
+        if cache_path:
+            cache_path = str(Path(cache_path).expanduser().resolve())
+        elif use_cache:
+            cache_path = str(default_cache_path())
+        if index_path:
+            index_path = str(Path(index_path).expanduser().resolve())
+        elif against_index:
+            index_path = str(default_index_path())
 
         # Call the function with the resolved paths
         find_duplicates_cli(
@@ -126,8 +653,272 @@ def dedupe(
             delete=delete,
             move_to=str(Path(move_to).resolve()) if move_to else None,
             dry_run=dry_run,
+            cache_path=cache_path,
+            cache_max_entries=cache_max_entries,
+            cache_max_age=cache_max_age,
+            workers=workers,
+            low_memory=low_memory,
+            memory_budget=memory_budget * 1024 * 1024,
+            block_size=block_size,
+            io_strategy=io_strategy,
+            drop_cache=drop_cache,
+            quiet=quiet,
+            link=link,
+            verify=verify,
+            index_path=index_path,
+            executor=executor,
+            **hash_settings,
         )
         return 0  # Success
     except Exception as e:
         console.print(f"[red]Error: {str(e)}")
         return 1  # Error exit code
+
+
+@click.command()
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--by",
+    "sort_by",
+    type=click.Choice(["type", "date", "none"]),
+    default="type",
+    help="How arriving files are sorted ('none' to only dedupe them)",
+    show_default=True,
+)
+@click.option(
+    "--date-format",
+    default="%Y-%m",
+    help="Date format for --by date (e.g., '%%Y-%%m-%%d' or '%%Y/%%m/%%d')",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="Check arriving files for duplicates of files already in DIRECTORY",
+)
+@click.option(
+    "--move-to",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=str),
+    help="Move duplicate arrivals to this directory (with --dedupe)",
+    default=None,
+)
+@click.option(
+    "--backend",
+    type=click.Choice(WATCH_BACKENDS),
+    default="auto",
+    help="How arrivals are detected",
+    show_default=True,
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_DEBOUNCE,
+    help="Seconds without arrivals before a batch of them is processed",
+    show_default=True,
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0.01),
+    default=DEFAULT_POLL_INTERVAL,
+    help="Seconds between directory listings with --backend poll",
+    show_default=True,
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to move concurrently",
+    show_default=True,
+)
+@stats_options
+def watch(
+    directory: str,
+    sort_by: str,
+    date_format: str,
+    dedupe: bool,
+    move_to: Optional[str],
+    backend: str,
+    debounce: float,
+    poll_interval: float,
+    workers: int,
+) -> int:
+    """Sort (and dedupe) files as they arrive in DIRECTORY."""
+    if sort_by == "none" and not dedupe:
+        raise click.UsageError("Nothing to do: use --by type/date or --dedupe")
+    if move_to and not dedupe:
+        raise click.UsageError("--move-to requires --dedupe")
+    from .watcher import watch as watch_impl
+
+    try:
+        watch_impl(
+            directory=str(Path(directory).resolve()),
+            sort_by=None if sort_by == "none" else sort_by,
+            date_format=date_format,
+            dedupe=dedupe,
+            move_to=move_to,
+            backend=backend,
+            debounce=debounce,
+            poll_interval=poll_interval,
+            workers=workers,
+        )
+    except OSError as e:
+        raise click.ClickException(str(e)) from None
+    except KeyboardInterrupt:
+        console.print("Stopped watching")
+    return 0
+
+
+def index_path_option(command: Callable[..., int]) -> Callable[..., int]:
+    """Add --index-path to an index command."""
+    return click.option(
+        "--index-path",
+        type=click.Path(dir_okay=False, path_type=str),
+        help="Index file to use (defaults to one under the XDG data directory)",
+        default=None,
+    )(command)
+
+
+def workers_option(command: Callable[..., int]) -> Callable[..., int]:
+    """Add --workers to an index command."""
+    return click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        default=1,
+        help="Number of files to hash concurrently",
+        show_default=True,
+    )(command)
+
+
+def _open_index(index_path: Optional[str], **kwargs: Any) -> "DuplicateIndex":
+    """Open the index named by --index-path, or the default one."""
+    from .dupindex import DuplicateIndex
+
+    path = Path(index_path).expanduser().resolve() if index_path else None
+    return DuplicateIndex(path, **kwargs)
+
+
+@click.group(name="index")
+def index() -> None:
+    """Keep an index of file digests to find duplicates across directories."""
+
+
+@index.command(name="build")
+@click.argument(
+    "directories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--hash",
+    "algorithm",
+    metavar="NAME",
+    callback=_check_hash_algorithm,
+    default=None,
+    help=f"{_HASH_HELP}, for a new index [default: {DEFAULT_HASH_ALGORITHM}]",
+)
+@index_path_option
+@workers_option
+@quiet_option
+@stats_options
+def index_build(
+    directories: Tuple[str, ...],
+    algorithm: Optional[str],
+    index_path: Optional[str],
+    workers: int,
+    quiet: bool,
+) -> int:
+    """Index DIRECTORIES from scratch, replacing what was stored for them."""
+    from .dupindex import print_index_stats
+
+    try:
+        with _open_index(index_path, algorithm=algorithm) as dup_index:
+            for directory in directories:
+                stats = dup_index.build(directory, workers=workers, quiet=quiet)
+                if quiet:
+                    _print_errors(stats.errors)
+                else:
+                    print_index_stats(stats, directory, out=console)
+        return 0
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}")
+        return 1
+
+
+@index.command(name="update")
+@click.argument(
+    "directories",
+    nargs=-1,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@index_path_option
+@workers_option
+@quiet_option
+@stats_options
+def index_update(
+    directories: Tuple[str, ...],
+    index_path: Optional[str],
+    workers: int,
+    quiet: bool,
+) -> int:
+    """Rehash new and changed files in DIRECTORIES (default: all indexed ones)."""
+    from .dupindex import print_index_stats
+
+    try:
+        with _open_index(index_path, create=bool(directories)) as dup_index:
+            for directory in directories or dup_index.roots():
+                stats = dup_index.update(directory, workers=workers, quiet=quiet)
+                if quiet:
+                    _print_errors(stats.errors)
+                else:
+                    print_index_stats(stats, directory, out=console)
+        return 0
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}")
+        return 1
+
+
+@index.command(name="query")
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    help="Also look in subdirectories",
+    default=False,
+)
+@index_path_option
+@workers_option
+@stats_options
+def index_query(
+    directory: str,
+    recursive: bool,
+    index_path: Optional[str],
+    workers: int,
+) -> int:
+    """List files in DIRECTORY that duplicate anything in the index."""
+    from rich.table import Table
+
+    try:
+        with _open_index(index_path, create=False) as dup_index:
+            duplicates = dup_index.find_duplicates(
+                directory, recursive=recursive, workers=workers
+            )
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}")
+        return 1
+
+    if not duplicates:
+        console.print("[green]No files duplicate anything in the index")
+        return 0
+    table = Table(title="Indexed Duplicates")
+    table.add_column("Hash", style="cyan")
+    table.add_column("Files", style="magenta")
+    for file_hash, files in duplicates.items():
+        table.add_row(file_hash[:8] + "...", "\n".join(str(f) for f in files))
+    console.print(table)
+    return 0
@@ -0,0 +1,46 @@
+"""Rich consoles created on first use.
+
+Importing rich takes a noticeable share of the CLI's startup time, so modules
+hold a lazy_console() stand-in and rich is only imported once something is
+actually printed.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+_lock = threading.Lock()
+
+
+class _LazyConsole:
+    """Forwards attribute access to a rich Console made on first use."""
+
+    __slots__ = ("_console",)
+
+    def __init__(self) -> None:
+        object.__setattr__(self, "_console", None)
+
+    def _get(self) -> "Console":
+        console: Optional["Console"] = self._console
+        if console is None:
+            with _lock:
+                console = self._console
+                if console is None:
+                    from rich.console import Console
+
+                    console = Console()
+                    object.__setattr__(self, "_console", console)
+        return console
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
+
+def lazy_console() -> "Console":
+    """Return a stand-in for ``Console()`` that imports rich on first use."""
+    return cast("Console", _LazyConsole())
@@ -1,169 +1,1234 @@
-from collections import defaultdict
-from hashlib import sha256
+import errno
+import hashlib
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import partial
+from io import BufferedReader
 from pathlib import Path
-from typing import Dict, List, Optional
-import click
-from rich.console import Console
-from rich.progress import Progress
-from rich.prompt import Confirm
-from rich.table import Table
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
-console = Console()
+from . import instrument
+from .console import lazy_console
+from .defaults import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_EXECUTOR,
+    DEFAULT_HASH_ALGORITHM,
+    DEFAULT_HEAD_SIZE,
+    DEFAULT_IO_STRATEGY,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_TAIL_SIZE,
+    EXECUTORS,
+    IO_STRATEGIES,
+    LINK_MODES,
+)
+from .hashcache import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_ENTRIES, HashCache
+from .progress import ProgressReporter
+from .sizegroups import SizeGroups
+from .walker import ErrorHandler, FileEntry, walk_by_directory
 
+try:
+    import xxhash
+except ImportError:  # Optional fast non-cryptographic hashes
+    xxhash = None
 
-def get_file_hash(file_path: Path, block_size: int = 65536) -> str:
+try:
+    import blake3
+except ImportError:  # Optional
+    blake3 = None
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+    from rich.console import Console
+
+console = lazy_console()
+
+# Per-thread read buffers for the "readinto" I/O strategy
+_buffers = threading.local()
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Files sent to a worker process per task with the process executor...
+PROCESS_BATCH_FILES = 128
+# ...or fewer when they add up to this many bytes, so big files are spread out
+PROCESS_BATCH_BYTES = 32 * 1024 * 1024
+
+# Files up to this size are hashed with a single read, in batches
+SMALL_FILE_SIZE = 64 * 1024
+# Small files hashed per task
+SMALL_FILE_BATCH = 256
+# Flags for opening files to hash with os.open
+_O_RDONLY = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+
+# Candidates hashed per batch in low-memory mode
+LOW_MEMORY_BATCH_FILES = 10_000
+
+# ioctl cloning one file's extents into another (linux/fs.h), as used by
+# ``cp --reflink``; supported by btrfs, XFS and a few others
+FICLONE = 0x40049409
+
+# What handle_duplicates() records as the action in each mode
+_PAST_TENSE = {"delete": "deleted", "move": "moved", "link": "linked"}
+
+# Bytes read from each file per step when verifying duplicates
+VERIFY_CHUNK_SIZE = 1024 * 1024
+# Members of a duplicate group held open at once when verifying
+VERIFY_MAX_OPEN = 64
+
+
+@dataclass
+class DedupeStats:
+    """Counters describing how much work each stage of find_duplicates did."""
+
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    # Scanned files skipped as hard links to a file already scanned
+    hard_links_skipped: int = 0
+    size_candidates: int = 0
+    sample_candidates: int = 0
+    bytes_skipped_by_size: int = 0
+    bytes_sampled: int = 0
+    bytes_skipped_by_sample: int = 0
+    bytes_hashed: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    spilled: bool = False
+    peak_memory: Optional[int] = None
+    algorithm: str = DEFAULT_HASH_ALGORITHM
+    # (path, message) for every file or directory that couldn't be read
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class Hasher(Protocol):
+    """Incremental hash object, as returned by hashlib constructors."""
+
+    def update(self, data: Any) -> None: ...  # noqa: E704
+
+    def hexdigest(self) -> str: ...  # noqa: E704
+
+
+# Registered hash algorithms by name; see register_hash_algorithm()
+HASH_ALGORITHMS: Dict[str, Callable[[], Hasher]] = {}
+
+
+def register_hash_algorithm(name: str, factory: Callable[[], Hasher]) -> None:
+    """Make a hash algorithm available to dedupe.
+
+    Args:
+        name: Name used to select the algorithm (e.g. with ``--hash``)
+        factory: Callable returning a new hash object with update() and
+                 hexdigest() methods
+    """
+    HASH_ALGORITHMS[name] = factory
+
+
+def new_hasher(algorithm: str = DEFAULT_HASH_ALGORITHM) -> Hasher:
+    """Create a hash object for a registered algorithm.
+
+    Raises:
+        ValueError: If the algorithm isn't registered
+    """
+    try:
+        factory = HASH_ALGORITHMS[algorithm]
+    except KeyError:
+        available = ", ".join(sorted(HASH_ALGORITHMS))
+        raise ValueError(
+            f"Unknown hash algorithm {algorithm!r} (available: {available})"
+        ) from None
+    return factory()
+
+
+register_hash_algorithm("sha256", hashlib.sha256)
+register_hash_algorithm("blake2b", hashlib.blake2b)
+if xxhash is not None:
+    register_hash_algorithm("xxh64", xxhash.xxh64)
+    if hasattr(xxhash, "xxh3_128"):
+        register_hash_algorithm("xxh3_128", xxhash.xxh3_128)
+if blake3 is not None:
+    register_hash_algorithm("blake3", blake3.blake3)
+
+
+def _advise(fd: int, advice_name: str) -> None:
+    """Pass a posix_fadvise hint for a whole file, where the platform has it."""
+    advice = getattr(os, advice_name, None)
+    if advice is not None and hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            pass  # Only a hint; some filesystems don't support it
+
+
+def _read_buffer(block_size: int) -> bytearray:
+    """Return this thread's reusable read buffer, sized to block_size."""
+    buffer: Optional[bytearray] = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) != block_size:
+        buffer = bytearray(block_size)
+        _buffers.buffer = buffer
+    return buffer
+
+
+def _hash_with_read(f: BufferedReader, hasher: Hasher, block_size: int) -> None:
+    """Feed a file to a hasher with plain read() calls."""
+    buf = f.read(block_size)
+    while len(buf) > 0:
+        hasher.update(buf)
+        buf = f.read(block_size)
+
+
+def _hash_with_readinto(f: BufferedReader, hasher: Hasher, block_size: int) -> None:
+    """Feed a file to a hasher through one reused buffer, without allocating."""
+    view = memoryview(_read_buffer(block_size))
+    try:
+        n = f.readinto(view)
+        while n:
+            hasher.update(view[:n])
+            n = f.readinto(view)
+    finally:
+        view.release()
+
+
+def _hash_with_mmap(f: BufferedReader, hasher: Hasher, block_size: int) -> None:
+    """Feed a file to a hasher straight from a read-only memory map."""
+    if os.fstat(f.fileno()).st_size == 0:
+        return  # Empty files can't be mapped
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mapped) as view:
+            for start in range(0, len(view), block_size):
+                hasher.update(view[start : start + block_size])
+
+
+# How get_file_hash reads files, for each of IO_STRATEGIES
+_IO_STRATEGIES: Dict[str, Callable[[BufferedReader, Hasher, int], None]] = {
+    "read": _hash_with_read,
+    "readinto": _hash_with_readinto,
+    "mmap": _hash_with_mmap,
+}
+
+
+def _warn_unreadable(path: str, error: OSError) -> None:
+    """Default read error handler: print a warning and carry on."""
+    console.print(f"[yellow]Warning: Could not read {path}: {error}")
+
+
+def get_file_hash(
+    file_path: Path,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    io_strategy: str = DEFAULT_IO_STRATEGY,
+    drop_cache: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+) -> str:
     """
     Generate a hash for a file to uniquely identify its contents.
 
     Args:
         file_path: Path to the file
         block_size: Size of chunks to read at once
+        algorithm: Name of a registered hash algorithm
+        io_strategy: How to read the file: "read" allocates a new buffer per
+                     chunk, "readinto" reuses one buffer per thread and "mmap"
+                     hashes a memory map of the file without copying
+        drop_cache: If True, tell the kernel the file's pages won't be needed
+                    again once hashed, so big runs don't evict the page cache
+        on_error: Called with the path and error if the file can't be read,
+                  instead of printing a warning
 
     Returns:
-        str: SHA-256 hash of the file contents
+        str: Hex digest of the file contents, or "" if the file can't be read
+
+    Raises:
+        ValueError: If the algorithm or I/O strategy is unknown
     """
-    hasher = sha256()
+    hasher = new_hasher(algorithm)
+    try:
+        read_into_hasher = _IO_STRATEGIES[io_strategy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown I/O strategy {io_strategy!r} "
+            f"(available: {', '.join(IO_STRATEGIES)})"
+        ) from None
     try:
         with open(file_path, "rb") as f:
-            buf = f.read(block_size)
-            while len(buf) > 0:
-                hasher.update(buf)
-                buf = f.read(block_size)
+            _advise(f.fileno(), "POSIX_FADV_SEQUENTIAL")
+            read_into_hasher(f, hasher, block_size)
+            if drop_cache:
+                _advise(f.fileno(), "POSIX_FADV_DONTNEED")
         return hasher.hexdigest()
     except (IOError, PermissionError) as e:
-        console.print(f"[yellow]Warning: Could not read {file_path}: {e}")
+        (on_error or _warn_unreadable)(str(file_path), e)
         return ""
 
 
-def find_duplicates(directory: str, recursive: bool = False) -> Dict[str, List[Path]]:
+def get_sample_hash(
+    file_path: Path,
+    file_size: int,
+    head_size: int = DEFAULT_HEAD_SIZE,
+    tail_size: int = DEFAULT_TAIL_SIZE,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    on_error: Optional[ErrorHandler] = None,
+) -> str:
+    """
+    Generate a hash of the first and last few bytes of a file.
+
+    Files with different samples cannot be identical, so this cheaply splits
+    same-size groups before any file has to be read in full.
+
+    Args:
+        file_path: Path to the file
+        file_size: Size of the file in bytes, as seen when it was scanned
+        head_size: Number of bytes to read from the start of the file
+        tail_size: Number of bytes to read from the end of the file
+        algorithm: Name of a registered hash algorithm
+        on_error: Called with the path and error if the file can't be read,
+                  instead of printing a warning
+
+    Returns:
+        str: Hex digest of the sampled bytes, or "" if the file can't be read
+    """
+    hasher = new_hasher(algorithm)
+    try:
+        with open(file_path, "rb") as f:
+            hasher.update(f.read(head_size))
+            # Only read the tail if it isn't already covered by the head
+            if tail_size and file_size > head_size:
+                f.seek(max(head_size, file_size - tail_size))
+                hasher.update(f.read(tail_size))
+        return hasher.hexdigest()
+    except (IOError, PermissionError) as e:
+        (on_error or _warn_unreadable)(str(file_path), e)
+        return ""
+
+
+def _sample_length(file_size: int, head_size: int, tail_size: int) -> int:
+    """Return how many bytes get_sample_hash reads for a file of this size."""
+    head = min(head_size, file_size)
+    tail = min(tail_size, file_size - head)
+    return head + tail
+
+
+def _sample_entry(
+    entry: FileEntry,
+    head_size: int,
+    tail_size: int,
+    algorithm: str,
+    on_error: Optional[ErrorHandler],
+) -> str:
+    """Sample hash of a scanned file."""
+    return get_sample_hash(
+        entry.as_path(),
+        entry.size,
+        head_size=head_size,
+        tail_size=tail_size,
+        algorithm=algorithm,
+        on_error=on_error,
+    )
+
+
+def _hash_entry(
+    entry: FileEntry,
+    block_size: int,
+    algorithm: str,
+    io_strategy: str,
+    drop_cache: bool,
+    on_error: Optional[ErrorHandler],
+) -> str:
+    """Full hash of a scanned file."""
+    return get_file_hash(
+        entry.as_path(),
+        block_size=block_size,
+        algorithm=algorithm,
+        io_strategy=io_strategy,
+        drop_cache=drop_cache,
+        on_error=on_error,
+    )
+
+
+def peak_memory() -> Optional[int]:
+    """Return the peak resident memory of this process in bytes, if known."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def _ordered_map(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    executor: Optional["Executor"],
+    window: int,
+) -> Iterator[R]:
+    """Map fn over items on an executor, yielding results in input order.
+
+    At most ``window`` calls are queued at a time so huge candidate lists
+    don't turn into millions of pending futures.
+    """
+    if executor is None:
+        yield from map(fn, items)
+        return
+    pending: Deque["Future[R]"] = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+@dataclass
+class HashingContext:
+    """Settings and shared state for the hashing stages of one run.
+
+    Built by find_duplicates() and by callers that drive check_candidates()
+    themselves, such as the asyncio jobs in OrganiserPro.aio.
+
+    Attributes:
+        head_size: Bytes sampled from the start of each candidate
+        tail_size: Bytes sampled from the end of each candidate
+        algorithm: Name of a registered hash algorithm
+        block_size: Bytes read per call when hashing whole files
+        io_strategy: How whole files are read (one of IO_STRATEGIES)
+        drop_cache: If True, drop hashed files from the page cache
+        cache: Hash cache to reuse and store digests in, if any
+        stats: Counters updated as files are sampled and hashed
+        executor: Pool hashing runs on, or None to hash in the caller
+        window: Most tasks submitted to the executor at once
+        advance: Called with files resolved and bytes hashed; see
+                 ProgressReporter.advance
+        on_error: Called with the path and error of unreadable files
+        process_batch: Files per task when executor is a process pool; 0 for
+                       threads
+    """
+
+    head_size: int
+    tail_size: int
+    algorithm: str
+    block_size: int
+    io_strategy: str
+    drop_cache: bool
+    cache: Optional[HashCache]
+    stats: DedupeStats
+    executor: Optional["Executor"]
+    window: int
+    advance: Callable[[int, int], None]
+    on_error: Optional[ErrorHandler] = None
+    process_batch: int = 0
+
+
+# Digests of a batch of files and the read error to report for each, if any
+BatchResults = List[Tuple[str, Optional[OSError]]]
+# A batch function and the files to pass it, run as one executor task
+_BatchTask = Tuple[Callable[[List[FileEntry]], BatchResults], List[FileEntry]]
+
+
+def _digest_batch(compute: Callable[..., str], files: List[FileEntry]) -> BatchResults:
+    """Digest a batch of files one by one with a per-file compute function."""
+    results: BatchResults = []
+    for entry in files:
+        errors: List[OSError] = []
+        digest = compute(entry, on_error=lambda path, e: errors.append(e))
+        results.append((digest, errors[0] if errors else None))
+    return results
+
+
+def _hash_small_files(
+    files: List[FileEntry], algorithm: str, drop_cache: bool = False
+) -> BatchResults:
+    """Hash whole small files, each with a single read.
+
+    Equivalent to get_file_hash for each file, minus the per-file overhead
+    that dominates for tiny files: no buffered file object, read loop, I/O
+    strategy or read-ahead advice, and the hasher is looked up once.
+    """
+    factory = HASH_ALGORITHMS[algorithm]
+    results: BatchResults = []
+    for entry in files:
+        try:
+            fd = os.open(entry.path, _O_RDONLY)
+            try:
+                data = os.read(fd, entry.size + 1)
+                if len(data) != entry.size:
+                    # Changed since it was scanned; hash what is there now
+                    chunks = [data]
+                    while chunks[-1]:
+                        chunks.append(os.read(fd, DEFAULT_BLOCK_SIZE))
+                    data = b"".join(chunks)
+                if drop_cache:
+                    _advise(fd, "POSIX_FADV_DONTNEED")
+            finally:
+                os.close(fd)
+        except OSError as e:
+            results.append(("", e))
+            continue
+        hasher = factory()
+        hasher.update(data)
+        results.append((hasher.hexdigest(), None))
+    return results
+
+
+def _run_batch(task: _BatchTask) -> BatchResults:
+    batch_function, files = task
+    return batch_function(files)
+
+
+def _map_digests(
+    compute: Callable[..., str],
+    files: Sequence[FileEntry],
+    ctx: HashingContext,
+    batch_bytes: Optional[int] = None,
+    small_files: Optional[Callable[[List[FileEntry]], BatchResults]] = None,
+) -> Iterator[str]:
+    """Digest files on the context's executor, yielding in input order.
+
+    ``compute`` is called as ``compute(entry, on_error=...)``, one file per
+    task on threads. On a process pool, entries (paths and stat data, never
+    contents) are sent in batches of ``ctx.process_batch`` files or
+    ``batch_bytes`` bytes to amortise the IPC. Runs of files up to
+    SMALL_FILE_SIZE are handed to ``small_files`` instead, if given,
+    SMALL_FILE_BATCH at a time. Read errors are always reported from the
+    calling thread.
+    """
+    per_file = partial(_digest_batch, compute)
+    tasks: List[_BatchTask] = []
+    task_bytes = 0
+    for entry in files:
+        if small_files is not None and entry.size <= SMALL_FILE_SIZE:
+            batch_function, max_files, max_bytes = small_files, SMALL_FILE_BATCH, None
+        else:
+            batch_function, max_files = per_file, ctx.process_batch or 1
+            max_bytes = batch_bytes
+        # Consecutive files of the same kind share a task, so results
+        # still come back in input order
+        if (
+            not tasks
+            or tasks[-1][0] is not batch_function
+            or len(tasks[-1][1]) >= max_files
+            or (max_bytes is not None and task_bytes >= max_bytes)
+        ):
+            tasks.append((batch_function, []))
+            task_bytes = 0
+        tasks[-1][1].append(entry)
+        task_bytes += entry.size
+
+    on_error = ctx.on_error or _warn_unreadable
+    results = _ordered_map(_run_batch, tasks, ctx.executor, ctx.window)
+    for (_, batch), batch_results in zip(tasks, results):
+        for entry, (digest, error) in zip(batch, batch_results):
+            if error is not None:
+                on_error(entry.path, error)
+            yield digest
+
+
+def _digest_files(
+    files: Sequence[FileEntry],
+    kind: str,
+    compute: Callable[..., str],
+    ctx: HashingContext,
+    track_progress: bool = False,
+    batch_bytes: Optional[int] = None,
+    small_files: Optional[Callable[[List[FileEntry]], BatchResults]] = None,
+) -> Tuple[List[str], List[bool]]:
+    """Digest a list of scanned files, reusing cached digests.
+
+    Cache lookups and stores happen on the calling thread; only the misses
+    are handed to the executor (see _map_digests, which ``compute``,
+    ``batch_bytes`` and ``small_files`` are passed to). With
+    ``track_progress`` each file is reported to ``ctx.advance`` as it is done.
+
+    Returns:
+        Tuple[List[str], List[bool]]: Digests in the same order as ``files``
+            ("" for unreadable files) and whether each file had to be read
+    """
+    cache, stats = ctx.cache, ctx.stats
+    digests: List[str] = [""] * len(files)
+    was_read = [True] * len(files)
+    misses: List[FileEntry] = []
+    miss_indexes: List[int] = []
+    for i, entry in enumerate(files):
+        digest = None
+        if cache is not None:
+            digest = cache.get(entry.key, kind, algorithm=ctx.algorithm)
+        if digest is None:
+            if cache is not None:
+                stats.cache_misses += 1
+            misses.append(entry)
+            miss_indexes.append(i)
+        else:
+            stats.cache_hits += 1
+            digests[i] = digest
+            was_read[i] = False
+            if track_progress:
+                ctx.advance(1, 0)
+    if cache is not None:
+        instrument.count("cache_hits", len(files) - len(misses))
+        instrument.count("cache_misses", len(misses))
+    instrument.count("files_read", len(misses))
+
+    computed = _map_digests(compute, misses, ctx, batch_bytes, small_files)
+    for i, entry, digest in zip(miss_indexes, misses, computed):
+        digests[i] = digest
+        if digest and cache is not None:
+            cache.put(entry.key, kind, digest, algorithm=ctx.algorithm)
+        if track_progress:
+            ctx.advance(1, entry.size)
+    return digests, was_read
+
+
+def check_candidates(
+    candidates: List[FileEntry],
+    files_by_hash: Dict[str, List[Path]],
+    ctx: HashingContext,
+) -> None:
+    """Run the sample and full-hash stages over complete same-size groups.
+
+    This is the part of find_duplicates() after scanning, exposed so callers
+    can feed it size groups in batches of their own (OrganiserPro.aio does).
+    Every group passed must be complete, or duplicates may be missed.
+    Files that turn out to be identical are appended to ``files_by_hash``.
+    Each candidate is reported to ``ctx.advance`` once, when it is hashed in
+    full or ruled out by its sample. Files no bigger than the sample skip
+    the sample stage, since sampling them would read them whole anyway.
+    """
+    head_size, tail_size, stats = ctx.head_size, ctx.tail_size, ctx.stats
+
+    # Split the size groups by head/tail sample before reading everything
+    if head_size > 0 or tail_size > 0:
+        whole = [entry for entry in candidates if entry.size <= head_size + tail_size]
+        to_sample = [
+            entry for entry in candidates if entry.size > head_size + tail_size
+        ]
+        with instrument.phase("sample") as sample_phase:
+            sample_hashes, was_read = _digest_files(
+                to_sample,
+                f"sample:{head_size}:{tail_size}",
+                partial(
+                    _sample_entry,
+                    head_size=head_size,
+                    tail_size=tail_size,
+                    algorithm=ctx.algorithm,
+                ),
+                ctx,
+            )
+        by_sample: Dict[Tuple[int, str], List[FileEntry]] = defaultdict(list)
+        for entry, sample_hash, read in zip(to_sample, sample_hashes, was_read):
+            if read:
+                sample_length = _sample_length(entry.size, head_size, tail_size)
+                stats.bytes_sampled += sample_length
+                sample_phase.files += 1
+                sample_phase.bytes += sample_length
+            if sample_hash:
+                by_sample[(entry.size, sample_hash)].append(entry)
+        candidates = whole
+        for (size, _), group in by_sample.items():
+            if len(group) > 1:
+                candidates.extend(group)
+            else:
+                sample_length = _sample_length(size, head_size, tail_size)
+                stats.bytes_skipped_by_sample += size - sample_length
+        ctx.advance(len(whole) + len(to_sample) - len(candidates), 0)
+    stats.sample_candidates += len(candidates)
+
+    with instrument.phase("hash") as hash_phase:
+        file_hashes, was_read = _digest_files(
+            candidates,
+            "full",
+            partial(
+                _hash_entry,
+                block_size=ctx.block_size,
+                algorithm=ctx.algorithm,
+                io_strategy=ctx.io_strategy,
+                drop_cache=ctx.drop_cache,
+            ),
+            ctx,
+            track_progress=True,
+            batch_bytes=PROCESS_BATCH_BYTES,
+            small_files=partial(
+                _hash_small_files, algorithm=ctx.algorithm, drop_cache=ctx.drop_cache
+            ),
+        )
+    for entry, file_hash, read in zip(candidates, file_hashes, was_read):
+        if read:
+            stats.bytes_hashed += entry.size
+            hash_phase.files += 1
+            hash_phase.bytes += entry.size
+        if file_hash:  # Only add if we could read the file
+            files_by_hash[file_hash].append(entry.as_path())
+
+
+def find_duplicates(
+    directory: str,
+    recursive: bool = False,
+    head_size: int = DEFAULT_HEAD_SIZE,
+    tail_size: int = DEFAULT_TAIL_SIZE,
+    stats: Optional[DedupeStats] = None,
+    cache: Optional[HashCache] = None,
+    workers: int = 1,
+    low_memory: bool = False,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    io_strategy: str = DEFAULT_IO_STRATEGY,
+    drop_cache: bool = False,
+    quiet: bool = False,
+    executor: str = DEFAULT_EXECUTOR,
+) -> Dict[str, List[Path]]:
     """
     Find duplicate files in the given directory.
 
+    Candidates are narrowed down in stages: files are grouped by size, then
+    by a hash of a small head and tail sample, and only files that still
+    collide are hashed in full. Hard links to a file already scanned are
+    skipped, so one file is never reported as its own duplicate. Files are
+    hashed concurrently when ``workers`` is greater than 1; the result is
+    the same either way. Threads suit hashers that release the GIL while
+    hashing (hashlib does for large buffers); with ``executor="process"``
+    batches of files are hashed in worker processes instead, which also
+    scales pure-Python hashers and trees of many small files. Worker
+    processes only know the algorithms registered when the module is
+    imported (or, on platforms that fork, when the pool starts).
+
+    In low-memory mode scanned files are spilled to a temporary on-disk
+    store once ``memory_budget`` is exceeded, and same-size groups are
+    hashed in bounded batches instead of all at once.
+
     Args:
         directory: Directory to search for duplicate files
         recursive: If True, search recursively in subdirectories
+        head_size: Bytes sampled from the start of each candidate (0 to disable)
+        tail_size: Bytes sampled from the end of each candidate (0 to disable)
+        stats: If provided, filled in with per-stage file and byte counts
+        cache: If provided, digests are looked up in and saved to this cache
+        workers: Number of threads or processes used to hash files
+        low_memory: If True, bound memory use as described above
+        memory_budget: Estimated bytes of scan records kept in memory in
+                       low-memory mode
+        algorithm: Name of a registered hash algorithm (see HASH_ALGORITHMS)
+        block_size: Bytes read per call when hashing whole files
+        io_strategy: How whole files are read (see get_file_hash)
+        drop_cache: If True, drop hashed files from the page cache
+        quiet: If True, print nothing; unreadable files are only recorded in
+               ``stats.errors``
+        executor: "thread" or "process" (see EXECUTORS); how files are
+                  hashed when workers > 1
 
     Returns:
         Dict mapping file hashes to lists of duplicate file paths
+
+    Raises:
+        ValueError: If the hash algorithm, I/O strategy or executor is unknown
     """
-    files_by_size: Dict[int, List[Path]] = defaultdict(list)
+    # Fail before scanning if the algorithm or strategy is unknown
+    new_hasher(algorithm)
+    if io_strategy not in IO_STRATEGIES:
+        raise ValueError(f"Unknown I/O strategy {io_strategy!r}")
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}")
+    if stats is None:
+        stats = DedupeStats()
+    stats.algorithm = algorithm
     files_by_hash: Dict[str, List[Path]] = defaultdict(list)
     dir_path = Path(directory)
+    started = time.perf_counter()
 
     if not dir_path.exists() or not dir_path.is_dir():
-        console.print(f"[red]Error: {directory} is not a valid directory")
+        stats.errors.append((directory, "not a valid directory"))
+        if not quiet:
+            console.print(f"[red]Error: {directory} is not a valid directory")
         return {}
 
-    # First group files by size (potential duplicates will have same size)
-    with Progress() as progress:
-        task = progress.add_task("Scanning files...", total=0)
+    def record_inaccessible(path: str, error: OSError) -> None:
+        stats.errors.append((path, str(error)))
+        if not quiet:
+            console.print(f"[yellow]Warning: Could not access {path}: {error}")
 
-        # Get all files, recursively if requested
-        if recursive:
-            all_files = list(dir_path.rglob("*"))
-        else:
-            all_files = list(dir_path.glob("*"))
+    def record_unreadable(path: str, error: OSError) -> None:
+        stats.errors.append((path, str(error)))
+        if not quiet:
+            _warn_unreadable(path, error)
 
-        progress.update(task, total=len(all_files))
+    size_groups = SizeGroups(memory_budget if low_memory else None)
+    window = max(1, workers) * 16
+    pool: Optional["Executor"] = None
+    if workers > 1 and executor == "process":
+        from concurrent.futures import ProcessPoolExecutor
 
-        for file_path in all_files:
-            progress.advance(task)
-            if file_path.is_file() and not file_path.name.startswith("."):
-                try:
-                    file_size = file_path.stat().st_size
-                    files_by_size[file_size].append(file_path)
-                except (OSError, PermissionError) as e:
-                    console.print(f"[yellow]Warning: Could not access {file_path}: {e}")
-
-    # For files with the same size, compare hashes
-    with Progress() as progress:
-        task = progress.add_task("Checking for duplicates...", total=len(files_by_size))
-
-        for size, files in files_by_size.items():
-            progress.advance(task)
-            if len(files) > 1:  # Potential duplicates
-                for file_path in files:
-                    file_hash = get_file_hash(file_path)
-                    if file_hash:  # Only add if we could read the file
-                        files_by_hash[file_hash].append(file_path)
+        pool = ProcessPoolExecutor(max_workers=workers)
+    elif workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # First group files by size (potential duplicates will have same size).
+        # Grouping starts as soon as the first directory has been listed.
+        with ProgressReporter(console, enabled=not quiet) as progress:
+            with instrument.phase("scan") as scan_phase:
+                progress.start("Scanning files...")
+                for current, files in walk_by_directory(
+                    dir_path, recursive=recursive, on_error=record_inaccessible
+                ):
+                    size_groups.add_directory(current, files)
+                    progress.advance(len(files))
+                    stats.files_scanned += len(files)
+                    stats.bytes_scanned += sum(entry.size for entry in files)
+                scan_phase.files = stats.files_scanned
+
+            # A unique size can't have duplicates
+            stats.bytes_skipped_by_size = size_groups.unique_bytes()
+            stats.hard_links_skipped = size_groups.hard_links
+            stats.spilled = size_groups.spilled
+            total = None if size_groups.spilled else size_groups.candidate_count()
+
+            progress.start("Checking for duplicates...", total=total)
+            ctx = HashingContext(
+                head_size=head_size,
+                tail_size=tail_size,
+                algorithm=algorithm,
+                block_size=block_size,
+                io_strategy=io_strategy,
+                drop_cache=drop_cache,
+                cache=cache,
+                stats=stats,
+                executor=pool,
+                window=window,
+                advance=progress.advance,
+                on_error=record_unreadable,
+                process_batch=(
+                    PROCESS_BATCH_FILES if pool and executor == "process" else 0
+                ),
+            )
+
+            batch: List[FileEntry] = []
+            for _, group in size_groups.groups():
+                stats.size_candidates += len(group)
+                batch.extend(group)
+                if low_memory and len(batch) >= LOW_MEMORY_BATCH_FILES:
+                    check_candidates(batch, files_by_hash, ctx)
+                    batch = []
+            if batch:
+                check_candidates(batch, files_by_hash, ctx)
+    finally:
+        size_groups.close()
+        if pool is not None:
+            pool.shutdown()
+    stats.peak_memory = peak_memory()
+    stats.seconds = time.perf_counter() - started
 
     # Only keep hashes with multiple files
     return {h: paths for h, paths in files_by_hash.items() if len(paths) > 1}
 
 
+@dataclass
+class DuplicateAction:
+    """What handle_duplicates() did with one duplicate file."""
+
+    path: Path
+    original: Path
+    digest: str
+    # "reported", "deleted", "moved" or "linked"; what was attempted if
+    # error is set
+    action: str
+    destination: Optional[Path] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class DuplicateReport:
+    """Outcome of handle_duplicates(), one entry per duplicate file."""
+
+    groups: int = 0
+    actions: List[DuplicateAction] = field(default_factory=list)
+    # "report", "delete", "move" or "link"
+    mode: str = "report"
+
+    @property
+    def files_deleted(self) -> int:
+        return sum(1 for a in self.actions if a.action == "deleted" and not a.error)
+
+    @property
+    def files_moved(self) -> int:
+        return sum(1 for a in self.actions if a.action == "moved" and not a.error)
+
+    @property
+    def files_linked(self) -> int:
+        return sum(1 for a in self.actions if a.action == "linked" and not a.error)
+
+    @property
+    def errors(self) -> List[DuplicateAction]:
+        return [a for a in self.actions if a.error]
+
+
+def _clone_file(source: Path, target: str) -> None:
+    """Create target as a copy-on-write clone of source with FICLONE.
+
+    Raises:
+        OSError: If the platform or filesystem can't clone files
+    """
+    try:
+        import fcntl
+    except ImportError:  # Not available on Windows
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported here") from None
+    with open(source, "rb") as src:
+        fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(fd, FICLONE, src.fileno())
+        except OSError:
+            os.close(fd)
+            os.unlink(target)
+            raise
+        os.close(fd)
+
+
+def _copy_owner(source: Path, target: str) -> None:
+    """Give target the owner and group of source, as far as allowed.
+
+    Only root can give a file away; other users can still set the group to
+    one they belong to. Whatever isn't permitted is left as created.
+    """
+    if not hasattr(os, "chown"):
+        return  # Windows
+    st = os.stat(source)
+    for uid, gid in ((st.st_uid, st.st_gid), (-1, st.st_gid)):
+        try:
+            os.chown(target, uid, gid)
+            return
+        except PermissionError:
+            continue
+
+
+def link_duplicate(original: Path, duplicate: Path, mode: str) -> None:
+    """Replace a duplicate with a link to or clone of the kept file.
+
+    The link is created under a temporary name next to the duplicate and
+    renamed over it, so the duplicate's path never stops existing and is
+    left untouched if anything fails.
+
+    Args:
+        original: File being kept
+        duplicate: File with the same contents to replace
+        mode: "hard" for a hard link to original (same filesystem only), or
+              "reflink" for a copy-on-write clone that shares its blocks
+              (btrfs, XFS); a clone keeps the duplicate's permissions and
+              timestamps, and its owner and group where the user is
+              allowed to set them (always as root)
+
+    Raises:
+        ValueError: If mode isn't one of LINK_MODES
+        OSError: If the link or clone can't be created
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(
+            f"Unknown link mode {mode!r} (available: {', '.join(LINK_MODES)})"
+        )
+    if mode == "hard" and os.path.samefile(original, duplicate):
+        return  # Already the same file
+    for attempt in range(100):
+        tmp = str(duplicate.with_name(f".{duplicate.name}.{os.getpid()}-{attempt}.tmp"))
+        try:
+            if mode == "hard":
+                os.link(original, tmp)
+            else:
+                _clone_file(original, tmp)
+            break
+        except FileExistsError:
+            continue  # Left over from an interrupted run; pick another name
+    else:
+        raise FileExistsError(
+            errno.EEXIST, "no free temporary name", str(duplicate.parent)
+        )
+    try:
+        if mode == "reflink":
+            _copy_owner(duplicate, tmp)
+            shutil.copystat(duplicate, tmp)
+        os.replace(tmp, duplicate)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def verify_identical(
+    original: Path,
+    candidates: Sequence[Path],
+    chunk_size: int = VERIFY_CHUNK_SIZE,
+    max_open: int = VERIFY_MAX_OPEN,
+) -> Dict[Path, str]:
+    """Compare files byte for byte with an original, in a single pass.
+
+    The original and up to ``max_open`` candidates are read chunk by chunk
+    in lockstep, so each file is read once however many members a group
+    has, and a candidate is dropped as soon as it differs.
+
+    Args:
+        original: File the candidates should be identical to
+        candidates: Files to compare with it
+        chunk_size: Bytes read from each file per step
+        max_open: Candidates compared per pass over the original
+
+    Returns:
+        Dict[Path, str]: Why each candidate that isn't identical (or couldn't
+            be read) failed; candidates not in it are identical
+    """
+    mismatches: Dict[Path, str] = {}
+    with instrument.phase("verify") as verify_phase:
+        for start in range(0, len(candidates), max_open):
+            window = candidates[start : start + max_open]
+            with ExitStack() as stack:
+                try:
+                    source = stack.enter_context(open(original, "rb"))
+                except OSError as e:
+                    for path in window:
+                        mismatches[path] = f"could not read {original}: {e}"
+                    continue
+                _advise(source.fileno(), "POSIX_FADV_SEQUENTIAL")
+                readers: Dict[Path, BufferedReader] = {}
+                for path in window:
+                    try:
+                        readers[path] = stack.enter_context(open(path, "rb"))
+                    except OSError as e:
+                        mismatches[path] = str(e)
+                        continue
+                    _advise(readers[path].fileno(), "POSIX_FADV_SEQUENTIAL")
+                    verify_phase.files += 1
+
+                while readers:
+                    expected = source.read(chunk_size)
+                    verify_phase.bytes += len(expected)
+                    for path, reader in list(readers.items()):
+                        try:
+                            chunk = reader.read(chunk_size)
+                        except OSError as e:
+                            mismatches[path] = str(e)
+                            del readers[path]
+                            continue
+                        verify_phase.bytes += len(chunk)
+                        if chunk != expected:
+                            mismatches[path] = f"contents differ from {original}"
+                            del readers[path]
+                    if not expected:
+                        break  # Everything left matched up to the end
+    instrument.count("verify_mismatches", len(mismatches))
+    return mismatches
+
+
 def handle_duplicates(
     duplicates: Dict[str, List[Path]],
     delete: bool = False,
     move_to: Optional[str] = None,
-) -> None:
-    """Handle duplicate files by printing, deleting, or moving them.
+    quiet: bool = False,
+    link: Optional[str] = None,
+    verify: bool = True,
+) -> DuplicateReport:
+    """Handle duplicate files by reporting, deleting, moving or linking them.
 
     Args:
         duplicates: Dictionary mapping file hashes to lists of duplicate files
         delete: If True, delete all but the first file in each duplicate set
         move_to: If provided, move duplicates to this directory instead of deleting
-    """
-    # Count total files in all duplicate groups
-    total_duplicate_groups = sum(1 for files in duplicates.values() if len(files) > 1)
-    total_duplicate_files = sum(
-        len(files) - 1 for files in duplicates.values() if len(files) > 1
-    )
+        quiet: If True, don't print the report (see print_duplicate_report)
+        link: If "hard" or "reflink", replace duplicates with a hard link to
+              or a clone of the first file (see link_duplicate), so space is
+              reclaimed without any path disappearing
+        verify: If True (the default), compare each duplicate byte for byte
+                with the kept file first (see verify_identical) and leave any
+                that differ alone, reporting them as errors; False trusts
+                the digests
 
-    if total_duplicate_groups == 0:
-        console.print("[green]No duplicate files found![/green]")
-        return
+    Returns:
+        DuplicateReport: What was done with each duplicate, and any errors
 
-    # Prepare the summary message
-    file_word = "file" if total_duplicate_files == 1 else "files"
-    console.print(
-        f"\nFound {total_duplicate_files} duplicate {file_word} "
-        f"in {total_duplicate_groups} groups:"
+    Raises:
+        ValueError: If link isn't one of LINK_MODES
+    """
+    if link is not None and link not in LINK_MODES:
+        raise ValueError(
+            f"Unknown link mode {link!r} (available: {', '.join(LINK_MODES)})"
+        )
+    if delete:
+        mode = "delete"
+    elif move_to:
+        mode = "move"
+    elif link:
+        mode = "link"
+    else:
+        mode = "report"
+    report = DuplicateReport(
+        groups=sum(1 for files in duplicates.values() if len(files) > 1),
+        mode=mode,
     )
 
     # Create destination directory if moving files
-    if move_to:
+    if move_to and report.groups:
         move_to_path = Path(move_to).expanduser().resolve()
         move_to_path.mkdir(parents=True, exist_ok=True)
 
-    for file_hash, files in duplicates.items():
-        if len(files) <= 1:
-            continue
+    with instrument.phase("handle") as handle_phase:
+        for file_hash, files in duplicates.items():
+            if len(files) <= 1:
+                continue
 
-        console.print(f"\n[bold]Hash:[/] {file_hash[:8]}...")
+            # Keep the first file, handle the rest as duplicates
+            original = files[0]
+            mismatches: Dict[Path, str] = {}
+            if verify and mode != "report":
+                mismatches = verify_identical(original, files[1:])
+            for duplicate in files[1:]:
+                action = DuplicateAction(duplicate, original, file_hash, "reported")
+                report.actions.append(action)
+                if duplicate in mismatches:
+                    # Don't act on a file that only shares the digest
+                    action.action = _PAST_TENSE[mode]
+                    action.error = f"left in place, {mismatches[duplicate]}"
+                elif delete:
+                    action.action = "deleted"
+                    try:
+                        duplicate.unlink()
+                        handle_phase.files += 1
+                        instrument.count("files_deleted")
+                    except OSError as e:
+                        action.error = str(e)
+                elif move_to:
+                    action.action = "moved"
+                    try:
+                        target = move_to_path / duplicate.name
+                        if target.exists():
+                            # Add a suffix if the target already exists
+                            suffix = 1
+                            while target.exists():
+                                target = target.with_stem(f"{duplicate.stem}_{suffix}")
+                                suffix += 1
+                        duplicate.rename(target)
+                        action.destination = target
+                        handle_phase.files += 1
+                        instrument.count("files_moved")
+                    except OSError as e:
+                        action.error = str(e)
+                elif link:
+                    action.action = "linked"
+                    try:
+                        link_duplicate(original, duplicate, link)
+                        handle_phase.files += 1
+                        instrument.count("files_linked")
+                    except OSError as e:
+                        action.error = str(e)
 
-        # Keep the first file, handle the rest as duplicates
-        original = files[0]
-        console.print(f"  [green]Keep:[/] {original}")
+    if not quiet:
+        print_duplicate_report(report)
+    return report
 
-        for duplicate in files[1:]:
-            if delete:
-                try:
-                    duplicate.unlink()
-                    console.print(f"  [red]Deleted:[/] {duplicate}")
-                except OSError as e:
-                    msg = f"  [yellow]Error deleting {duplicate}: {e}"
-                    console.print(msg)
-            elif move_to:
-                try:
-                    target = move_to_path / duplicate.name
-                    if target.exists():
-                        # Add a suffix if the target already exists
-                        suffix = 1
-                        while target.exists():
-                            target = target.with_stem(f"{duplicate.stem}_{suffix}")
-                            suffix += 1
-                    duplicate.rename(target)
-                    console.print(f"  [yellow]Moved to:[/] {target}")
-                except OSError as e:
-                    msg = f"  [yellow]Error moving {duplicate}: {e}"
-                    console.print(msg)
-            else:
-                console.print(f"  [yellow]Duplicate:[/] {duplicate}")
 
-    if not delete and not move_to:
+def print_duplicate_report(
+    report: DuplicateReport, out: Optional["Console"] = None
+) -> None:
+    """Print what handle_duplicates() did, grouped by hash.
+
+    Args:
+        report: Report returned by handle_duplicates
+        out: Console to print to (defaults to the module console)
+    """
+    out = out or console
+    if report.groups == 0:
+        out.print("[green]No duplicate files found![/green]")
+        return
+
+    file_word = "file" if len(report.actions) == 1 else "files"
+    out.print(
+        f"\nFound {len(report.actions)} duplicate {file_word} "
+        f"in {report.groups} groups:"
+    )
+
+    current_hash = None
+    for action in report.actions:
+        if action.digest != current_hash:
+            current_hash = action.digest
+            out.print(f"\n[bold]Hash:[/] {action.digest[:8]}...")
+            out.print(f"  [green]Keep:[/] {action.original}")
+        if action.error:
+            verb = {"deleted": "deleting", "moved": "moving"}.get(
+                action.action, "linking"
+            )
+            out.print(f"  [yellow]Error {verb} {action.path}: {action.error}")
+        elif action.action == "deleted":
+            out.print(f"  [red]Deleted:[/] {action.path}")
+        elif action.action == "moved":
+            out.print(f"  [yellow]Moved to:[/] {action.destination}")
+        elif action.action == "linked":
+            out.print(f"  [cyan]Linked:[/] {action.path}")
+        else:
+            out.print(f"  [yellow]Duplicate:[/] {action.path}")
+
+    if report.mode == "report":
         msg = "\n[bold]Note:[/] Use --delete to remove "
         msg += "duplicates or --move-to to move them"
-        console.print(msg)
+        out.print(msg)
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Format a byte count as a short human-readable string."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(num_bytes) < 1024 or unit == "TB":
+            break
+        num_bytes /= 1024
+    return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+
+
+def print_dedupe_summary(stats: DedupeStats, out: Optional["Console"] = None) -> None:
+    """Print how many files each stage kept and how many bytes it avoided reading.
+
+    Args:
+        stats: Counters filled in by find_duplicates
+        out: Console to print to (defaults to the module console)
+    """
+    from rich.table import Table
+
+    out = out or console
+    table = Table(title=f"Dedupe Stages ({stats.algorithm})")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Candidates", justify="right")
+    table.add_column("Bytes read", justify="right")
+    table.add_column("Bytes avoided", justify="right", style="green")
+    table.add_row(
+        "Size",
+        str(stats.size_candidates),
+        "0 B",
+        format_bytes(stats.bytes_skipped_by_size),
+    )
+    table.add_row(
+        "Head/tail sample",
+        str(stats.sample_candidates),
+        format_bytes(stats.bytes_sampled),
+        format_bytes(stats.bytes_skipped_by_sample),
+    )
+    table.add_row("Full hash", "", format_bytes(stats.bytes_hashed), "")
+    out.print(table)
+    if stats.hard_links_skipped:
+        out.print(f"Hard links skipped: {stats.hard_links_skipped}")
+    if stats.cache_hits or stats.cache_misses:
+        out.print(f"Hash cache: {stats.cache_hits} hits, {stats.cache_misses} misses")
 
 
 def find_duplicates_cli(
@@ -172,6 +1237,23 @@ def find_duplicates_cli(
     delete: bool = False,
     move_to: Optional[str] = None,
     dry_run: bool = False,
+    head_size: Optional[int] = None,
+    tail_size: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    cache_max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+    cache_max_age: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    workers: int = 1,
+    low_memory: bool = False,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    algorithm: Optional[str] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    io_strategy: str = DEFAULT_IO_STRATEGY,
+    drop_cache: bool = False,
+    quiet: bool = False,
+    link: Optional[str] = None,
+    verify: bool = True,
+    index_path: Optional[str] = None,
+    executor: str = DEFAULT_EXECUTOR,
 ) -> None:
     """CLI interface for finding and handling duplicate files.
 
@@ -181,41 +1263,152 @@ def find_duplicates_cli(
         delete: If True, delete duplicate files (keeping the oldest)
         move_to: If provided, move duplicate files to this directory instead of deleting
         dry_run: If True, only show what would be done without making changes
+        head_size: Bytes sampled from the start of each candidate file
+                   (default DEFAULT_HEAD_SIZE, or the index's setting)
+        tail_size: Bytes sampled from the end of each candidate file, as above
+        cache_path: If provided, reuse and store digests in this cache file
+        cache_max_entries: Evict least recently used cache entries beyond this
+        cache_max_age: Evict cache entries unused for this many days
+        workers: Number of threads used to hash files
+        low_memory: If True, spill scan records to disk past memory_budget
+        memory_budget: Estimated bytes of scan records kept in memory
+        algorithm: Name of a registered hash algorithm (default
+                   DEFAULT_HASH_ALGORITHM, or the index's setting)
+        block_size: Bytes read per call when hashing whole files
+        io_strategy: How whole files are read ("read", "readinto" or "mmap")
+        drop_cache: If True, drop hashed files from the page cache
+        quiet: If True, only print errors and prompts
+        link: If "hard" or "reflink", replace duplicate files with hard links
+              to or clones of the kept file
+        verify: If True (the default), compare duplicates byte for byte
+                with the kept file before deleting, moving or linking them
+        index_path: If provided, find files in directory that duplicate
+                    anything in this index (see dupindex) instead of
+                    comparing them with each other; the indexed copies are
+                    kept. algorithm, head_size and tail_size must match the
+                    index if given, and the cache, low-memory, I/O and
+                    executor options can't be used with it
+        executor: "thread" or "process"; how workers hash files
+
+    Raises:
+        ValueError: If index_path is combined with options it doesn't use,
+                    or with hash settings the index wasn't built with
     """
-    console = Console()
+    import click
+    from rich.prompt import Confirm
+    from rich.table import Table
+
+    console = lazy_console()
 
-    if delete and move_to:
-        console.print("[red]Error: Cannot specify both --delete and --move-to")
+    if sum(map(bool, (delete, move_to, link))) > 1:
+        console.print("[red]Error: Choose only one of --delete, --move-to and --link")
         return
+    if index_path:
+        unused = [
+            name
+            for name, used in (
+                ("cache_path", cache_path),
+                ("low_memory", low_memory),
+                ("io_strategy", io_strategy != DEFAULT_IO_STRATEGY),
+                ("drop_cache", drop_cache),
+                ("executor", executor != DEFAULT_EXECUTOR),
+            )
+            if used
+        ]
+        if unused:
+            raise ValueError(f"{', '.join(unused)} can't be combined with index_path")
 
-    if not (delete or move_to) and not Confirm.ask(
+    if not (delete or move_to or link) and not Confirm.ask(
         "\n[red]WARNING: This will delete duplicate files. Continue?", default=False
     ):
         return
 
-    duplicates = find_duplicates(directory, recursive=recursive)
+    stats = DedupeStats()
+    if index_path:
+        from .dupindex import DuplicateIndex
+
+        with DuplicateIndex(
+            index_path,
+            algorithm=algorithm,
+            head_size=head_size,
+            tail_size=tail_size,
+            create=False,
+        ) as index:
+            duplicates = index.find_duplicates(
+                directory,
+                recursive=recursive,
+                stats=stats,
+                workers=workers,
+                block_size=block_size,
+                quiet=quiet,
+            )
+    else:
+        cache = HashCache(cache_path) if cache_path else None
+        try:
+            duplicates = find_duplicates(
+                directory,
+                recursive=recursive,
+                head_size=DEFAULT_HEAD_SIZE if head_size is None else head_size,
+                tail_size=DEFAULT_TAIL_SIZE if tail_size is None else tail_size,
+                stats=stats,
+                cache=cache,
+                workers=workers,
+                low_memory=low_memory,
+                memory_budget=memory_budget,
+                algorithm=algorithm or DEFAULT_HASH_ALGORITHM,
+                block_size=block_size,
+                io_strategy=io_strategy,
+                drop_cache=drop_cache,
+                quiet=quiet,
+                executor=executor,
+            )
+            if cache is not None:
+                cache.prune(max_entries=cache_max_entries, max_age_days=cache_max_age)
+        finally:
+            if cache is not None:
+                cache.close()
+    if quiet:
+        # Errors were only recorded; still surface them
+        for path, message in stats.errors:
+            console.print(f"[yellow]Warning: Could not read {path}: {message}")
+    else:
+        print_dedupe_summary(stats, out=console)
 
     if not duplicates:
-        console.print("\n[green]No duplicate files found![/]")
+        if not quiet:
+            console.print("\n[green]No duplicate files found![/]")
         return
 
-    # Create and display a table of duplicates
-    table = Table(title="Duplicate Files")
-    table.add_column("Hash", style="cyan")
-    table.add_column("Files", style="magenta")
+    if not quiet:
+        # Create and display a table of duplicates
+        table = Table(title="Duplicate Files")
+        table.add_column("Hash", style="cyan")
+        table.add_column("Files", style="magenta")
 
-    for file_hash, files in duplicates.items():
-        table.add_row(file_hash[:8] + "...", "\n".join(str(f) for f in files))
+        for file_hash, files in duplicates.items():
+            table.add_row(file_hash[:8] + "...", "\n".join(str(f) for f in files))
 
-    console.print(table)
+        console.print(table)
 
+    report = None
     if delete:
-        handle_duplicates(duplicates, delete=True)
+        report = handle_duplicates(duplicates, delete=True, quiet=quiet, verify=verify)
     elif move_to:
-        handle_duplicates(duplicates, move_to=move_to)
-    elif not (delete or move_to):  # Interactive mode if no flags were provided
+        report = handle_duplicates(
+            duplicates, move_to=move_to, quiet=quiet, verify=verify
+        )
+    elif link:
+        report = handle_duplicates(duplicates, link=link, quiet=quiet, verify=verify)
+    else:  # Interactive mode if no flags were provided
         if Confirm.ask("\nDelete all but the first of each duplicate?", default=False):
-            handle_duplicates(duplicates, delete=True)
+            report = handle_duplicates(
+                duplicates, delete=True, quiet=quiet, verify=verify
+            )
         elif Confirm.ask("Move duplicates to a different directory?", default=False):
             move_to_dir = click.prompt("Enter destination directory")
-            handle_duplicates(duplicates, move_to=move_to_dir)
+            report = handle_duplicates(
+                duplicates, move_to=move_to_dir, quiet=quiet, verify=verify
+            )
+    if quiet and report is not None:
+        for action in report.errors:
+            console.print(f"[yellow]Error handling {action.path}: {action.error}")
@@ -0,0 +1,41 @@
+"""Default settings and accepted choices shared by the library and the CLI.
+
+This module imports nothing, so the CLI can build its options from these
+values without loading the modules that use them. Those modules re-export
+the names they use, e.g. ``OrganiserPro.dedupe.DEFAULT_HEAD_SIZE``.
+"""
+
+# Bytes read per call when hashing whole files
+DEFAULT_BLOCK_SIZE = 65536
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+# How whole files are read when hashing; see dedupe.get_file_hash()
+IO_STRATEGIES = ("read", "readinto", "mmap")
+DEFAULT_IO_STRATEGY = "read"
+
+# Default number of bytes sampled from the start and end of each candidate
+DEFAULT_HEAD_SIZE = 4096
+DEFAULT_TAIL_SIZE = 4096
+
+# How find_duplicates runs hashing when workers > 1
+EXECUTORS = ("thread", "process")
+DEFAULT_EXECUTOR = "thread"
+
+# Scan records kept in memory in low-memory mode before spilling to disk
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# How handle_duplicates can replace a duplicate with the kept file; see
+# dedupe.link_duplicate()
+LINK_MODES = ("hard", "reflink")
+
+# Hash cache entries not used for this many days are evicted by prune()
+DEFAULT_MAX_AGE_DAYS = 90.0
+# Least recently used hash cache entries beyond this count are evicted
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# Event sources accepted by watcher.open_event_source()
+WATCH_BACKENDS = ("auto", "inotify", "watchdog", "poll")
+# Seconds without new arrivals before a watcher processes a batch
+DEFAULT_DEBOUNCE = 0.5
+# Seconds between directory listings for the polling source
+DEFAULT_POLL_INTERVAL = 1.0
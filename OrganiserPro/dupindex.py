@@ -0,0 +1,713 @@
+"""Persistent index of file digests for finding duplicates across directories.
+
+Each indexed file is stored with its size, its head/tail sample digest and
+its full digest. Updating a directory only rehashes files whose stat data
+changed, and looking up another directory only reads the files whose size,
+then sample, matches something already indexed.
+"""
+
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from . import instrument
+from .console import lazy_console
+from .dedupe import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_HASH_ALGORITHM,
+    DEFAULT_HEAD_SIZE,
+    DEFAULT_TAIL_SIZE,
+    DedupeStats,
+    _ordered_map,
+    _sample_length,
+    _warn_unreadable,
+    format_bytes,
+    get_file_hash,
+    get_sample_hash,
+    new_hasher,
+)
+from .progress import ProgressReporter
+from .walker import ErrorHandler, FileEntry, walk_by_directory
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from rich.console import Console
+
+console = lazy_console()
+
+# Bumped whenever the table layout changes; older indexes must be rebuilt
+SCHEMA_VERSION = 1
+
+# Changed files hashed (and committed) per batch when updating
+UPDATE_BATCH_FILES = 256
+# Most values bound to one "IN (...)" query
+_MAX_PARAMS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    sample TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (directory, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_sample ON files (size, sample);
+CREATE INDEX IF NOT EXISTS files_digest ON files (size, digest);
+"""
+
+# (size, mtime_ns, device, inode) - a file counts as unchanged while it matches
+_StatKey = Tuple[int, int, int, int]
+
+
+def default_index_path() -> Path:
+    """Return the index location under the XDG data directory.
+
+    Returns:
+        Path: ``$XDG_DATA_HOME/organiserpro/index.sqlite3``, falling back to
+              ``~/.local/share`` when XDG_DATA_HOME is not set
+    """
+    base = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    return Path(base) / "organiserpro" / "index.sqlite3"
+
+
+def _stat_key(entry: FileEntry) -> _StatKey:
+    return (entry.size, entry.mtime_ns, entry.device, entry.inode)
+
+
+def _subtree_range(root: str) -> Tuple[str, str]:
+    """Return bounds such that lower <= directory < upper for directories below root."""
+    prefix = root.rstrip(os.sep)
+    return prefix + os.sep, prefix + chr(ord(os.sep) + 1)
+
+
+@dataclass
+class IndexStats:
+    """What DuplicateIndex.update() did."""
+
+    files_scanned: int = 0
+    files_unchanged: int = 0
+    files_hashed: int = 0
+    files_removed: int = 0
+    bytes_hashed: int = 0
+    # (path, message) for every file or directory that couldn't be read
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class DuplicateIndex:
+    """SQLite database of file sizes and digests across many directories.
+
+    The hash algorithm and sample sizes are fixed when the index is created,
+    since digests made with different settings can't be compared. Rows are
+    keyed by directory and name, with secondary indexes on (size, sample)
+    and (size, digest) for lookups.
+
+    Like HashCache, the index is not thread-safe: use it from the thread
+    that opened it. Files are still hashed concurrently with ``workers``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        algorithm: Optional[str] = None,
+        head_size: Optional[int] = None,
+        tail_size: Optional[int] = None,
+        create: bool = True,
+    ) -> None:
+        """Open (creating if allowed) the index database.
+
+        Args:
+            path: Location of the index (defaults to default_index_path())
+            algorithm: Hash algorithm for a new index; must match an
+                       existing one if given
+            head_size: Bytes sampled from the start of each file, as above
+            tail_size: Bytes sampled from the end of each file, as above
+            create: If False, a missing index is an error
+
+        Raises:
+            FileNotFoundError: If the index doesn't exist and create is False
+            ValueError: If the index has an unknown layout, was built with
+                        different settings, or the algorithm is unknown
+        """
+        self.path = Path(path).expanduser() if path else default_index_path()
+        if not self.path.exists():
+            if not create:
+                raise FileNotFoundError(
+                    f"No index at {self.path} "
+                    "(create one with 'organiserpro index build')"
+                )
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0:
+                self._conn.executescript(_SCHEMA)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            elif version != SCHEMA_VERSION:
+                raise ValueError(
+                    f"{self.path} has index format {version}, expected "
+                    f"{SCHEMA_VERSION}; rebuild it"
+                )
+            self._load_settings(
+                algorithm=algorithm, head_size=head_size, tail_size=tail_size
+            )
+        except Exception:
+            self._conn.close()
+            raise
+
+    def _load_settings(self, **requested: Union[str, int, None]) -> None:
+        defaults: Dict[str, Union[str, int]] = {
+            "algorithm": DEFAULT_HASH_ALGORITHM,
+            "head_size": DEFAULT_HEAD_SIZE,
+            "tail_size": DEFAULT_TAIL_SIZE,
+        }
+        if requested.get("algorithm") is not None:
+            new_hasher(str(requested["algorithm"]))  # Fail before storing it
+        stored = dict(self._conn.execute("SELECT name, value FROM settings"))
+        for name, default in defaults.items():
+            value = requested.get(name)
+            if name not in stored:
+                stored[name] = str(default if value is None else value)
+                self._conn.execute(
+                    "INSERT INTO settings (name, value) VALUES (?, ?)",
+                    (name, stored[name]),
+                )
+            elif value is not None and str(value) != stored[name]:
+                raise ValueError(
+                    f"{self.path} was built with {name} {stored[name]}, not {value}"
+                )
+        self._conn.commit()
+        self.algorithm = stored["algorithm"]
+        self.head_size = int(stored["head_size"])
+        self.tail_size = int(stored["tail_size"])
+        new_hasher(self.algorithm)
+
+    def __enter__(self) -> "DuplicateIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0])
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self._conn.commit()
+        self._conn.close()
+
+    def roots(self) -> List[str]:
+        """Return the directories that have been indexed, in sorted order."""
+        rows = self._conn.execute("SELECT path FROM roots ORDER BY path")
+        return [str(path) for (path,) in rows]
+
+    def forget(self, directory: Union[str, Path]) -> int:
+        """Remove a directory and everything below it from the index.
+
+        Returns:
+            int: Number of files removed
+        """
+        root = os.path.abspath(directory)
+        lower, upper = _subtree_range(root)
+        removed = self._conn.execute(
+            "DELETE FROM files WHERE directory = ? "
+            "OR (directory >= ? AND directory < ?)",
+            (root, lower, upper),
+        ).rowcount
+        self._conn.execute(
+            "DELETE FROM roots WHERE path = ? OR (path >= ? AND path < ?)",
+            (root, lower, upper),
+        )
+        self._conn.commit()
+        return int(removed)
+
+    def build(
+        self,
+        directory: Union[str, Path],
+        workers: int = 1,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        quiet: bool = False,
+    ) -> IndexStats:
+        """Index a directory from scratch, discarding what was stored for it.
+
+        Takes the same arguments as update().
+        """
+        self.forget(directory)
+        return self.update(
+            directory, workers=workers, block_size=block_size, quiet=quiet
+        )
+
+    def update(
+        self,
+        directory: Union[str, Path],
+        workers: int = 1,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        quiet: bool = False,
+    ) -> IndexStats:
+        """Bring the index up to date with a directory and its subdirectories.
+
+        Files whose size, mtime, device and inode match their row are kept
+        without being read. New and changed files are hashed, and rows for
+        files that are gone are removed.
+
+        Args:
+            directory: Directory to index
+            workers: Number of threads used to hash files
+            block_size: Bytes read per call when hashing whole files
+            quiet: If True, print nothing; errors are only recorded in the
+                   returned stats
+
+        Returns:
+            IndexStats: Files kept, hashed and removed, and any errors
+        """
+        stats = IndexStats()
+        started = time.perf_counter()
+        root = os.path.abspath(directory)
+
+        def record_error(path: str, error: OSError) -> None:
+            stats.errors.append((path, str(error)))
+            if not quiet:
+                _warn_unreadable(path, error)
+
+        if not os.path.isdir(root):
+            stats.errors.append((root, "not a valid directory"))
+            if not quiet:
+                console.print(f"[red]Error: {root} is not a valid directory")
+            return stats
+
+        digest = partial(
+            _digest_entry,
+            head_size=self.head_size,
+            tail_size=self.tail_size,
+            algorithm=self.algorithm,
+            block_size=block_size,
+            on_error=record_error,
+        )
+        executor = _make_executor(workers)
+        window = max(1, workers) * 16
+        seen_dirs: Set[str] = set()
+        pending: List[FileEntry] = []
+        try:
+            with ProgressReporter(console, enabled=not quiet) as progress:
+                progress.start("Indexing files...")
+                with instrument.phase("index") as index_phase:
+                    for current, files in walk_by_directory(
+                        root, recursive=True, on_error=record_error
+                    ):
+                        seen_dirs.add(current)
+                        stats.files_scanned += len(files)
+                        known = self._known_files(current)
+                        for entry in files:
+                            if known.pop(entry.name, None) == _stat_key(entry):
+                                stats.files_unchanged += 1
+                                progress.advance()
+                            else:
+                                pending.append(entry)
+                        if known:
+                            stats.files_removed += self._remove(current, known)
+                        if len(pending) >= UPDATE_BATCH_FILES:
+                            self._store(
+                                pending, stats, digest, executor, window, progress
+                            )
+                            pending = []
+                    if pending:
+                        self._store(pending, stats, digest, executor, window, progress)
+                    stats.files_removed += self._remove_directories(root, seen_dirs)
+                    index_phase.files = stats.files_hashed
+                    index_phase.bytes = stats.bytes_hashed
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO roots (path, updated) VALUES (?, ?)",
+            (root, time.time()),
+        )
+        self._conn.commit()
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _known_files(self, directory: str) -> Dict[str, _StatKey]:
+        rows = self._conn.execute(
+            "SELECT name, size, mtime_ns, device, inode FROM files "
+            "WHERE directory = ?",
+            (directory,),
+        )
+        return {
+            name: (size, mtime_ns, dev, ino) for name, size, mtime_ns, dev, ino in rows
+        }
+
+    def _remove(self, directory: str, names: Iterable[str]) -> int:
+        cursor = self._conn.executemany(
+            "DELETE FROM files WHERE directory = ? AND name = ?",
+            [(directory, name) for name in names],
+        )
+        return int(cursor.rowcount)
+
+    def _remove_directories(self, root: str, keep: Set[str]) -> int:
+        """Remove rows for directories below root that no longer exist."""
+        lower, upper = _subtree_range(root)
+        stale = [
+            directory
+            for (directory,) in self._conn.execute(
+                "SELECT DISTINCT directory FROM files WHERE directory = ? "
+                "OR (directory >= ? AND directory < ?)",
+                (root, lower, upper),
+            ).fetchall()
+            if directory not in keep
+        ]
+        removed = 0
+        for directory in stale:
+            removed += self._conn.execute(
+                "DELETE FROM files WHERE directory = ?", (directory,)
+            ).rowcount
+        return removed
+
+    def _store(
+        self,
+        entries: List[FileEntry],
+        stats: IndexStats,
+        digest: Callable[[FileEntry], Tuple[str, str]],
+        executor: Optional["Executor"],
+        window: int,
+        progress: ProgressReporter,
+    ) -> None:
+        """Hash new or changed files and write their rows."""
+        rows = []
+        unreadable = []
+        for entry, (sample, full) in zip(
+            entries, _ordered_map(digest, entries, executor, window)
+        ):
+            progress.advance(1, entry.size)
+            directory = os.path.dirname(entry.path)
+            if not (sample and full):
+                # Don't keep a row describing an older version of the file
+                unreadable.append((directory, entry.name))
+                continue
+            stats.files_hashed += 1
+            stats.bytes_hashed += entry.size
+            rows.append(
+                (directory, entry.name, *_stat_key(entry), sample, full),
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files "
+            "(directory, name, size, mtime_ns, device, inode, sample, digest) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._conn.executemany(
+            "DELETE FROM files WHERE directory = ? AND name = ?", unreadable
+        )
+        self._conn.commit()
+
+    def _indexed_sizes(self, sizes: Set[int]) -> Set[int]:
+        """Return the sizes, out of the given ones, that some indexed file has."""
+        found: Set[int] = set()
+        values = list(sizes)
+        for start in range(0, len(values), _MAX_PARAMS):
+            chunk = values[start : start + _MAX_PARAMS]
+            rows = self._conn.execute(
+                "SELECT DISTINCT size FROM files "
+                f"WHERE size IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update(size for (size,) in rows)
+        return found
+
+    def _has_sample(self, size: int, sample: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM files WHERE size = ? AND sample = ? LIMIT 1",
+            (size, sample),
+        ).fetchone()
+        return row is not None
+
+    def _stored_digest(self, entry: FileEntry) -> Optional[str]:
+        """Return a file's full digest if it is indexed and unchanged."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, device, inode, digest FROM files "
+            "WHERE directory = ? AND name = ?",
+            (os.path.dirname(entry.path), entry.name),
+        ).fetchone()
+        if row is None or tuple(row[:4]) != _stat_key(entry):
+            return None
+        return str(row[4])
+
+    def _matches(self, size: int, digest: str) -> List[Tuple[str, _StatKey]]:
+        rows = self._conn.execute(
+            "SELECT directory, name, size, mtime_ns, device, inode FROM files "
+            "WHERE size = ? AND digest = ? ORDER BY directory, name",
+            (size, digest),
+        )
+        return [
+            (os.path.join(directory, name), (size, mtime_ns, dev, ino))
+            for directory, name, size, mtime_ns, dev, ino in rows
+        ]
+
+    def find_duplicates(
+        self,
+        directory: Union[str, Path],
+        recursive: bool = False,
+        stats: Optional[DedupeStats] = None,
+        workers: int = 1,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        quiet: bool = False,
+    ) -> Dict[str, List[Path]]:
+        """Find files in a directory that duplicate anything in the index.
+
+        The directory is only scanned: files whose size isn't in the index
+        are never opened, files that are already indexed and unchanged reuse
+        their stored digests, and the rest are sampled and then hashed in
+        full only while the index still has a match. Indexed matches are
+        checked with stat and skipped if they changed or disappeared since
+        they were indexed.
+
+        Args:
+            directory: Directory to look for duplicates in
+            recursive: If True, search subdirectories too
+            stats: If provided, filled in with per-stage file and byte counts
+            workers: Number of threads used to hash files
+            block_size: Bytes read per call when hashing whole files
+            quiet: If True, print nothing; unreadable files are only recorded
+                   in ``stats.errors``
+
+        Returns:
+            Dict mapping digests to duplicate paths, like
+            dedupe.find_duplicates. Indexed copies outside the scanned files
+            come first, so they are the ones handle_duplicates() keeps.
+        """
+        if stats is None:
+            stats = DedupeStats()
+        stats.algorithm = self.algorithm
+        started = time.perf_counter()
+        root = os.path.abspath(directory)
+
+        def record_error(path: str, error: OSError) -> None:
+            stats.errors.append((path, str(error)))
+            if not quiet:
+                _warn_unreadable(path, error)
+
+        if not os.path.isdir(root):
+            stats.errors.append((root, "not a valid directory"))
+            if not quiet:
+                console.print(f"[red]Error: {root} is not a valid directory")
+            return {}
+
+        candidates: List[FileEntry] = []
+        digests: List[Tuple[FileEntry, str]] = []
+        executor = _make_executor(workers)
+        window = max(1, workers) * 16
+        try:
+            with ProgressReporter(console, enabled=not quiet) as progress:
+                with instrument.phase("scan") as scan_phase:
+                    progress.start("Scanning files...")
+                    for _, files in walk_by_directory(
+                        root, recursive=recursive, on_error=record_error
+                    ):
+                        progress.advance(len(files))
+                        stats.files_scanned += len(files)
+                        sizes = self._indexed_sizes({entry.size for entry in files})
+                        for entry in files:
+                            stats.bytes_scanned += entry.size
+                            if entry.size in sizes:
+                                candidates.append(entry)
+                            else:
+                                stats.bytes_skipped_by_size += entry.size
+                    scan_phase.files = stats.files_scanned
+                stats.size_candidates = len(candidates)
+
+                progress.start("Looking up files in the index...", len(candidates))
+                unknown = []
+                for entry in candidates:
+                    stored = self._stored_digest(entry)
+                    if stored is None:
+                        unknown.append(entry)
+                    else:
+                        digests.append((entry, stored))
+                instrument.count("index_hits", len(digests))
+                progress.advance(len(digests))
+
+                # Files no bigger than the sample would be read whole to
+                # sample them, so they go straight to the full hash
+                sampled_size = self.head_size + self.tail_size
+                to_sample = [entry for entry in unknown if entry.size > sampled_size]
+                with instrument.phase("sample") as sample_phase:
+                    sample = partial(
+                        _sample_file,
+                        head_size=self.head_size,
+                        tail_size=self.tail_size,
+                        algorithm=self.algorithm,
+                        on_error=record_error,
+                    )
+                    ruled_out: Set[str] = set()
+                    for entry, sample_hash in zip(
+                        to_sample, _ordered_map(sample, to_sample, executor, window)
+                    ):
+                        sample_length = _sample_length(
+                            entry.size, self.head_size, self.tail_size
+                        )
+                        stats.bytes_sampled += sample_length
+                        sample_phase.files += 1
+                        sample_phase.bytes += sample_length
+                        if not (
+                            sample_hash and self._has_sample(entry.size, sample_hash)
+                        ):
+                            ruled_out.add(entry.path)
+                            stats.bytes_skipped_by_sample += entry.size - sample_length
+                            progress.advance()
+                to_hash = [entry for entry in unknown if entry.path not in ruled_out]
+                stats.sample_candidates = len(digests) + len(to_hash)
+
+                with instrument.phase("hash") as hash_phase:
+                    full_hash = partial(
+                        _hash_file,
+                        block_size=block_size,
+                        algorithm=self.algorithm,
+                        on_error=record_error,
+                    )
+                    for entry, file_hash in zip(
+                        to_hash, _ordered_map(full_hash, to_hash, executor, window)
+                    ):
+                        stats.bytes_hashed += entry.size
+                        hash_phase.files += 1
+                        hash_phase.bytes += entry.size
+                        progress.advance(1, entry.size)
+                        if file_hash:
+                            digests.append((entry, file_hash))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        duplicates = self._group(digests)
+        stats.seconds = time.perf_counter() - started
+        return duplicates
+
+    def _group(self, digests: List[Tuple[FileEntry, str]]) -> Dict[str, List[Path]]:
+        """Group scanned files with the indexed files that share their digest."""
+        scanned: Dict[str, List[FileEntry]] = defaultdict(list)
+        sizes: Dict[str, int] = {}
+        for entry, digest in digests:
+            scanned[digest].append(entry)
+            sizes[digest] = entry.size
+        scanned_paths = {entry.path for entry, _ in digests}
+
+        duplicates: Dict[str, List[Path]] = {}
+        for digest, entries in scanned.items():
+            # Hard links to a scanned file aren't copies of it
+            inodes = {(entry.device, entry.inode) for entry in entries}
+            kept = [
+                Path(path)
+                for path, key in self._matches(sizes[digest], digest)
+                if path not in scanned_paths
+                and key[2:] not in inodes
+                and _unchanged(path, key)
+            ]
+            group = kept + [entry.as_path() for entry in entries]
+            if len(group) > 1:
+                duplicates[digest] = group
+        return duplicates
+
+
+def _unchanged(path: str, key: _StatKey) -> bool:
+    """Return True if an indexed file still exists as it was indexed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino) == key
+
+
+def _make_executor(workers: int) -> Optional["Executor"]:
+    if workers <= 1:
+        return None
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _sample_file(
+    entry: FileEntry,
+    head_size: int,
+    tail_size: int,
+    algorithm: str,
+    on_error: ErrorHandler,
+) -> str:
+    return get_sample_hash(
+        entry.as_path(),
+        entry.size,
+        head_size=head_size,
+        tail_size=tail_size,
+        algorithm=algorithm,
+        on_error=on_error,
+    )
+
+
+def _hash_file(
+    entry: FileEntry, block_size: int, algorithm: str, on_error: ErrorHandler
+) -> str:
+    return get_file_hash(
+        entry.as_path(), block_size=block_size, algorithm=algorithm, on_error=on_error
+    )
+
+
+def _digest_entry(
+    entry: FileEntry,
+    head_size: int,
+    tail_size: int,
+    algorithm: str,
+    block_size: int,
+    on_error: ErrorHandler,
+) -> Tuple[str, str]:
+    """Return the (sample, full) digests of a file, or "" for either on error."""
+    sample = _sample_file(entry, head_size, tail_size, algorithm, on_error)
+    if not sample:
+        return "", ""
+    return sample, _hash_file(entry, block_size, algorithm, on_error)
+
+
+def print_index_stats(
+    stats: IndexStats, directory: str, out: Optional["Console"] = None
+) -> None:
+    """Print what an index build or update did.
+
+    Args:
+        stats: Stats returned by DuplicateIndex.update
+        directory: Directory that was indexed
+        out: Console to print to (defaults to the module console)
+    """
+    out = out or console
+    out.print(
+        f"[green]Indexed {directory}:[/] {stats.files_scanned} files, "
+        f"{stats.files_hashed} hashed ({format_bytes(stats.bytes_hashed)}), "
+        f"{stats.files_unchanged} unchanged, {stats.files_removed} removed "
+        f"in {stats.seconds:.1f}s"
+    )
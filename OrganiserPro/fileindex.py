@@ -0,0 +1,112 @@
+"""Compact column-oriented index of scanned files."""
+
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .walker import FileEntry
+
+
+class FileIndex:
+    """Table of scanned files stored as parallel columns.
+
+    Each file is a row number. Sizes, modification times, devices and inodes
+    live in ``array`` columns, names in a list, and each file's directory is
+    an id into an interned directory table, so a row costs roughly the size
+    of its name plus a few dozen bytes instead of a Path object per file.
+    Paths and FileEntry objects are only built on request.
+    """
+
+    def __init__(self) -> None:
+        self.directories: List[str] = []
+        self._directory_ids: Dict[str, int] = {}
+        self.dir_ids = array("I")
+        self.names: List[str] = []
+        self.sizes = array("q")
+        self.mtimes_ns = array("q")
+        self.devices = array("Q")
+        self.inodes = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern_directory(self, directory: str) -> int:
+        """Return the id of a directory, adding it to the table if needed."""
+        dir_id = self._directory_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self.directories)
+            self.directories.append(directory)
+            self._directory_ids[directory] = dir_id
+        return dir_id
+
+    def add(
+        self,
+        dir_id: int,
+        name: str,
+        size: int,
+        mtime_ns: int,
+        device: int,
+        inode: int,
+    ) -> int:
+        """Append a row and return its number."""
+        row = len(self.names)
+        self.dir_ids.append(dir_id)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.mtimes_ns.append(mtime_ns)
+        self.devices.append(device)
+        self.inodes.append(inode)
+        return row
+
+    def add_entry(self, entry: FileEntry) -> int:
+        """Append a walker entry and return its row number."""
+        dir_id = self.intern_directory(os.path.dirname(entry.path))
+        return self.add(
+            dir_id, entry.name, entry.size, entry.mtime_ns, entry.device, entry.inode
+        )
+
+    def extend_directory(self, directory: str, files: Iterable[FileEntry]) -> None:
+        """Append the files of one directory, interning it only once."""
+        dir_id = self.intern_directory(directory)
+        for entry in files:
+            self.add(
+                dir_id,
+                entry.name,
+                entry.size,
+                entry.mtime_ns,
+                entry.device,
+                entry.inode,
+            )
+
+    def directory(self, row: int) -> str:
+        """Return the directory containing a row's file."""
+        return self.directories[self.dir_ids[row]]
+
+    def path(self, row: int) -> str:
+        """Return the full path of a row's file."""
+        return os.path.join(self.directories[self.dir_ids[row]], self.names[row])
+
+    def key(self, row: int) -> Tuple[int, int, int, int]:
+        """Return (device, inode, size, mtime_ns) for a row."""
+        return (
+            self.devices[row],
+            self.inodes[row],
+            self.sizes[row],
+            self.mtimes_ns[row],
+        )
+
+    def entry(self, row: int) -> FileEntry:
+        """Build a FileEntry for a row."""
+        return FileEntry(
+            self.path(row),
+            self.names[row],
+            self.sizes[row],
+            self.mtimes_ns[row],
+            self.devices[row],
+            self.inodes[row],
+        )
+
+    def entries(self) -> Iterator[FileEntry]:
+        """Yield a FileEntry for every row, in order."""
+        for row in range(len(self)):
+            yield self.entry(row)
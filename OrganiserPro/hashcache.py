@@ -0,0 +1,197 @@
+"""Persistent on-disk cache of file digests used by dedupe."""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .defaults import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_ENTRIES
+
+# Algorithm assumed for digests stored without one
+DEFAULT_ALGORITHM = "sha256"
+
+# (device, inode, size, mtime_ns) - identifies one version of one file
+CacheKey = Tuple[int, int, int, int]
+
+# Bumped whenever the table layout changes; older caches are discarded
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (device, inode, kind, algorithm)
+);
+CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used);
+"""
+
+
+def default_cache_path() -> Path:
+    """Return the cache file location under the XDG cache directory.
+
+    Returns:
+        Path: ``$XDG_CACHE_HOME/organiserpro/hashes.sqlite3``, falling back to
+              ``~/.cache`` when XDG_CACHE_HOME is not set
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "organiserpro" / "hashes.sqlite3"
+
+
+def cache_key(st: os.stat_result) -> CacheKey:
+    """Build the cache key for a file from its stat result."""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """SQLite-backed store of file digests.
+
+    Digests are stored per (device, inode, kind, algorithm), where kind
+    distinguishes a full-file hash from a head/tail sample hash, so digests
+    made with different hash algorithms are never mixed up. An entry is only
+    returned if the file's size and mtime_ns still match; otherwise all of the
+    file's entries are treated as stale and dropped.
+
+    The cache is not thread-safe: look up and store digests from the thread
+    that created it.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Open (creating if needed) the cache database.
+
+        Args:
+            path: Location of the cache file (defaults to default_cache_path())
+        """
+        self.path = Path(path).expanduser() if path else default_cache_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._touched: List[Tuple[float, int, int, str, str]] = []
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # It's only a cache, so start over rather than migrate
+            self._conn.execute("DROP TABLE IF EXISTS hashes")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(
+        self, key: CacheKey, kind: str, algorithm: str = DEFAULT_ALGORITHM
+    ) -> Optional[str]:
+        """Look up a digest.
+
+        Args:
+            key: Cache key of the file, as returned by cache_key()
+            kind: Kind of digest, e.g. "full" or "sample:4096:4096"
+            algorithm: Hash algorithm the digest was made with
+
+        Returns:
+            Optional[str]: The cached digest, or None on a miss
+        """
+        device, inode, size, mtime_ns = key
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, digest FROM hashes "
+            "WHERE device = ? AND inode = ? AND kind = ? AND algorithm = ?",
+            (device, inode, kind, algorithm),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if row[0] != size or row[1] != mtime_ns:
+            # The file changed since it was hashed
+            self._conn.execute(
+                "DELETE FROM hashes WHERE device = ? AND inode = ?", (device, inode)
+            )
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append((time.time(), device, inode, kind, algorithm))
+        return str(row[2])
+
+    def put(
+        self,
+        key: CacheKey,
+        kind: str,
+        digest: str,
+        algorithm: str = DEFAULT_ALGORITHM,
+    ) -> None:
+        """Store a digest, replacing any previous entry for the file.
+
+        Args:
+            key: Cache key of the file, as returned by cache_key()
+            kind: Kind of digest, e.g. "full" or "sample:4096:4096"
+            digest: Hex digest to store
+            algorithm: Hash algorithm the digest was made with
+        """
+        device, inode, size, mtime_ns = key
+        self._conn.execute(
+            "INSERT OR REPLACE INTO hashes "
+            "(device, inode, kind, algorithm, size, mtime_ns, digest, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (device, inode, kind, algorithm, size, mtime_ns, digest, time.time()),
+        )
+
+    def prune(
+        self,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    ) -> int:
+        """Evict old and least recently used entries.
+
+        Args:
+            max_entries: Keep at most this many entries (None for no limit)
+            max_age_days: Drop entries unused for this many days (None to keep)
+
+        Returns:
+            int: Number of entries removed
+        """
+        self.flush()
+        removed = 0
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            cursor = self._conn.execute(
+                "DELETE FROM hashes WHERE last_used < ?", (cutoff,)
+            )
+            removed += cursor.rowcount
+        if max_entries is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM hashes WHERE rowid IN ("
+                "SELECT rowid FROM hashes ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            )
+            removed += cursor.rowcount
+        self._conn.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0])
+
+    def flush(self) -> None:
+        """Record last-used times of cache hits and commit pending writes."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE hashes SET last_used = ? "
+                "WHERE device = ? AND inode = ? AND kind = ? AND algorithm = ?",
+                self._touched,
+            )
+            self._touched = []
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Flush pending writes and close the database."""
+        self.flush()
+        self._conn.close()
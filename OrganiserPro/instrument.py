@@ -0,0 +1,172 @@
+"""Per-run timing and I/O counters for the sort and dedupe commands.
+
+Library code reports what it does through phase() and count(). Nothing is
+recorded unless a collector is active, so the calls are cheap no-ops for
+library users; the CLI activates one with collect() when --stats,
+--stats-json or --profile is given.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Union
+
+from .console import lazy_console
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+console = lazy_console()
+
+
+@dataclass
+class PhaseStats:
+    """Wall time and work done in one phase of a run.
+
+    A phase may be entered several times (e.g. once per batch); its numbers
+    accumulate.
+    """
+
+    seconds: float = 0.0
+    files: int = 0
+    bytes: int = 0
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Bytes per second, or None if no bytes were processed."""
+        if not self.bytes or self.seconds <= 0:
+            return None
+        return self.bytes / self.seconds
+
+
+@dataclass
+class RunStats:
+    """Everything recorded while a collector was active."""
+
+    command: str = ""
+    wall_seconds: float = 0.0
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to a counter; safe to call from worker threads."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return the stats as JSON-serialisable data."""
+        return {
+            "command": self.command,
+            "wall_seconds": self.wall_seconds,
+            "phases": {
+                name: {
+                    "seconds": phase.seconds,
+                    "files": phase.files,
+                    "bytes": phase.bytes,
+                    "bytes_per_second": phase.throughput,
+                }
+                for name, phase in self.phases.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+# The collector of the run in progress, if any
+_active: Optional[RunStats] = None
+
+
+@contextmanager
+def collect(command: str = "") -> Iterator[RunStats]:
+    """Record phases and counters for the duration of the block.
+
+    Args:
+        command: Name of the command being run, stored in the stats
+
+    Yields:
+        RunStats: The collector, complete once the block exits
+    """
+    global _active
+    previous = _active
+    run = _active = RunStats(command=command)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.wall_seconds = time.perf_counter() - start
+        _active = previous
+
+
+@contextmanager
+def phase(name: str) -> Iterator[PhaseStats]:
+    """Time a block as part of a named phase.
+
+    Yields:
+        PhaseStats: The phase's stats, for the block to add files and bytes
+            to (a throwaway object when no collector is active)
+    """
+    run = _active
+    if run is None:
+        yield PhaseStats()
+        return
+    stats = run.phases.setdefault(name, PhaseStats())
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.seconds += time.perf_counter() - start
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a counter of the active collector, if there is one."""
+    run = _active
+    if run is not None:
+        run.count(name, n)
+
+
+def write_json(run: RunStats, path: Union[str, Path]) -> None:
+    """Write run stats to a JSON file."""
+    Path(path).write_text(json.dumps(run.as_dict(), indent=2) + "\n")
+
+
+def print_run_stats(run: RunStats, out: Optional["Console"] = None) -> None:
+    """Print run stats as a table of phases followed by the counters.
+
+    Args:
+        run: Stats to print
+        out: Console to print to (defaults to the module console)
+    """
+    from rich.table import Table
+
+    # Imported here to avoid a circular import with dedupe
+    from .dedupe import format_bytes
+
+    out = out or console
+    table = Table(title=f"Run Stats ({run.command})" if run.command else "Run Stats")
+    table.add_column("Phase")
+    table.add_column("Time", justify="right")
+    table.add_column("Files", justify="right")
+    table.add_column("Bytes", justify="right")
+    table.add_column("Throughput", justify="right")
+    for name, stats in run.phases.items():
+        throughput = stats.throughput
+        table.add_row(
+            name,
+            f"{stats.seconds:.3f}s",
+            str(stats.files),
+            format_bytes(stats.bytes),
+            f"{format_bytes(throughput)}/s" if throughput is not None else "-",
+        )
+    table.add_row("total", f"{run.wall_seconds:.3f}s", "", "", "")
+    out.print(table)
+    if run.counters:
+        out.print(
+            ", ".join(
+                f"{name}: {value}" for name, value in sorted(run.counters.items())
+            )
+        )
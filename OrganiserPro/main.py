@@ -1,12 +1,18 @@
+"""The ``organiserpro`` command group, also available as ``OrganiserPro.cli``.
+
+The module isn't named ``cli`` so that importing it never rebinds the
+package's ``cli`` attribute, which stays the group itself.
+"""
+
 from typing import Optional
 
 import click
-from rich.console import Console
 
-from .commands import sort_by_type, sort_by_date, dedupe
+from .commands import sort_by_type, sort_by_date, sort_by_size, dedupe, watch, index
+from .console import lazy_console
 
 # Initialize console for rich output
-console = Console()
+console = lazy_console()
 VERSION = "0.1.0"
 
 
@@ -25,7 +31,12 @@ def cli(ctx: click.Context) -> None:
         click.echo("\nCommands:")
         click.echo("  sort-by-type    Sort files in DIRECTORY by file type")
         click.echo("  sort-by-date    Sort files in DIRECTORY by date")
+        click.echo("  sort-by-size    Sort files in DIRECTORY by size")
         click.echo("  dedupe          Find and handle duplicate files in DIRECTORY")
+        click.echo("  watch           Sort (and dedupe) files as they arrive")
+        click.echo(
+            "  index           Index file digests to find duplicates across directories"
+        )
         click.echo(
             "\nUse 'organiserpro COMMAND --help' for more information about a command."
         )
@@ -35,13 +46,16 @@ def cli(ctx: click.Context) -> None:
 # Register all commands with the main CLI
 cli.add_command(sort_by_type)
 cli.add_command(sort_by_date)
+cli.add_command(sort_by_size)
 cli.add_command(dedupe)
+cli.add_command(watch)
+cli.add_command(index)
 
 
 # Keep these functions for backward compatibility with tests
 def sort_by_type_cmd(directory: str, dry_run: bool = False) -> int:
     """Legacy function for sort by type functionality."""
-    from .commands import sort_by_type_impl
+    from .sorter import sort_by_type as sort_by_type_impl
 
     # Call the implementation directly
     sort_by_type_impl(directory=directory, dry_run=dry_run)
@@ -59,14 +73,10 @@ def sort_by_date_cmd(directory: str, date_format: str, dry_run: bool = False) ->
 
 def sort_by_size_cmd(directory: str, dry_run: bool = False) -> int:
     """Legacy function for sort by size functionality."""
-    console.print(f"[bold]Sorting files in:[/] {directory}")
-    console.print("[bold]Sort by:[/] size")
-
-    if dry_run:
-        console.print("[yellow]Dry run: No changes will be made")
-        console.print("Would sort files by size")
-    else:
-        console.print("Sorting by size is not yet implemented", style="yellow")
+    from .sorter import sort_by_size as sort_by_size_impl
+
+    # Call the implementation directly
+    sort_by_size_impl(directory=directory, dry_run=dry_run)
     return 0
 
 
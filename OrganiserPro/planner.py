@@ -0,0 +1,251 @@
+"""Move planning for the sorters: resolve every destination before moving.
+
+Each target directory is listed once and the names in it are kept in a set,
+so picking a free name for a file is an in-memory lookup instead of a stat
+call per candidate name. The finished plan can be inspected (for dry runs)
+or carried out with execute_plan().
+"""
+
+import errno
+import os
+import shutil
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from . import instrument
+
+# Called with the move and error for files that couldn't be moved
+MoveErrorHandler = Callable[["Move", OSError], None]
+
+# Most moves handed to one worker at a time by execute_plan()
+MOVE_BATCH_SIZE = 256
+
+
+class Move:
+    """A single planned rename of ``source`` to ``destination``."""
+
+    __slots__ = ("source", "destination")
+
+    def __init__(self, source: str, destination: str) -> None:
+        self.source = source
+        self.destination = destination
+
+    def __repr__(self) -> str:
+        return f"Move({self.source!r}, {self.destination!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Move):
+            return NotImplemented
+        return (self.source, self.destination) == (other.source, other.destination)
+
+
+class MovePlan:
+    """Moves to carry out, in the order files were added, plus what to skip.
+
+    Attributes:
+        moves: Planned moves
+        directories: Target directories that don't exist yet, in the order
+                     they were first needed
+        unchanged: Number of files that are already where they belong
+        errors: (source, message) for files that can't be moved
+    """
+
+    def __init__(self) -> None:
+        self.moves: List[Move] = []
+        self.directories: List[str] = []
+        self.unchanged = 0
+        self.errors: List[Tuple[str, str]] = []
+        # Names present in (or planned for) each usable target directory
+        self._taken: Dict[str, Set[str]] = {}
+        # Why each unusable target directory can't be used
+        self._unusable: Dict[str, str] = {}
+        # Next suffix to try for each (directory, name) that has collided
+        self._next_suffix: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __iter__(self) -> Iterator[Move]:
+        return iter(self.moves)
+
+    def add(self, source: str, target_dir: str) -> Optional[Move]:
+        """Plan moving a file into a directory under a free name.
+
+        If the name is taken in ``target_dir`` (by an existing entry or an
+        earlier planned move), ``_1``, ``_2``, ... is appended to the stem.
+
+        Args:
+            source: Path of the file to move
+            target_dir: Directory to move it into
+
+        Returns:
+            Optional[Move]: The planned move, or None if the file is already
+                in target_dir or target_dir can't be used
+        """
+        if os.path.dirname(source) == target_dir:
+            self.unchanged += 1
+            return None
+        taken = self._taken_names(target_dir)
+        if taken is None:
+            self.errors.append((source, self._unusable[target_dir]))
+            return None
+
+        name = os.path.basename(source)
+        if name in taken:
+            stem, ext = os.path.splitext(name)
+            counter = self._next_suffix.get((target_dir, name), 1)
+            candidate = f"{stem}_{counter}{ext}"
+            while candidate in taken:
+                counter += 1
+                candidate = f"{stem}_{counter}{ext}"
+            self._next_suffix[(target_dir, name)] = counter + 1
+            instrument.count("name_conflicts")
+            name = candidate
+        taken.add(name)
+
+        move = Move(source, os.path.join(target_dir, name))
+        self.moves.append(move)
+        return move
+
+    def by_directory(self) -> Dict[str, List[Move]]:
+        """Group the planned moves by destination directory."""
+        groups: Dict[str, List[Move]] = {}
+        for move in self.moves:
+            groups.setdefault(os.path.dirname(move.destination), []).append(move)
+        return groups
+
+    def chunks(self, size: int) -> Iterator["MovePlan"]:
+        """Split the plan into plans of at most ``size`` moves.
+
+        Each chunk creates the missing directories its own moves need, so
+        chunks can be executed one at a time; the first also carries the
+        plan's errors and unchanged count.
+        """
+        missing = set(self.directories)
+        for start in range(0, max(len(self.moves), 1), size):
+            chunk = MovePlan()
+            chunk.moves = self.moves[start : start + size]
+            for move in chunk.moves:
+                directory = os.path.dirname(move.destination)
+                if directory in missing and directory not in chunk.directories:
+                    chunk.directories.append(directory)
+            if start == 0:
+                chunk.unchanged = self.unchanged
+                chunk.errors = list(self.errors)
+            yield chunk
+
+    def _taken_names(self, directory: str) -> Optional[Set[str]]:
+        """Return the names in a target directory, listing it the first time.
+
+        Returns None if the directory exists but can't be used.
+        """
+        taken = self._taken.get(directory)
+        if taken is not None or directory in self._unusable:
+            return taken
+        try:
+            with os.scandir(directory) as entries:
+                taken = {entry.name for entry in entries}
+            instrument.count("directories_listed")
+        except FileNotFoundError:
+            taken = set()
+            self.directories.append(directory)
+        except OSError as e:
+            self._unusable[directory] = f"Can't use {directory}: {e}"
+            return None
+        self._taken[directory] = taken
+        return taken
+
+
+def _move_files(
+    moves: Sequence[Move], failed: Dict[str, OSError]
+) -> Tuple[int, List[Tuple[Move, OSError]]]:
+    """Carry out moves in order, collecting errors instead of raising.
+
+    A destination that appeared after planning (or that differs only in
+    case on a case-insensitive filesystem) is an error rather than being
+    overwritten by shutil.move.
+    """
+    moved = 0
+    errors: List[Tuple[Move, OSError]] = []
+    for move in moves:
+        error = failed.get(os.path.dirname(move.destination))
+        if error is None:
+            try:
+                if os.path.lexists(move.destination):
+                    raise FileExistsError(
+                        errno.EEXIST, "Destination already exists", move.destination
+                    )
+                shutil.move(move.source, move.destination)
+            except OSError as e:
+                error = e
+        if error is not None:
+            errors.append((move, error))
+            continue
+        moved += 1
+    return moved, errors
+
+
+def _partition(plan: MovePlan) -> List[List[Move]]:
+    """Split a plan into batches that each go to a single target directory.
+
+    Big directories are split further so one popular bucket doesn't end up
+    on a single worker; destinations are already fixed, so this doesn't
+    affect naming.
+    """
+    batches: List[List[Move]] = []
+    for moves in plan.by_directory().values():
+        for start in range(0, len(moves), MOVE_BATCH_SIZE):
+            batches.append(moves[start : start + MOVE_BATCH_SIZE])
+    return batches
+
+
+def execute_plan(
+    plan: MovePlan,
+    on_error: Optional[MoveErrorHandler] = None,
+    workers: int = 1,
+) -> int:
+    """Create the plan's directories and carry out its moves.
+
+    With more than one worker, moves are run on a thread pool in batches
+    that each target a single directory. That helps most when moves are
+    latency-bound, e.g. on network mounts or when shutil.move has to copy
+    across filesystems.
+
+    Args:
+        plan: Plan to execute
+        on_error: Called with the move and exception for moves that fail,
+                  once all moves are done (grouped by target directory when
+                  workers > 1); errors are ignored if not provided
+        workers: Number of threads used to move files
+
+    Returns:
+        int: Number of files moved
+    """
+    failed: Dict[str, OSError] = {}
+    for directory in plan.directories:
+        try:
+            # Creates parents too, for nested buckets like "2024/05"
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            failed[directory] = e
+            continue
+        instrument.count("directories_created")
+
+    if workers > 1 and len(plan) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(partial(_move_files, failed=failed), _partition(plan))
+            )
+    else:
+        results = [_move_files(plan.moves, failed)]
+
+    moved = 0
+    for batch_moved, errors in results:
+        moved += batch_moved
+        if on_error is not None:
+            for move, error in errors:
+                on_error(move, error)
+    instrument.count("files_moved", moved)
+    return moved
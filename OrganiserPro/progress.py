@@ -0,0 +1,165 @@
+"""Low-overhead progress display for long runs.
+
+Hot loops report work through ProgressReporter.advance(), which only adds to
+a few counters. The clock is consulted once every ``check_every`` files and
+the display is redrawn at most ``refresh_per_second`` times a second, so the
+cost per file stays constant however many files there are. When disabled
+(quiet mode, or output that isn't a terminal) nothing is drawn at all, and
+rich's progress module isn't even imported.
+"""
+
+import sys
+import time
+from datetime import timedelta
+from types import TracebackType
+from typing import TYPE_CHECKING, Callable, Optional, Type
+
+from .console import lazy_console
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.progress import Progress, TaskID
+
+# Redraws per second at most
+DEFAULT_REFRESH_PER_SECOND = 4.0
+# Files advanced between looks at the clock
+DEFAULT_CHECK_EVERY = 64
+
+
+class ProgressReporter:
+    """A single progress line per phase of a run, redrawn at a fixed rate.
+
+    Use as a context manager around the whole run and call start() at the
+    beginning of each phase::
+
+        with ProgressReporter(console) as progress:
+            progress.start("Scanning files...")
+            ...
+            progress.start("Checking for duplicates...", total=n)
+            for entry in candidates:
+                ...
+                progress.advance(nbytes=entry.size)
+    """
+
+    def __init__(
+        self,
+        console: Optional["Console"] = None,
+        enabled: bool = True,
+        refresh_per_second: float = DEFAULT_REFRESH_PER_SECOND,
+        check_every: int = DEFAULT_CHECK_EVERY,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Set up the reporter; nothing is drawn until it is entered.
+
+        Args:
+            console: Console to draw on (a new one by default)
+            enabled: If False, only count; also off if the console isn't a
+                     terminal
+            refresh_per_second: Maximum number of redraws per second
+            check_every: Number of files advanced between clock checks
+            clock: Monotonic clock, replaceable in tests
+        """
+        self.console = console or lazy_console()
+        self.enabled = enabled and bool(self.console.is_terminal)
+        self.description = ""
+        self.total: Optional[int] = None
+        self.completed = 0
+        self.bytes = 0
+        self._interval = 1.0 / refresh_per_second
+        self._check_every = check_every if self.enabled else sys.maxsize
+        self._unchecked = 0
+        self._clock = clock
+        self._started = clock()
+        self._next_refresh = 0.0
+        self._progress: Optional["Progress"] = None
+        self._task: Optional["TaskID"] = None
+
+    def __enter__(self) -> "ProgressReporter":
+        if self.enabled:
+            from rich.progress import (
+                BarColumn,
+                MofNCompleteColumn,
+                Progress,
+                TextColumn,
+            )
+
+            self._progress = Progress(
+                TextColumn("{task.description}"),
+                BarColumn(),
+                MofNCompleteColumn(),
+                TextColumn("{task.fields[rate]}"),
+                TextColumn("{task.fields[eta]}"),
+                console=self.console,
+                auto_refresh=False,
+            )
+            self._progress.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if self._progress is not None:
+            if exc_type is None:
+                self._refresh(self._clock())
+            self._progress.stop()
+            self._progress = None
+
+    def start(self, description: str, total: Optional[int] = None) -> None:
+        """Begin a new phase on a new line, leaving the previous one drawn.
+
+        Args:
+            description: What the phase is doing
+            total: Number of files the phase will go through, if known
+        """
+        now = self._clock()
+        if self._task is not None:
+            self._refresh(now)
+        self.description = description
+        self.total = total
+        self.completed = 0
+        self.bytes = 0
+        self._unchecked = 0
+        self._started = now
+        if self._progress is not None:
+            self._task = self._progress.add_task(
+                description, total=total, rate="", eta=""
+            )
+            self._refresh(now)
+
+    def advance(self, files: int = 1, nbytes: int = 0) -> None:
+        """Count work done in the current phase.
+
+        Args:
+            files: Number of files finished
+            nbytes: Number of bytes read for them (shown as throughput)
+        """
+        self.completed += files
+        self.bytes += nbytes
+        self._unchecked += files
+        if self._unchecked >= self._check_every:
+            self._unchecked = 0
+            now = self._clock()
+            if now >= self._next_refresh:
+                self._refresh(now)
+
+    def _refresh(self, now: float) -> None:
+        """Redraw the current phase's line with its rate and ETA."""
+        if self._progress is None or self._task is None:
+            return
+        from .dedupe import format_bytes
+
+        elapsed = max(now - self._started, 1e-9)
+        if self.bytes:
+            rate = f"{format_bytes(self.bytes / elapsed)}/s"
+        else:
+            rate = f"{self.completed / elapsed:.0f} files/s"
+        eta = ""
+        if self.total and 0 < self.completed < self.total:
+            remaining = (self.total - self.completed) * elapsed / self.completed
+            eta = f"ETA {timedelta(seconds=round(remaining))}"
+        self._progress.update(self._task, completed=self.completed, rate=rate, eta=eta)
+        self._progress.refresh()
+        self._next_refresh = now + self._interval
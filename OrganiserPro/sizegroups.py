@@ -0,0 +1,226 @@
+"""Grouping of scanned files by size with an optional on-disk spill store."""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .fileindex import FileIndex
+from .walker import FileEntry
+
+# Rough per-record cost of an in-memory row and its (device, inode) key, not
+# counting its file name
+_RECORD_OVERHEAD = 250
+# Number of records buffered before they're written to the spill store
+_SPILL_BATCH = 10_000
+
+
+class SizeGroups:
+    """Collects scanned files and yields the groups of files sharing a size.
+
+    Records are kept as rows of a FileIndex until their estimated footprint
+    exceeds ``memory_budget``; from then on everything is kept in a
+    temporary SQLite file. Groups are yielded in the order their size was
+    first seen, and files within a group in the order they were added, so
+    results don't depend on whether the store spilled.
+
+    Hard links to one file are collapsed to the first name added: an entry
+    whose (device, inode) was already seen is only counted in
+    ``hard_links``, since it can't hold different contents.
+    """
+
+    def __init__(
+        self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None
+    ) -> None:
+        """Create an empty collection.
+
+        Args:
+            memory_budget: Estimated bytes of records to hold in memory before
+                           spilling to disk (None to never spill)
+            spill_dir: Directory for the spill file (defaults to the system
+                       temporary directory)
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.spill_path: Optional[str] = None
+        # Entries skipped for sharing (device, inode) with one already added
+        self.hard_links = 0
+        self._estimated_bytes = 0
+        self._index = FileIndex()
+        # A single row while a size is unique, a list of rows once it has collided
+        self._by_size: Dict[int, Union[int, List[int]]] = {}
+        self._inodes: Set[Tuple[int, int]] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[int, str, int, int, int]] = []
+
+    @property
+    def spilled(self) -> bool:
+        """Whether records have been moved to the on-disk store."""
+        return self._conn is not None
+
+    def __enter__(self) -> "SizeGroups":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def add(self, entry: FileEntry) -> None:
+        """Record a scanned file."""
+        self.add_directory(os.path.dirname(entry.path), [entry])
+
+    def add_directory(self, directory: str, files: Iterable[FileEntry]) -> None:
+        """Record the scanned files of one directory."""
+        if self._conn is not None:
+            self._pending.extend(_to_row(entry) for entry in files)
+            if len(self._pending) >= _SPILL_BATCH:
+                self._flush()
+            return
+
+        index = self._index
+        inodes = self._inodes
+        dir_id = index.intern_directory(directory)
+        for entry in files:
+            inode = (entry.device, entry.inode)
+            if inode in inodes:
+                self.hard_links += 1
+                continue
+            inodes.add(inode)
+            row = index.add(
+                dir_id,
+                entry.name,
+                entry.size,
+                entry.mtime_ns,
+                entry.device,
+                entry.inode,
+            )
+            existing = self._by_size.get(entry.size)
+            if existing is None:
+                self._by_size[entry.size] = row
+            elif isinstance(existing, list):
+                existing.append(row)
+            else:
+                self._by_size[entry.size] = [existing, row]
+            self._estimated_bytes += _RECORD_OVERHEAD + len(entry.name)
+
+        if (
+            self.memory_budget is not None
+            and self._estimated_bytes > self.memory_budget
+        ):
+            self._spill()
+
+    def unique_bytes(self) -> int:
+        """Return the total size of files whose size no other file shares."""
+        if self._conn is None:
+            return sum(
+                size
+                for size, group in self._by_size.items()
+                if not isinstance(group, list)
+            )
+        self._flush()
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM ("
+            "SELECT size FROM records GROUP BY size HAVING COUNT(*) = 1)"
+        ).fetchone()
+        return int(row[0])
+
+    def candidate_count(self) -> int:
+        """Return how many files share their size with at least one other."""
+        if self._conn is None:
+            return sum(
+                len(group)
+                for group in self._by_size.values()
+                if isinstance(group, list)
+            )
+        self._flush()
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(n), 0) FROM ("
+            "SELECT COUNT(*) AS n FROM records GROUP BY size HAVING n > 1)"
+        ).fetchone()
+        return int(row[0])
+
+    def groups(self) -> Iterator[Tuple[int, List[FileEntry]]]:
+        """Yield (size, entries) for every size shared by two or more files."""
+        if self._conn is None:
+            for size, group in self._by_size.items():
+                if isinstance(group, list):
+                    yield size, [self._index.entry(row) for row in group]
+            return
+
+        self._flush()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS records_size ON records (size, seq)"
+        )
+        sizes = self._conn.execute(
+            "SELECT size FROM records GROUP BY size HAVING COUNT(*) > 1 "
+            "ORDER BY MIN(seq)"
+        )
+        for (size,) in sizes:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, device, inode FROM records "
+                "WHERE size = ? ORDER BY seq",
+                (size,),
+            )
+            yield size, [
+                FileEntry(path, os.path.basename(path), size, mtime_ns, device, inode)
+                for path, mtime_ns, device, inode in rows
+            ]
+
+    def close(self) -> None:
+        """Release memory and remove the spill file, if any."""
+        self._index = FileIndex()
+        self._by_size = {}
+        self._inodes = set()
+        self._pending = []
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.spill_path is not None:
+            try:
+                os.unlink(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def _spill(self) -> None:
+        """Move all in-memory records to a temporary SQLite file."""
+        import tempfile
+
+        fd, self.spill_path = tempfile.mkstemp(
+            prefix="organiserpro-", suffix=".sqlite3", dir=self.spill_dir
+        )
+        os.close(fd)
+        self._conn = sqlite3.connect(self.spill_path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE records (seq INTEGER PRIMARY KEY, size INTEGER NOT NULL, "
+            "path TEXT NOT NULL, mtime_ns INTEGER NOT NULL, device INTEGER NOT NULL, "
+            "inode INTEGER NOT NULL, UNIQUE (device, inode))"
+        )
+        for group in self._by_size.values():
+            for row in group if isinstance(group, list) else [group]:
+                self._pending.append(_to_row(self._index.entry(row)))
+                if len(self._pending) >= _SPILL_BATCH:
+                    self._flush()
+        self._flush()
+        self._index = FileIndex()
+        self._by_size = {}
+        self._inodes = set()
+        self._estimated_bytes = 0
+
+    def _flush(self) -> None:
+        """Write buffered records to the spill store."""
+        if self._conn is not None and self._pending:
+            # Hard links to a file already stored are ignored by the UNIQUE key
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO records (size, path, mtime_ns, device, inode) "
+                "VALUES (?, ?, ?, ?, ?)",
+                self._pending,
+            ).rowcount
+            self.hard_links += len(self._pending) - inserted
+            self._conn.commit()
+            self._pending = []
+
+
+def _to_row(entry: FileEntry) -> Tuple[int, str, int, int, int]:
+    """Convert an entry to a spill store row."""
+    return (entry.size, entry.path, entry.mtime_ns, entry.device, entry.inode)
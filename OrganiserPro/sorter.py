@@ -1,10 +1,83 @@
-import shutil
+import os
+import time
+from bisect import bisect_right
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from . import instrument
+from .console import lazy_console
+from .planner import Move, MovePlan, execute_plan
+from .sortstate import SortState
+from .walker import ErrorHandler, FileEntry, walk_by_directory
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+console = lazy_console()
+
+# Returns the bucket (a directory relative to the file's own) to sort a file into
+BucketFunction = Callable[[FileEntry], str]
+
+# Moves planned before they're carried out when sorting a whole tree
+SORT_BATCH_SIZE = 10_000
+
+# Binary units accepted by parse_size() and used in size bucket names
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+# Upper bounds of the default sort-by-size buckets: 1 MB, 100 MB and 1 GB
+DEFAULT_SIZE_THRESHOLDS = (1024**2, 100 * 1024**2, 1024**3)
+# Range covered by logarithmic size buckets
+LOG_BUCKETS_START = 1024
+LOG_BUCKETS_STOP = 1024**4
+
+
+@dataclass
+class SortResult:
+    """What a sort did (or, in a dry run, would do).
+
+    Attributes:
+        sorted_by: What files were sorted by: "type", "date" or "size"
+        files_scanned: Number of files considered
+        files_moved: Number of files moved into buckets (0 in a dry run)
+        files_unchanged: Number of files already in their bucket
+        directories: Number of bucket directories files were sorted into
+        moves: Moves carried out, or planned in a dry run
+        errors: (path, message) for files and directories that couldn't be
+                read or moved
+        dry_run: Whether this was a dry run
+        incremental: Whether unchanged directories were skipped
+        seconds: Wall time the sort took
+    """
+
+    sorted_by: str = ""
+    files_scanned: int = 0
+    files_moved: int = 0
+    files_unchanged: int = 0
+    directories: int = 0
+    moves: List[Move] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    dry_run: bool = False
+    incremental: bool = False
+    seconds: float = 0.0
 
-from rich.console import Console
 
-console = Console()
+# How print_sort_result() refers to the buckets of each kind of sort
+_BUCKET_LABELS = {
+    "type": "directories",
+    "date": "date-based directories",
+    "size": "size-based directories",
+}
 
 
 def get_file_extension(file_path: Path) -> str:
@@ -24,139 +97,418 @@ def get_file_extension(file_path: Path) -> str:
     return file_path.suffix[1:].lower()
 
 
-def sort_by_type(directory: str, dry_run: bool = False) -> None:
+def print_sort_result(
+    result: SortResult, root: Path, out: Optional["Console"] = None
+) -> None:
+    """Print the moves of a dry run, any errors, and a one-line summary.
+
+    Args:
+        result: What the sort did
+        root: Directory the paths are shown relative to
+        out: Console to print to (defaults to the module console)
+    """
+    out = out or console
+    if result.dry_run:
+        for move in result.moves:
+            source = os.path.relpath(move.source, root)
+            destination = os.path.relpath(move.destination, root)
+            out.print(f"  {source} -> {destination}")
+    for path, message in result.errors:
+        name = os.path.relpath(path, root) if path != str(root) else path
+        if result.dry_run:
+            out.print(f"  [yellow]Would skip {name}: {message}")
+        else:
+            out.print(f"[red]Error processing {name}: {message}")
+
+    label = _BUCKET_LABELS.get(result.sorted_by, "directories")
+    if not result.files_scanned:
+        if result.incremental:
+            out.print("[green]No new files to sort[/]")
+        else:
+            out.print("[yellow]No files found to sort![/]")
+    elif result.dry_run:
+        out.print(
+            f"Dry run: would move {len(result.moves)} files "
+            f"into {result.directories} {label}"
+        )
+    else:
+        out.print(
+            f"✅ Sorted {result.files_moved} files into {result.directories} {label}"
+        )
+
+
+def _in_bucket(directory: str, bucket: str) -> bool:
+    """Return True if directory already is (ends with) the given bucket."""
+    parts = bucket.split(os.sep)
+    return directory.split(os.sep)[-len(parts) :] == parts
+
+
+def type_bucket(entry: FileEntry) -> str:
+    """Bucket a file by its extension, e.g. "jpg"."""
+    return get_file_extension(Path(entry.name))
+
+
+def date_bucket(date_format: str) -> BucketFunction:
+    """Return a bucket function naming buckets after the modification date.
+
+    Args:
+        date_format: strftime format; "YYYY", "MM" and "DD" are also accepted
+    """
+    strftime_format = (
+        date_format.replace("YYYY", "%Y").replace("MM", "%m").replace("DD", "%d")
+    )
+
+    def bucket_of(entry: FileEntry) -> str:
+        # The walker already has the modification time, no stat needed
+        return datetime.fromtimestamp(entry.mtime).strftime(strftime_format)
+
+    return bucket_of
+
+
+def size_bucket(thresholds: Sequence[int]) -> BucketFunction:
+    """Return a bucket function placing files between size thresholds.
+
+    See size_bucket_names() for the names of the buckets.
+    """
+    bounds = sorted(set(thresholds))
+    names = size_bucket_names(bounds)
+
+    def bucket_of(entry: FileEntry) -> str:
+        return names[bisect_right(bounds, entry.size)]
+
+    return bucket_of
+
+
+def plan_batches(
+    source_dir: Path,
+    bucket_of: BucketFunction,
+    recursive: bool,
+    state: Optional[SortState] = None,
+    batch_size: Optional[int] = None,
+    on_error: Optional[ErrorHandler] = None,
+) -> Iterator[Tuple[MovePlan, List[Tuple[str, Set[str]]]]]:
+    """Walk a directory once and yield plans sorting its files into buckets.
+
+    The planning half of the sort functions, shared with OrganiserPro.aio;
+    carry each plan out with planner.execute_plan().
+    Each directory's files are sorted into buckets inside that directory.
+    Plans are yielded once they hold batch_size moves (and at the end),
+    always between directories, so a tree of any size is sorted with bounded
+    memory. Buckets only ever hold files from their parent directory, so a
+    batch can be executed before the walk goes on; buckets created that way
+    aren't walked, and existing buckets are recognised and left alone.
+
+    Args:
+        source_dir: Directory to sort
+        bucket_of: Returns the bucket (a relative directory) for a file
+        recursive: If True, also sort every subdirectory
+        state: If provided, directories unchanged since the last run are
+               skipped without being listed
+        batch_size: Moves planned before a plan is yielded (defaults to
+                    SORT_BATCH_SIZE)
+        on_error: Called with the path and exception for directories that
+                  can't be read
+
+    Yields:
+        Tuple[MovePlan, List[Tuple[str, Set[str]]]]: A plan, and when state
+            is given, each directory it covers with the file names listed
+    """
+    root = str(source_dir)
+    batch_size = batch_size or SORT_BATCH_SIZE
+    plan = MovePlan()
+    listed: List[Tuple[str, Set[str]]] = []
+    walker = walk_by_directory(
+        root,
+        recursive=recursive,
+        on_error=on_error,
+        cached_listing=state.unchanged_subdirectories if state else None,
+    )
+    while True:
+        with instrument.phase("scan") as scan_phase:
+            listing = next(walker, None)
+        if listing is None:
+            break
+        current, files = listing
+        scan_phase.files += len(files)
+        if state is not None:
+            listed.append((current, {entry.name for entry in files}))
+
+        with instrument.phase("plan") as plan_phase:
+            for entry in files:
+                bucket = os.path.normpath(bucket_of(entry))
+                if current != root and _in_bucket(current, bucket):
+                    # Sorted by an earlier run
+                    plan.unchanged += 1
+                    continue
+                plan.add(entry.path, os.path.join(current, bucket))
+            plan_phase.files += len(files)
+
+        if len(plan) >= batch_size:
+            yield plan, listed
+            plan = MovePlan()
+            listed = []
+    yield plan, listed
+
+
+def _sort(
+    source_dir: Path,
+    bucket_of: BucketFunction,
+    sorted_by: str,
+    dry_run: bool,
+    workers: int,
+    recursive: bool,
+    state: Optional[SortState] = None,
+    quiet: bool = False,
+) -> SortResult:
+    """Sort the files of a directory (or tree) into buckets.
+
+    Args:
+        source_dir: Directory being sorted
+        bucket_of: Returns the bucket (a relative directory) for a file
+        sorted_by: What files are sorted by, for the result
+        dry_run: If True, plan the moves without carrying them out
+        workers: Number of threads used to move files
+        recursive: If True, sort each subdirectory in place as well
+        state: If provided, skip directories unchanged since the last run and
+               record the ones sorted now (not in dry runs)
+        quiet: If True, print nothing
+
+    Returns:
+        SortResult: What the sort did
+    """
+    start = time.perf_counter()
+    result = SortResult(
+        sorted_by=sorted_by, dry_run=dry_run, incremental=state is not None
+    )
+
+    def on_unreadable(path: str, error: OSError) -> None:
+        result.errors.append((path, f"Could not access: {error}"))
+
+    if not source_dir.is_dir():
+        on_unreadable(str(source_dir), NotADirectoryError("not a valid directory"))
+    else:
+        status = nullcontext() if quiet else console.status("Sorting files...")
+        with status:
+            batches = plan_batches(
+                source_dir, bucket_of, recursive, state, on_error=on_unreadable
+            )
+            for plan, listed in batches:
+                result.files_scanned += len(plan) + plan.unchanged + len(plan.errors)
+                result.files_unchanged += plan.unchanged
+                result.directories += len(plan.by_directory())
+                result.errors.extend(plan.errors)
+                if dry_run:
+                    result.moves.extend(plan)
+                    continue
+
+                # Directories with files left behind aren't recorded as sorted
+                failed = {os.path.dirname(source) for source, _ in plan.errors}
+                failed_moves: Set[str] = set()
+
+                def on_error(move: Move, error: OSError) -> None:
+                    failed.add(os.path.dirname(move.source))
+                    failed_moves.add(move.source)
+                    result.errors.append((move.source, str(error)))
+
+                with instrument.phase("move") as move_phase:
+                    moved = execute_plan(plan, on_error=on_error, workers=workers)
+                    move_phase.files += moved
+                result.files_moved += moved
+                result.moves.extend(
+                    move for move in plan if move.source not in failed_moves
+                )
+
+                if state is not None:
+                    for directory, names in listed:
+                        if directory not in failed:
+                            state.record(directory, names)
+
+        if state is not None and not dry_run:
+            state.save()
+
+    result.seconds = time.perf_counter() - start
+    if not quiet:
+        print_sort_result(result, source_dir)
+    return result
+
+
+def sort_by_type(
+    directory: str,
+    dry_run: bool = False,
+    workers: int = 1,
+    recursive: bool = False,
+    state_file: Optional[str] = None,
+    quiet: bool = False,
+) -> SortResult:
     """Sort files in the given directory into subdirectories by file type.
 
     Args:
         directory: Path to the directory containing files to sort
         dry_run: If True, only show what would be done without making changes
+        workers: Number of threads used to move files
+        recursive: If True, also sort the files of every subdirectory into
+                   buckets inside that subdirectory, in a single walk
+        state_file: If provided, sort incrementally: directories unchanged
+                    since the last run with this state file are skipped
+        quiet: If True, print nothing; the result describes what was done
+
+    Returns:
+        SortResult: What the sort did
     """
     source_dir = Path(directory).expanduser().resolve()
-
-    # Get all files (excluding hidden files)
-    all_files = []
-    for file_path in source_dir.glob("*"):  # Only process top-level files
-        if file_path.is_file() and not file_path.name.startswith("."):
-            all_files.append(file_path)
-
-    if not all_files:
-        console.print("[yellow]No files found to sort![/]")
-        return
-
-    # Create a progress bar
-    with console.status("Sorting files..."):
-        files_processed = 0
-        extensions_created = set()
-
-        for file_path in all_files:
-            try:
-                # Get file extension and create target directory
-                ext = get_file_extension(file_path)
-                ext_dir = source_dir / ext
-
-                if ext not in extensions_created:
-                    ext_dir.mkdir(exist_ok=True)
-                    extensions_created.add(ext)
-
-                # Create the target path
-                target_path = ext_dir / file_path.name
-
-                # Handle duplicate filenames by appending a counter
-                counter = 1
-                original_target = target_path
-                while target_path.exists():
-                    # If file is the same (same inode), skip it
-                    if target_path.samefile(file_path):
-                        break
-                    # Otherwise, append a counter to make the filename unique
-                    new_name = (
-                        f"{original_target.stem}_{counter}{original_target.suffix}"
-                    )
-                    target_path = original_target.with_name(new_name)
-                    counter += 1
-
-                # Move the file if it's not already in the right place
-                if not target_path.exists() or not target_path.samefile(file_path):
-                    shutil.move(str(file_path), str(target_path))
-                    files_processed += 1
-
-            except Exception as e:
-                console.print(f"[red]Error processing {file_path.name}: {e}")
-
-    console.print(
-        f"✅ Sorted {files_processed} files into {len(extensions_created)} directories"
+    state = SortState(state_file, "type") if state_file else None
+    return _sort(
+        source_dir, type_bucket, "type", dry_run, workers, recursive, state, quiet
     )
 
 
 def sort_by_date(
-    directory: str, date_format: str = "%Y-%m", dry_run: bool = False
-) -> None:
+    directory: str,
+    date_format: str = "%Y-%m",
+    dry_run: bool = False,
+    workers: int = 1,
+    recursive: bool = False,
+    state_file: Optional[str] = None,
+    quiet: bool = False,
+) -> SortResult:
     """
-    Sort files into subdirectories based on file type, size, or date.
+    Sort files into subdirectories based on their modification date.
 
     Args:
         directory: Directory to sort
-        date_format: Format string for date-based sorting
+        date_format: Format string for date-based sorting; may contain "/"
+                     for nested directories (e.g. "%Y/%m")
+        dry_run: If True, only show what would be done without making changes
+        workers: Number of threads used to move files
+        recursive: If True, also sort the files of every subdirectory into
+                   buckets inside that subdirectory, in a single walk
+        state_file: If provided, sort incrementally: directories unchanged
+                    since the last run with this state file are skipped
+        quiet: If True, print nothing; the result describes what was done
+
+    Returns:
+        SortResult: What the sort did
     """
     source_dir = Path(directory).expanduser().resolve()
+    state = SortState(state_file, f"date:{date_format}") if state_file else None
+    return _sort(
+        source_dir,
+        date_bucket(date_format),
+        "date",
+        dry_run,
+        workers,
+        recursive,
+        state,
+        quiet,
+    )
 
-    if not source_dir.exists() or not source_dir.is_dir():
-        console.print(f"[red]Error: {directory} is not a valid directory")
-        return
-
-    # Get all files (only in the top-level directory, not subdirectories)
-    all_files = []
-    for file_path in source_dir.glob("*"):
-        if file_path.is_file() and not file_path.name.startswith("."):
-            all_files.append(file_path)
-
-    if not all_files:
-        console.print("[yellow]No files found to sort![/]")
-        return
-
-    # Track processed files and created directories
-    files_processed = 0
-    date_dirs_created = set()
-
-    # Process files with progress
-    with console.status("Sorting files..."):
-        for file_path in all_files:
-            if file_path.is_file() and not file_path.name.startswith("."):
-                try:
-                    # Get the file's last modified time and format it
-                    mtime = file_path.stat().st_mtime
-                    dt = datetime.fromtimestamp(mtime)
-                    date_str = dt.strftime(
-                        date_format.replace("YYYY", "%Y")
-                        .replace("MM", "%m")
-                        .replace("DD", "%d")
-                    )
-
-                    # Create target directory if it doesn't exist
-                    target_dir = source_dir / date_str
-                    if date_str not in date_dirs_created:
-                        target_dir.mkdir(exist_ok=True)
-                        date_dirs_created.add(date_str)
-
-                    target_path = target_dir / file_path.name
-
-                    # Handle filename conflicts
-                    counter = 1
-                    while target_path.exists():
-                        target_path = target_dir / (
-                            f"{file_path.stem}_{counter}{file_path.suffix}"
-                        )
-                        counter += 1
-
-                    # Move the file
-                    file_path.rename(target_path)
-                    files_processed += 1
-                except (OSError, PermissionError) as e:
-                    msg = f"[yellow]Warning: Could not process {file_path}: {e}"
-                    console.print(msg)
-                    continue
 
-    console.print(
-        f"✅ Sorted {files_processed} files into "
-        f"{len(date_dirs_created)} date-based directories"
+def parse_size(text: str) -> int:
+    """Parse a size such as "512", "100KB" or "1.5GB" into bytes.
+
+    Units are binary (1 KB = 1024 bytes) and case-insensitive.
+
+    Raises:
+        ValueError: If the size can't be parsed or is negative
+    """
+    value = text.strip().upper()
+    unit = "B"
+    for name in sorted(SIZE_UNITS, key=len, reverse=True):
+        if value.endswith(name):
+            unit, value = name, value[: -len(name)].strip()
+            break
+    try:
+        size = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid size {text!r}") from None
+    if size < 0:
+        raise ValueError(f"Invalid size {text!r}")
+    return int(size * SIZE_UNITS[unit])
+
+
+def log_size_thresholds(
+    base: int, start: int = LOG_BUCKETS_START, stop: int = LOG_BUCKETS_STOP
+) -> List[int]:
+    """Return logarithmically spaced thresholds: start, start*base, ... up to stop.
+
+    Raises:
+        ValueError: If base is less than 2
+    """
+    if base < 2:
+        raise ValueError("Logarithmic buckets need a base of at least 2")
+    thresholds = []
+    threshold = start
+    while threshold <= stop:
+        thresholds.append(threshold)
+        threshold *= base
+    return thresholds
+
+
+def _size_label(size: int) -> str:
+    """Name a threshold compactly, e.g. "1MB" or "1.5GB"."""
+    for unit, factor in reversed(SIZE_UNITS.items()):
+        if size >= factor:
+            value = size / factor
+            return f"{value:.0f}{unit}" if value.is_integer() else f"{value:.1f}{unit}"
+    return f"{size}B"
+
+
+def size_bucket_names(thresholds: Sequence[int]) -> List[str]:
+    """Return directory names for the buckets between sorted thresholds.
+
+    There is one more bucket than thresholds, e.g. for 1 MB and 1 GB:
+    "under-1MB", "1MB-1GB" and "1GB-and-over".
+    """
+    labels = [_size_label(threshold) for threshold in thresholds]
+    if not labels:
+        return ["all"]
+    names = [f"under-{labels[0]}"]
+    names.extend(f"{low}-{high}" for low, high in zip(labels, labels[1:]))
+    names.append(f"{labels[-1]}-and-over")
+    return names
+
+
+def sort_by_size(
+    directory: str,
+    thresholds: Sequence[int] = DEFAULT_SIZE_THRESHOLDS,
+    dry_run: bool = False,
+    workers: int = 1,
+    recursive: bool = False,
+    state_file: Optional[str] = None,
+    quiet: bool = False,
+) -> SortResult:
+    """Sort files into subdirectories by size.
+
+    Bucket boundaries are computed once; each file's bucket is found with a
+    binary search on the size from the walk, so files are never stat'ed
+    again. A file exactly at a threshold goes into the bucket above it.
+
+    Args:
+        directory: Directory to sort
+        thresholds: Bucket boundaries in bytes (see log_size_thresholds()
+                    for logarithmic buckets)
+        dry_run: If True, only show what would be done without making changes
+        workers: Number of threads used to move files
+        recursive: If True, also sort the files of every subdirectory into
+                   buckets inside that subdirectory, in a single walk
+        state_file: If provided, sort incrementally: directories unchanged
+                    since the last run with this state file are skipped
+        quiet: If True, print nothing; the result describes what was done
+
+    Returns:
+        SortResult: What the sort did
+    """
+    source_dir = Path(directory).expanduser().resolve()
+    bounds = sorted(set(thresholds))
+    config = "size:" + ",".join(str(bound) for bound in bounds)
+    state = SortState(state_file, config) if state_file else None
+    return _sort(
+        source_dir,
+        size_bucket(bounds),
+        "size",
+        dry_run,
+        workers,
+        recursive,
+        state,
+        quiet,
     )
@@ -0,0 +1,149 @@
+"""State kept between incremental sort runs.
+
+Adding or removing a directory entry updates the directory's mtime, so a
+directory whose mtime hasn't changed since the last run has no new files
+and doesn't need to be listed again. Its subdirectories are remembered too,
+so a recursive sort can still reach them without listing the parent.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, TypedDict, Union
+
+from . import instrument
+from .hashcache import default_cache_path
+from .walker import is_hidden
+
+# Bumped whenever the file layout changes; older state files are ignored
+STATE_VERSION = 1
+
+# Directory mtimes this close to when they were recorded aren't trusted:
+# something may have been added within the same timestamp tick afterwards.
+# Two seconds covers coarse filesystems such as FAT.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class DirectoryRecord(TypedDict):
+    """What is remembered about one sorted directory."""
+
+    mtime_ns: int
+    checked_ns: int
+    subdirs: List[str]
+
+
+def default_state_path(directory: Union[str, Path]) -> Path:
+    """Return the state file location for sorting a directory.
+
+    Returns:
+        Path: A file named after a hash of the directory, next to the hash
+              cache under the XDG cache directory
+    """
+    digest = hashlib.sha256(os.fsencode(os.path.abspath(directory))).hexdigest()
+    return default_cache_path().parent / "sort-state" / f"{digest[:16]}.json"
+
+
+class SortState:
+    """Directory mtimes recorded after the last successful sort.
+
+    ``config`` describes how files were sorted (e.g. "type" or
+    "date:%Y-%m"); state recorded with a different config is discarded, so
+    changing the sort options re-examines everything.
+    """
+
+    def __init__(self, path: Union[str, Path], config: str) -> None:
+        """Load the state file, if there is one.
+
+        Args:
+            path: Location of the state file
+            config: Description of the sort options in use
+        """
+        self.path = Path(path).expanduser()
+        self.config = config
+        self._previous: Dict[str, DirectoryRecord] = {}
+        self._current: Dict[str, DirectoryRecord] = {}
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return  # No usable state: everything is new
+        if data.get("version") == STATE_VERSION and data.get("config") == config:
+            self._previous = data.get("directories", {})
+
+    def unchanged_subdirectories(self, directory: str) -> Optional[List[str]]:
+        """Return a directory's subdirectories if it is unchanged since last run.
+
+        Suitable as the ``cached_listing`` argument of walk_by_directory().
+
+        Returns:
+            Optional[List[str]]: The remembered subdirectories, or None if the
+                directory is new, has changed or must be listed to be sure
+        """
+        record = self._previous.get(directory)
+        if record is None:
+            return None
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None  # Let the walker report it
+        if mtime_ns != record["mtime_ns"]:
+            return None
+        if mtime_ns + RACY_WINDOW_NS >= record["checked_ns"]:
+            return None  # Too close to call; list it again
+        self._current[directory] = record
+        instrument.count("directories_skipped")
+        return list(record["subdirs"])
+
+    def record(self, directory: str, seen: Collection[str]) -> None:
+        """Remember a directory as fully sorted in its current state.
+
+        Call once the directory's files have been moved, so its mtime already
+        reflects the moves. If files arrived after the directory was listed,
+        it isn't recorded, so the next run picks them up.
+
+        Args:
+            directory: Directory that was sorted
+            seen: Names of the files it held when it was listed
+        """
+        checked_ns = time.time_ns()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            subdirs = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if is_hidden(entry.name) or entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name not in seen:
+                        return  # A new arrival; leave it for the next run
+        except OSError:
+            return
+        self._current[directory] = {
+            "mtime_ns": mtime_ns,
+            "checked_ns": checked_ns,
+            "subdirs": subdirs,
+        }
+
+    def save(self) -> None:
+        """Write the directories seen this run, replacing the old state."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": STATE_VERSION,
+            "config": self.config,
+            "directories": self._current,
+        }
+        import tempfile
+
+        # Write to a temporary file first so a crash never leaves half a file
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".sort-state-", suffix=".json", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,680 @@
+"""Watch a directory and sort (and dedupe) files as they arrive.
+
+Arrivals are reported by an event source: inotify on Linux (through ctypes,
+no extra dependency), watchdog where it is installed, or polling as a last
+resort. Bursts of arrivals are debounced into batches, and each batch is
+sorted with a single move plan, so the directory is never rescanned.
+Duplicate checks run against an in-memory index of the files already
+present, built with one walk at startup: files are only hashed once another
+file of the same size arrives.
+"""
+
+import os
+import queue
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from . import instrument
+from .console import lazy_console
+from .dedupe import DEFAULT_BLOCK_SIZE, DEFAULT_HASH_ALGORITHM, get_file_hash
+from .defaults import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, WATCH_BACKENDS
+from .planner import Move, MovePlan, execute_plan
+from .sorter import BucketFunction, date_bucket, type_bucket
+from .walker import FileEntry, is_hidden, walk
+
+try:
+    from watchdog.observers import Observer
+except ImportError:  # Optional; inotify or polling is used instead
+    Observer = None
+
+console = lazy_console()
+
+# Longest an arrival waits while events keep coming
+DEFAULT_MAX_DELAY = 5.0
+# Arrivals processed at once at most
+DEFAULT_MAX_BATCH = 10_000
+# How often an idle watcher checks whether it should stop
+IDLE_TIMEOUT = 1.0
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+# watchdog event types that may mean a file arrived
+_WATCHDOG_EVENTS = ("created", "modified", "moved", "closed")
+# struct inotify_event without the trailing name
+_INOTIFY_EVENT = struct.Struct("iIII")
+# Enough for thousands of events per read
+_INOTIFY_READ_SIZE = 1024 * 1024
+
+
+def _list_files(directory: str) -> List[str]:
+    """Return the paths of the non-hidden files directly in a directory."""
+    with os.scandir(directory) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if not is_hidden(entry.name) and entry.is_file(follow_symlinks=False)
+        ]
+
+
+class InotifySource:
+    """Report files written or moved into a directory, using Linux inotify.
+
+    Files are reported once they are closed after writing or renamed into
+    place, so partially written files aren't picked up. If the kernel's
+    event queue overflows, the directory is listed once to catch up.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Start watching a directory.
+
+        Raises:
+            OSError: If inotify isn't available or the watch can't be added
+        """
+        # ctypes is only needed here; keep it out of the CLI's startup
+        import ctypes
+        import ctypes.util
+
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        wd = libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno), directory)
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+
+    def read(self, timeout: float) -> List[str]:
+        """Wait up to timeout seconds and return the paths of new files."""
+        if not self._poller.poll(timeout * 1000):
+            return []
+        paths: List[str] = []
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._fd, _INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflowed = True
+                elif name and not mask & _IN_ISDIR:
+                    paths.append(os.path.join(self.directory, os.fsdecode(name)))
+        if overflowed:
+            # Events were lost; anything not sorted yet is still in the directory
+            instrument.count("event_overflows")
+            return _list_files(self.directory)
+        return paths
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self._fd)
+
+
+class _WatchdogHandler:
+    """Queue the paths of files created, modified or moved in by watchdog."""
+
+    def __init__(self, directory: str, arrivals: "queue.Queue[str]") -> None:
+        self.directory = directory
+        self.arrivals = arrivals
+
+    def dispatch(self, event: Any) -> None:
+        if event.is_directory or event.event_type not in _WATCHDOG_EVENTS:
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        if os.path.dirname(os.fsdecode(path)) == self.directory:
+            self.arrivals.put(os.fsdecode(path))
+
+
+class WatchdogSource:
+    """Report files arriving in a directory through the watchdog package.
+
+    Used where inotify isn't available. Files are reported when created and
+    again when modified; the watcher's debounce waits for writes to settle.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Start watching a directory.
+
+        Raises:
+            OSError: If watchdog isn't installed
+        """
+        if Observer is None:
+            raise OSError("watchdog is not installed (pip install watchdog)")
+        self.directory = directory
+        self._arrivals: "queue.Queue[str]" = queue.Queue()
+        self._observer = Observer()
+        self._observer.schedule(
+            _WatchdogHandler(directory, self._arrivals), directory, recursive=False
+        )
+        self._observer.start()
+
+    def read(self, timeout: float) -> List[str]:
+        """Wait up to timeout seconds and return the paths of new files."""
+        try:
+            paths = [self._arrivals.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                paths.append(self._arrivals.get_nowait())
+            except queue.Empty:
+                return paths
+
+    def close(self) -> None:
+        """Stop watching."""
+        self._observer.stop()
+        self._observer.join()
+
+
+class PollingSource:
+    """Report files arriving in a directory by listing it periodically.
+
+    A file is reported once its size and mtime are the same in two listings
+    in a row, so files still being written are left alone.
+    """
+
+    def __init__(self, directory: str, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """Take a first listing of a directory.
+
+        Args:
+            directory: Directory to watch
+            interval: Seconds between listings
+        """
+        self.directory = directory
+        self.interval = interval
+        # Size and mtime of each file at the last listing
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        # Version of each file that has been reported
+        self._reported: Dict[str, Tuple[int, int]] = {}
+        self._next_poll = time.monotonic()
+        self._poll()
+        # Files present at startup aren't arrivals
+        self._reported = dict(self._seen)
+
+    def _poll(self) -> List[str]:
+        """List the directory and return the files that have settled."""
+        self._next_poll = time.monotonic() + self.interval
+        current: Dict[str, Tuple[int, int]] = {}
+        settled: List[str] = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if is_hidden(entry.name) or not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                version = (st.st_size, st.st_mtime_ns)
+                current[entry.path] = version
+                if (
+                    self._seen.get(entry.path) == version
+                    and self._reported.get(entry.path) != version
+                ):
+                    settled.append(entry.path)
+                    self._reported[entry.path] = version
+        self._seen = current
+        self._reported = {
+            path: version for path, version in self._reported.items() if path in current
+        }
+        return settled
+
+    def read(self, timeout: float) -> List[str]:
+        """Wait up to timeout seconds and return the paths of new files."""
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        return self._poll()
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+EventSource = Union[InotifySource, WatchdogSource, PollingSource]
+
+
+def open_event_source(
+    directory: str,
+    backend: str = "auto",
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> EventSource:
+    """Open an event source reporting files that arrive in a directory.
+
+    Args:
+        directory: Directory to watch
+        backend: "inotify", "watchdog", "poll", or "auto" for the first of
+                 those that works here
+        poll_interval: Seconds between listings for the polling source
+
+    Returns:
+        EventSource: The opened source; close() it when done
+
+    Raises:
+        ValueError: If the backend is unknown
+        OSError: If the requested backend isn't available
+    """
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(
+            f"Unknown watch backend {backend!r} "
+            f"(available: {', '.join(WATCH_BACKENDS)})"
+        )
+    if backend == "inotify":
+        return InotifySource(directory)
+    if backend == "watchdog":
+        return WatchdogSource(directory)
+    if backend == "auto":
+        if sys.platform.startswith("linux"):
+            try:
+                return InotifySource(directory)
+            except OSError:
+                pass  # E.g. out of inotify watches
+        if Observer is not None:
+            return WatchdogSource(directory)
+    return PollingSource(directory, poll_interval)
+
+
+class ArrivalIndex:
+    """Files known to be present, grouped by size, hashed only when needed.
+
+    A file is hashed the first time another file of the same size is looked
+    up, so most arrivals (those with a size nothing else has) cost nothing.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        self.algorithm = algorithm
+        self.block_size = block_size
+        # Files of each size that haven't been hashed yet
+        self._unhashed: Dict[int, List[str]] = {}
+        # Digest -> path for the hashed files of each size
+        self._hashed: Dict[int, Dict[str, str]] = {}
+        # Size each indexed path was added with, to find it again
+        self._sizes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(paths) for paths in self._unhashed.values()) + sum(
+            len(paths) for paths in self._hashed.values()
+        )
+
+    def _hash(self, path: str) -> str:
+        instrument.count("files_hashed")
+        return get_file_hash(Path(path), self.block_size, self.algorithm)
+
+    def add(self, path: str, size: int, digest: str = "") -> None:
+        """Add a file, with its digest if it is already known."""
+        if digest:
+            if self._hashed.setdefault(size, {}).setdefault(digest, path) != path:
+                return  # Same content as a file already indexed
+        else:
+            self._unhashed.setdefault(size, []).append(path)
+        self._sizes[path] = size
+
+    def move(self, path: str, new_path: str, size: int, digest: str = "") -> None:
+        """Update the location of an indexed file that has been moved."""
+        if self._sizes.pop(path, None) is not None:
+            self._sizes[new_path] = size
+        hashed = self._hashed.get(size, {})
+        if digest and hashed.get(digest) == path:
+            hashed[digest] = new_path
+            return
+        paths = self._unhashed.get(size, [])
+        if path in paths:
+            paths[paths.index(path)] = new_path
+            return
+        # Hashed since it was added, by a later arrival of the same size
+        for other_digest, other_path in hashed.items():
+            if other_path == path:
+                hashed[other_digest] = new_path
+                return
+
+    def discard(self, path: str) -> None:
+        """Forget an indexed file, e.g. because it has been rewritten."""
+        size = self._sizes.pop(path, None)
+        if size is None:
+            return
+        paths = self._unhashed.get(size, [])
+        if path in paths:
+            paths.remove(path)
+            if not paths:
+                del self._unhashed[size]
+        hashed = self._hashed.get(size, {})
+        for digest, other_path in list(hashed.items()):
+            if other_path == path:
+                del hashed[digest]
+        if size in self._hashed and not hashed:
+            del self._hashed[size]
+
+    def find_duplicate(
+        self, path: str, size: int, file_id: Optional[Tuple[int, int]] = None
+    ) -> Tuple[Optional[str], str]:
+        """Look for another indexed file with the same content as a file.
+
+        Whatever was indexed for ``path`` itself is dropped first, since a
+        file that arrives again (rewritten or closed once more) would
+        otherwise match its own stale entry.
+
+        Args:
+            path: The file to look up
+            size: Its size in bytes
+            file_id: Its (device, inode); an indexed hard link to the same
+                     file isn't a duplicate of it
+
+        Returns:
+            Tuple[Optional[str], str]: The indexed duplicate (or None) and the
+                file's digest ("" if it didn't need hashing)
+        """
+        self.discard(path)
+        if size not in self._unhashed and size not in self._hashed:
+            return None, ""
+        digest = self._hash(path)
+        if not digest:
+            return None, ""
+        hashed = self._hashed.setdefault(size, {})
+        for candidate in self._unhashed.pop(size, []):
+            candidate_digest = self._hash(candidate)
+            if (
+                not candidate_digest
+                or hashed.setdefault(candidate_digest, candidate) != candidate
+            ):
+                self._sizes.pop(candidate, None)
+        original = hashed.get(digest)
+        if original is None:
+            return None, digest
+        try:
+            st = os.stat(original)
+        except OSError:
+            # Deleted since it was indexed; the new file takes its place
+            del hashed[digest]
+            self._sizes.pop(original, None)
+            return None, digest
+        if (st.st_dev, st.st_ino) == file_id:
+            return None, digest
+        return original, digest
+
+
+class Watcher:
+    """Sort and dedupe the files arriving in a directory.
+
+    Each file is moved into ``directory/<bucket>`` as determined by
+    ``bucket_of``. With ``dedupe``, an arrival with the same content as a
+    file already in the tree is reported, or moved to ``move_to``, instead
+    of being sorted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        bucket_of: Optional[BucketFunction] = None,
+        dedupe: bool = False,
+        move_to: Optional[str] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        workers: int = 1,
+    ) -> None:
+        """Set up a watcher, indexing the tree's existing files for dedupe.
+
+        Args:
+            directory: Directory to watch
+            bucket_of: Returns the bucket (a relative directory) for a file;
+                       files aren't sorted if not provided
+            dedupe: If True, check arrivals for duplicates
+            move_to: Directory to move duplicate arrivals to; they are only
+                     reported if not provided
+            debounce: Seconds without arrivals before a batch is processed
+            max_delay: Longest an arrival waits while arrivals keep coming
+            max_batch: Process a batch as soon as it holds this many files
+            workers: Number of threads used to move files
+        """
+        self.directory = str(Path(directory).expanduser().resolve())
+        self.bucket_of = bucket_of
+        self.move_to = str(Path(move_to).expanduser().resolve()) if move_to else None
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.workers = workers
+        self.index: Optional[ArrivalIndex] = None
+        if dedupe:
+            self.index = ArrivalIndex()
+            with instrument.phase("index") as index_phase:
+                for entry in walk(self.directory, recursive=True):
+                    self.index.add(entry.path, entry.size)
+                    index_phase.files += 1
+
+    def _entries(self, paths: List[str]) -> List[FileEntry]:
+        """Stat arrivals, dropping those that are gone or aren't regular files."""
+        entries: List[FileEntry] = []
+        for path in paths:
+            name = os.path.basename(path)
+            if is_hidden(name) or os.path.dirname(path) != self.directory:
+                continue
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue  # Moved or deleted again before we got to it
+            if stat.S_ISREG(st.st_mode):
+                entries.append(
+                    FileEntry(
+                        path, name, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino
+                    )
+                )
+        return entries
+
+    def _handle_duplicates(self, duplicates: List[Tuple[FileEntry, str]]) -> None:
+        """Report duplicate arrivals, moving them aside if requested."""
+        if self.move_to is None:
+            for entry, original in duplicates:
+                console.print(f"[yellow]Duplicate:[/] {entry.path} (of {original})")
+            return
+        plan = MovePlan()
+        planned: List[Tuple[Move, str]] = []
+        for entry, original in duplicates:
+            move = plan.add(entry.path, self.move_to)
+            if move is not None:
+                planned.append((move, original))
+        for source, message in plan.errors:
+            console.print(
+                f"[red]Error processing {os.path.basename(source)}: {message}"
+            )
+        failed: Set[str] = set()
+
+        def on_error(move: Move, error: OSError) -> None:
+            failed.add(move.source)
+            self._warn_move_failed(move, error)
+
+        execute_plan(plan, on_error=on_error, workers=self.workers)
+        for move, original in planned:
+            if move.source not in failed:
+                console.print(
+                    f"[yellow]Duplicate:[/] {move.source} (of {original}) "
+                    f"-> {move.destination}"
+                )
+
+    def _warn_move_failed(self, move: Move, error: OSError) -> None:
+        console.print(f"[red]Error moving {os.path.basename(move.source)}: {error}")
+
+    def process(self, paths: List[str]) -> Tuple[int, int]:
+        """Sort and dedupe a batch of arrivals.
+
+        Args:
+            paths: Paths of files that arrived in the directory
+
+        Returns:
+            Tuple[int, int]: Number of files sorted and duplicates found
+        """
+        entries = self._entries(paths)
+        instrument.count("files_arrived", len(entries))
+
+        plan = MovePlan()
+        duplicates: List[Tuple[FileEntry, str]] = []
+        # Entries (and digests) of unique arrivals by path, to index them
+        # where they end up
+        indexed: Dict[str, Tuple[FileEntry, str]] = {}
+        with instrument.phase("plan") as plan_phase:
+            for entry in entries:
+                if self.index is not None:
+                    original, digest = self.index.find_duplicate(
+                        entry.path, entry.size, (entry.device, entry.inode)
+                    )
+                    if original is not None:
+                        duplicates.append((entry, original))
+                        continue
+                    # Later arrivals in this batch are checked against it too
+                    self.index.add(entry.path, entry.size, digest)
+                    indexed[entry.path] = (entry, digest)
+                if self.bucket_of is not None:
+                    bucket = os.path.normpath(self.bucket_of(entry))
+                    plan.add(entry.path, os.path.join(self.directory, bucket))
+            plan_phase.files += len(entries)
+
+        if duplicates:
+            self._handle_duplicates(duplicates)
+        for source, message in plan.errors:
+            console.print(
+                f"[red]Error processing {os.path.basename(source)}: {message}"
+            )
+        failed: Set[str] = set()
+
+        def on_error(move: Move, error: OSError) -> None:
+            failed.add(move.source)
+            self._warn_move_failed(move, error)
+
+        with instrument.phase("move") as move_phase:
+            moved = execute_plan(plan, on_error=on_error, workers=self.workers)
+            move_phase.files += moved
+
+        if self.index is not None:
+            for move in plan:
+                if move.source not in failed:
+                    entry, digest = indexed[move.source]
+                    self.index.move(move.source, move.destination, entry.size, digest)
+        return moved, len(duplicates)
+
+    def run(self, source: EventSource, stop: Optional[threading.Event] = None) -> None:
+        """Process arrivals from an event source until stopped.
+
+        Arrivals are collected until none have come for ``debounce`` seconds,
+        the oldest has waited ``max_delay`` seconds or ``max_batch`` files are
+        pending, then processed as one batch.
+
+        Args:
+            source: Where arrivals are reported
+            stop: Set it to stop watching; runs until interrupted if not given
+        """
+        pending: Dict[str, None] = {}  # Ordered set of paths
+        first_arrival = last_arrival = 0.0
+        try:
+            while stop is None or not stop.is_set():
+                timeout = IDLE_TIMEOUT
+                if pending:
+                    deadline = min(
+                        last_arrival + self.debounce, first_arrival + self.max_delay
+                    )
+                    timeout = max(0.0, deadline - time.monotonic())
+                paths = source.read(timeout)
+                now = time.monotonic()
+                if paths:
+                    if not pending:
+                        first_arrival = now
+                    last_arrival = now
+                    pending.update(dict.fromkeys(paths))
+                if pending and (
+                    len(pending) >= self.max_batch
+                    or now - last_arrival >= self.debounce
+                    or now - first_arrival >= self.max_delay
+                ):
+                    self._process_batch(list(pending))
+                    pending.clear()
+        finally:
+            if pending:
+                self._process_batch(list(pending))
+
+    def _process_batch(self, paths: List[str]) -> None:
+        """Process a batch and print a one-line summary of it."""
+        moved, duplicates = self.process(paths)
+        if moved or duplicates:
+            summary = f"Sorted {moved} files"
+            if self.index is not None:
+                summary += f", {duplicates} duplicates"
+            console.print(f"[{datetime.now():%H:%M:%S}] {summary}")
+
+
+def watch(
+    directory: str,
+    sort_by: Optional[str] = "type",
+    date_format: str = "%Y-%m",
+    dedupe: bool = False,
+    move_to: Optional[str] = None,
+    backend: str = "auto",
+    debounce: float = DEFAULT_DEBOUNCE,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    workers: int = 1,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Sort (and dedupe) files as they arrive in a directory, until stopped.
+
+    Files already in the directory are left where they are; run one of the
+    sort commands first to sort them.
+
+    Args:
+        directory: Directory to watch
+        sort_by: "type" or "date", or None to only dedupe
+        date_format: Date format for sort_by="date" (see sort_by_date())
+        dedupe: If True, check arrivals for duplicates of files in the tree
+        move_to: Directory to move duplicate arrivals to (with dedupe)
+        backend: How arrivals are detected (see open_event_source())
+        debounce: Seconds without arrivals before a batch is processed
+        poll_interval: Seconds between listings for the polling backend
+        workers: Number of threads used to move files
+        stop: Set it to stop watching; runs until interrupted if not given
+
+    Raises:
+        ValueError: If sort_by or backend is unknown
+        OSError: If the requested backend isn't available
+    """
+    buckets = {"type": type_bucket, "date": date_bucket(date_format), None: None}
+    if sort_by not in buckets:
+        raise ValueError(f"Unknown sort order {sort_by!r} (use 'type' or 'date')")
+    watcher = Watcher(
+        directory,
+        bucket_of=buckets[sort_by],
+        dedupe=dedupe,
+        move_to=move_to,
+        debounce=debounce,
+        workers=workers,
+    )
+    source = open_event_source(watcher.directory, backend, poll_interval)
+    console.print(
+        f"Watching {watcher.directory} ({type(source).__name__}), "
+        "press Ctrl+C to stop"
+    )
+    try:
+        watcher.run(source, stop)
+    finally:
+        source.close()
@@ -0,0 +1,108 @@
+"""Compare the thread and process executors of find_duplicates.
+
+Generates a tree of many small files and a tree of a few large ones (see
+synthetic.py), then times find_duplicates on each with ``--workers``
+threads and with as many processes, for every hash algorithm given. The
+trees are hashed once untimed first, so files come from the page cache and
+this measures hashing and scheduling rather than disk speed.
+
+``gil-sum64`` is a checksum computed with builtins that hold the GIL, which
+stands in for pure-Python or non-GIL-releasing hashers: threads can't run
+it in parallel, processes can.
+
+Usage:
+    python benchmarks/bench_executor.py [--workers 4] [--repeat 3]
+        [--hash sha256 gil-sum64] [--small-files 20000] [--large-files 32]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from synthetic import TreeSpec, generate_tree
+
+from OrganiserPro.dedupe import EXECUTORS, find_duplicates, register_hash_algorithm
+
+
+class GilSum64:
+    """Weighted sum of 64-bit words; not a real hash, only for benchmarking."""
+
+    def __init__(self) -> None:
+        self._total = 0
+        self._length = 0
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data).cast("B")
+        whole = len(view) // 8 * 8
+        words = sum(view[:whole].cast("Q"))
+        rest = int.from_bytes(view[whole:], "little")
+        self._total = (self._total * 1_000_003 + words + rest) % 2**64
+        self._length += len(view)
+
+    def hexdigest(self) -> str:
+        return f"{self._total:016x}{self._length:016x}"
+
+
+# Registered at import so worker processes (forked or spawned) have it too
+register_hash_algorithm("gil-sum64", GilSum64)
+
+
+def _time(root: Path, algorithm: str, executor: str, workers: int) -> float:
+    start = time.perf_counter()
+    find_duplicates(
+        str(root),
+        recursive=True,
+        algorithm=algorithm,
+        workers=workers,
+        executor=executor,
+        quiet=True,
+    )
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--hash", nargs="+", default=["sha256", "gil-sum64"])
+    parser.add_argument("--small-files", type=int, default=20000)
+    parser.add_argument("--large-files", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    trees = {
+        # Every file has a duplicate, so all of them reach the full hash
+        "small": TreeSpec(
+            files=args.small_files, duplicate_ratio=0.5, size_distribution="small"
+        ),
+        "large": TreeSpec(
+            files=args.large_files, duplicate_ratio=0.5, size_distribution="large"
+        ),
+    }
+    with tempfile.TemporaryDirectory(prefix="organiserpro-bench-") as tmp:
+        print(
+            f"{'tree':>6} {'hash':>10} {'executor':>9} "
+            f"{'median s':>9} {'vs thread':>10}"
+        )
+        for tree_name, spec in trees.items():
+            root = Path(tmp) / tree_name
+            generate_tree(root, spec)
+            for algorithm in args.hash:
+                _time(root, algorithm, "thread", 1)  # Warm the page cache
+                baseline = None
+                for executor in EXECUTORS:
+                    median = statistics.median(
+                        _time(root, algorithm, executor, args.workers)
+                        for _ in range(args.repeat)
+                    )
+                    baseline = baseline or median
+                    print(
+                        f"{tree_name:>6} {algorithm:>10} {executor:>9} "
+                        f"{median:>9.3f} {baseline / median:>9.2f}x"
+                    )
+
+
+if __name__ == "__main__":
+    main()
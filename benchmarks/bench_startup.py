@@ -0,0 +1,80 @@
+"""Measure how long importing the package and the CLI takes.
+
+Runs ``python -X importtime -c "import MODULE"`` in fresh interpreters and
+reports the cumulative import time of each module, plus the imports that
+cost the most in the last run. Bytecode is compiled by a warm-up run first,
+so this measures loading rather than compiling.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 10] [--top 15] [--max-ms 150]
+
+With ``--max-ms`` the exit status is 1 if the median import time of any
+module exceeds the budget, so it can guard against startup regressions.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+MODULES = ["OrganiserPro", "OrganiserPro.main"]
+
+
+def _import_times(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        List[Tuple[str, int, int]]: (module, self us, cumulative us) for
+            every module imported, in the order -X importtime reports them
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    times = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports shown")
+    parser.add_argument("--max-ms", type=float, help="Fail above this median")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    exceeded = False
+    for module in MODULES:
+        _import_times(module, env)  # Warm-up: write bytecode
+        runs = [_import_times(module, env) for _ in range(args.repeat)]
+        totals_ms = [
+            next(cum for name, _, cum in run if name == module) / 1000 for run in runs
+        ]
+        median = statistics.median(totals_ms)
+        print(f"{module:<20} median {median:8.1f} ms  min {min(totals_ms):8.1f} ms")
+
+        heaviest = sorted(runs[-1], key=lambda item: item[1], reverse=True)
+        for name, self_us, cumulative_us in heaviest[: args.top]:
+            print(f"    {name:<40} self {self_us / 1000:6.1f} ms")
+
+        loaded = {name.split(".")[0] for name, _, _ in runs[-1]}
+        print(f"    rich imported: {'rich' in loaded}, click: {'click' in loaded}")
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"    over budget of {args.max_ms:.1f} ms")
+            exceeded = True
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Benchmark find_duplicates, sort_by_type and sort_by_date on synthetic trees.
+
+Each benchmark gets a freshly generated tree per repetition (generation is
+not timed), since sorting moves the files it is timing. Results are written
+as JSON so runs from different commits can be compared with --compare.
+
+Usage:
+    python benchmarks/run.py [--files 5000] [--repeat 3] [--output out.json]
+    python benchmarks/run.py --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from synthetic import SIZE_DISTRIBUTIONS, TreeSpec, generate_tree
+
+from OrganiserPro import dedupe, sorter
+
+# Benchmark name -> function timed on the root of a generated tree
+BENCHMARKS: Dict[str, Callable[[Path], object]] = {
+    "find_duplicates": lambda root: dedupe.find_duplicates(
+        str(root), recursive=True, quiet=True
+    ),
+    "sort_by_type": lambda root: sorter.sort_by_type(str(root), quiet=True),
+    "sort_by_date": lambda root: sorter.sort_by_date(str(root), quiet=True),
+    "sort_by_type_recursive": lambda root: sorter.sort_by_type(
+        str(root), recursive=True, quiet=True
+    ),
+}
+
+# Non-recursive sorts only look at top-level files, so they get a flat tree
+FLAT_BENCHMARKS = {"sort_by_type", "sort_by_date"}
+
+
+def _git_commit() -> Optional[str]:
+    """Return the current commit hash, if run from a git checkout."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_benchmark(name: str, spec: TreeSpec, repeat: int) -> Dict[str, object]:
+    """Time one benchmark on a fresh tree per repetition."""
+    if name in FLAT_BENCHMARKS:
+        spec = replace(spec, depth=0)
+    seconds: List[float] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="organiserpro-bench-") as tmp:
+            info = generate_tree(Path(tmp), spec)
+            start = time.perf_counter()
+            BENCHMARKS[name](Path(tmp))
+            seconds.append(time.perf_counter() - start)
+    return {
+        "name": name,
+        "spec": spec.as_dict(),
+        "files": info.files,
+        "duplicates": info.duplicates,
+        "bytes": info.total_bytes,
+        "seconds": seconds,
+        "min": min(seconds),
+        "median": statistics.median(seconds),
+    }
+
+
+def compare(results: List[Dict[str, object]], baseline_path: Path) -> None:
+    """Print each result's median relative to a previous run."""
+    baseline = json.loads(baseline_path.read_text())
+    previous = {r["name"]: r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or baseline_path}:")
+    for result in results:
+        old = previous.get(str(result["name"]))
+        if old is None:
+            continue
+        ratio = float(result["median"]) / float(old["median"])  # type: ignore
+        change = "slower" if ratio > 1 else "faster"
+        print(f"  {result['name']:<16} {ratio:6.2f}x  ({change})")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=TreeSpec.files)
+    parser.add_argument(
+        "--duplicate-ratio", type=float, default=TreeSpec.duplicate_ratio
+    )
+    parser.add_argument("--depth", type=int, default=TreeSpec.depth)
+    parser.add_argument("--fanout", type=int, default=TreeSpec.fanout)
+    parser.add_argument(
+        "--sizes",
+        choices=sorted(SIZE_DISTRIBUTIONS),
+        default=TreeSpec.size_distribution,
+    )
+    parser.add_argument("--seed", type=int, default=TreeSpec.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only", choices=sorted(BENCHMARKS), action="append", help="Run only these"
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON here")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare with")
+    args = parser.parse_args(argv)
+
+    spec = TreeSpec(
+        files=args.files,
+        duplicate_ratio=args.duplicate_ratio,
+        depth=args.depth,
+        fanout=args.fanout,
+        size_distribution=args.sizes,
+        seed=args.seed,
+    )
+
+    results = []
+    for name in args.only or list(BENCHMARKS):
+        result = run_benchmark(name, spec, args.repeat)
+        print(
+            f"{name:<16} median {result['median']:8.4f}s  "
+            f"min {result['min']:8.4f}s  ({result['files']} files)"
+        )
+        results.append(result)
+
+    report = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
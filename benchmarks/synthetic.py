@@ -0,0 +1,129 @@
+"""Synthetic directory trees for the benchmarks.
+
+A tree is described by a TreeSpec and generated deterministically from its
+seed, so two runs (or two commits) benchmark exactly the same files.
+"""
+
+import os
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Extensions given to generated files, so sort_by_type has buckets to fill
+EXTENSIONS = ["txt", "jpg", "png", "pdf", "mp3", "csv", "json", "log", "zip", ""]
+
+# Named size distributions: (weight, min_bytes, max_bytes) bands
+SIZE_DISTRIBUTIONS: Dict[str, List[Tuple[float, int, int]]] = {
+    # Mostly small documents with a long tail of larger media
+    "mixed": [
+        (0.70, 0, 16 * 1024),
+        (0.25, 16 * 1024, 1024**2),
+        (0.05, 1024**2, 8 * 1024**2),
+    ],
+    "small": [(1.0, 0, 4096)],
+    "large": [(1.0, 1024**2, 16 * 1024**2)],
+}
+
+
+@dataclass
+class TreeSpec:
+    """Shape of a synthetic tree.
+
+    Attributes:
+        files: Total number of files
+        duplicate_ratio: Fraction of files that are copies of another file
+        depth: Levels of subdirectories below the root (0 for a flat tree)
+        fanout: Subdirectories per directory
+        size_distribution: Key of SIZE_DISTRIBUTIONS
+        mtime_span_days: Modification times are spread over this many days
+        seed: Random seed; the same spec always produces the same tree
+    """
+
+    files: int = 1000
+    duplicate_ratio: float = 0.2
+    depth: int = 2
+    fanout: int = 4
+    size_distribution: str = "mixed"
+    mtime_span_days: int = 365
+    seed: int = 0
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass
+class TreeInfo:
+    """What generate_tree() wrote."""
+
+    files: int = 0
+    duplicates: int = 0
+    directories: int = 0
+    total_bytes: int = 0
+
+
+def _directories(root: Path, depth: int, fanout: int) -> List[Path]:
+    """Return root and every directory of a tree of the given shape."""
+    levels = [[root]]
+    for _ in range(depth):
+        levels.append(
+            [parent / f"d{i}" for parent in levels[-1] for i in range(fanout)]
+        )
+    return [directory for level in levels for directory in level]
+
+
+def _pick_size(rng: random.Random, distribution: str) -> int:
+    """Draw a file size from a named distribution."""
+    bands = SIZE_DISTRIBUTIONS[distribution]
+    weights = [weight for weight, _, _ in bands]
+    _, low, high = rng.choices(bands, weights=weights)[0]
+    return rng.randint(low, high)
+
+
+def _content(rng: random.Random, size: int) -> bytes:
+    """Return size bytes that differ from every other file's content."""
+    # Random head and tail so files of equal size usually differ in the
+    # sampled regions; the cheap filler keeps generation fast
+    edge = min(size, 4096)
+    head = rng.getrandbits(8 * edge).to_bytes(edge, "little") if edge else b""
+    if size <= 2 * edge:
+        return (head + head)[:size]
+    return head + b"\0" * (size - 2 * edge) + head[::-1]
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> TreeInfo:
+    """Create the files described by spec under root.
+
+    Args:
+        root: Directory to fill (created if missing)
+        spec: Shape of the tree
+
+    Returns:
+        TreeInfo: Counts of what was written
+    """
+    rng = random.Random(spec.seed)
+    directories = _directories(root, spec.depth, spec.fanout)
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    info = TreeInfo(directories=len(directories))
+    originals: List[Path] = []
+    now = 1_700_000_000
+    for i in range(spec.files):
+        directory = rng.choice(directories)
+        ext = rng.choice(EXTENSIONS)
+        path = directory / (f"file{i}.{ext}" if ext else f"file{i}")
+
+        if originals and rng.random() < spec.duplicate_ratio:
+            shutil.copyfile(rng.choice(originals), path)
+            info.duplicates += 1
+        else:
+            path.write_bytes(_content(rng, _pick_size(rng, spec.size_distribution)))
+            originals.append(path)
+
+        mtime = now - rng.randint(0, spec.mtime_span_days * 86400)
+        os.utime(path, (mtime, mtime))
+        info.files += 1
+        info.total_bytes += path.stat().st_size
+    return info
@@ -57,6 +57,34 @@ def typecheck(session):
     session.run("mypy", PACKAGE)
 
 
+@nox.session
+def benchmark(session):
+    """Run the benchmarks on synthetic trees and write JSON results.
+
+    Extra arguments are passed to benchmarks/run.py, e.g.
+    ``nox -s benchmark -- --files 20000 --compare baseline.json``.
+    """
+    session.install(".")
+    session.run(
+        "python",
+        "benchmarks/run.py",
+        "--output",
+        "benchmark-results.json",
+        *session.posargs,
+    )
+
+
+@nox.session
+def startup(session):
+    """Measure import time of the package and the CLI.
+
+    Extra arguments are passed to benchmarks/bench_startup.py, e.g.
+    ``nox -s startup -- --max-ms 150`` to fail on a startup regression.
+    """
+    session.install(".")
+    session.run("python", "benchmarks/bench_startup.py", *session.posargs)
+
+
 @nox.session
 def format(session):
     """Format code using Black and isort."""
@@ -14,7 +14,7 @@ setup(
     install_requires=requirements,
     entry_points={
         "console_scripts": [
-            "OrganiserPro=OrganiserPro.cli:main",
+            "OrganiserPro=OrganiserPro.main:cli",
         ],
     },
     # Include package data files specified in MANIFEST.in
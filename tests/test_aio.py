@@ -0,0 +1,124 @@
+"""Tests for the OrganiserPro.aio module."""
+
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from OrganiserPro import aio
+from OrganiserPro.dedupe import find_duplicates
+
+
+def test_sort_jobs_run_concurrently(temp_dir: Path) -> None:
+    """Test that awaited sort jobs move files and report what they did."""
+    for name in ["photos", "docs"]:
+        (temp_dir / name).mkdir()
+    (temp_dir / "photos" / "a.jpg").write_text("a")
+    (temp_dir / "photos" / "b.png").write_text("b")
+    (temp_dir / "docs" / "c.txt").write_text("c")
+
+    async def main() -> List[aio.SortResult]:
+        return await asyncio.gather(
+            aio.sort_by_type(str(temp_dir / "photos")),
+            aio.sort_by_date(str(temp_dir / "docs"), "%Y"),
+        )
+
+    photos, docs = asyncio.run(main())
+    assert (photos.files_moved, photos.directories, photos.errors) == (2, 2, [])
+    assert docs.files_moved == 1
+    assert (temp_dir / "photos" / "jpg" / "a.jpg").exists()
+    assert len(list((temp_dir / "docs").glob("*/c.txt"))) == 1
+
+
+def test_sort_progress(temp_dir: Path) -> None:
+    """Test that iterating a job yields progress per batch."""
+    for i in range(5):
+        (temp_dir / f"file{i}.txt").write_text(str(i))
+
+    async def main() -> List[aio.Progress]:
+        job = aio.sort_by_type(str(temp_dir), batch_size=2)
+        updates = [progress async for progress in job]
+        assert job.result.files_moved == 5
+        return updates
+
+    updates = asyncio.run(main())
+    assert updates[0] == aio.Progress("scan", 5)
+    assert [p.completed for p in updates if p.phase == "move"] == [2, 4, 5]
+    assert updates[-1] == aio.Progress("move", 5, 5)
+
+
+def test_sort_cancellation(temp_dir: Path) -> None:
+    """Test that a cancelled job stops at a batch boundary."""
+    for i in range(20):
+        (temp_dir / f"file{i}.txt").write_text(str(i))
+
+    async def main() -> None:
+        first_move = asyncio.Event()
+
+        async def run() -> None:
+            async for progress in aio.sort_by_type(str(temp_dir), batch_size=1):
+                if progress.phase == "move":
+                    first_move.set()
+
+        task = asyncio.create_task(run())
+        await first_move.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert len(list(temp_dir.glob("*.txt"))) > 0
+
+
+def test_find_duplicates_matches_sync(temp_dir: Path) -> None:
+    """Test that the async dedupe finds what the blocking one does."""
+    for i in range(6):
+        (temp_dir / f"dup{i}.txt").write_text(f"content {i % 3}")
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "dup.txt").write_text("content 0")
+    (temp_dir / "unique.txt").write_text("unique")
+    expected = find_duplicates(str(temp_dir), recursive=True)
+
+    async def main() -> None:
+        job = aio.find_duplicates(
+            str(temp_dir),
+            recursive=True,
+            workers=2,
+            cache_path=str(temp_dir / "cache.sqlite3"),
+            batch_size=2,
+        )
+        phases = [progress.phase async for progress in job]
+        assert phases[-1] == "hash"
+        assert job.result == expected
+
+    asyncio.run(main())
+
+
+def test_find_duplicates_low_memory(temp_dir: Path) -> None:
+    """Test that the async dedupe works once size groups spill to SQLite."""
+    for group in range(3):
+        for copy in range(3):
+            (temp_dir / f"file{group}_{copy}.bin").write_bytes(bytes([group]) * 100)
+    (temp_dir / "unique.bin").write_bytes(b"u" * 50)
+    expected = find_duplicates(str(temp_dir))
+
+    async def main() -> None:
+        job = aio.find_duplicates(str(temp_dir), low_memory=True, memory_budget=1)
+        progress = [progress async for progress in job]
+        # A spilled store doesn't count candidates up front
+        assert progress[-1].total is None
+        assert job.result == expected
+
+    asyncio.run(main())
+
+
+def test_job_errors(temp_dir: Path) -> None:
+    """Test errors raised by jobs and reading a result too early."""
+    job = aio.sort_by_type(str(temp_dir / "missing"))
+    with pytest.raises(RuntimeError):
+        job.result
+    with pytest.raises(NotADirectoryError):
+        asyncio.run(job._wait())
+    with pytest.raises(ValueError, match="Unknown I/O strategy"):
+        asyncio.run(aio.find_duplicates(str(temp_dir), io_strategy="x")._wait())
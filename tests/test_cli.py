@@ -1,21 +1,32 @@
-"""Tests for the OrganiserPro.cli module."""
+"""Tests for the OrganiserPro command line interface."""
 
+import json
 import sys
 from pathlib import Path
-from types import ModuleType
-from typing import cast
+from types import ModuleType, SimpleNamespace
+from typing import Dict, cast
 from unittest.mock import MagicMock, patch
 
 import pytest
 from click.testing import CliRunner
 
-from types import SimpleNamespace
-
-# Mock rich module and its submodules before importing cli
+# Mock rich module and its submodules before importing cli; the real modules
+# are put back afterwards so other test modules can still use rich
+_RICH_MODULES = [
+    "rich",
+    "rich.console",
+    "rich.progress",
+    "rich.prompt",
+    "rich.table",
+    "rich.text",
+    "rich.theme",
+    "rich.style",
+]
+_real_rich = {name: sys.modules.get(name) for name in _RICH_MODULES}
 sys.modules["rich"] = MagicMock()
 # Cast to ModuleType to satisfy mypy
 sys.modules["rich.console"] = cast(ModuleType, SimpleNamespace(Console=MagicMock()))
-sys.modules["rich.progress"] = cast(ModuleType, SimpleNamespace(Progress=MagicMock()))
+sys.modules["rich.progress"] = MagicMock()
 sys.modules["rich.prompt"] = cast(ModuleType, SimpleNamespace(Confirm=MagicMock()))
 sys.modules["rich.table"] = MagicMock()
 sys.modules["rich.text"] = MagicMock()
@@ -23,7 +34,17 @@ sys.modules["rich.theme"] = MagicMock()
 sys.modules["rich.style"] = MagicMock()
 
 # Now import the cli module after setting up mocks
-from OrganiserPro.cli import cli as cli_command  # noqa: E402
+from OrganiserPro.defaults import (  # noqa: E402
+    DEFAULT_MAX_AGE_DAYS,
+    DEFAULT_MAX_ENTRIES,
+)
+from OrganiserPro.main import cli as cli_command  # noqa: E402
+
+for _name, _module in _real_rich.items():
+    if _module is None:
+        del sys.modules[_name]
+    else:
+        sys.modules[_name] = _module
 
 
 @pytest.fixture
@@ -32,6 +53,36 @@ def runner() -> CliRunner:
     return CliRunner()
 
 
+def dedupe_call(directory: Path, **overrides: object) -> Dict[str, object]:
+    """Return the keyword arguments the dedupe command passes by default."""
+    kwargs: Dict[str, object] = {
+        "directory": str(Path(directory).resolve()),
+        "recursive": True,
+        "delete": False,
+        "move_to": None,
+        "dry_run": False,
+        "head_size": 4096,
+        "tail_size": 4096,
+        "cache_path": None,
+        "cache_max_entries": DEFAULT_MAX_ENTRIES,
+        "cache_max_age": DEFAULT_MAX_AGE_DAYS,
+        "workers": 1,
+        "low_memory": False,
+        "memory_budget": 256 * 1024 * 1024,
+        "algorithm": "sha256",
+        "block_size": 65536,
+        "io_strategy": "read",
+        "drop_cache": False,
+        "quiet": False,
+        "link": None,
+        "verify": True,
+        "index_path": None,
+        "executor": "thread",
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
 def test_cli_help(runner: CliRunner) -> None:
     """Test the --help flag."""
     result = runner.invoke(cli_command, ["--help"])
@@ -62,39 +113,50 @@ def test_cli_no_args_shows_help(runner: CliRunner) -> None:
     assert "dedupe" in result.output
 
 
-@patch("OrganiserPro.commands.sort_by_type_impl")
+@patch("OrganiserPro.sorter.sort_by_type")
 def test_cli_sort_type(mock_sort: MagicMock, runner: CliRunner, temp_dir: Path) -> None:
     """Test the sort-by-type command."""
     # Create a test file
     (temp_dir / "test.txt").write_text("test")
 
-    from OrganiserPro.cli import cli as cli_command
+    from OrganiserPro.main import cli as cli_command
 
     result = runner.invoke(cli_command, ["sort-by-type", str(temp_dir)])
     assert result.exit_code == 0
     # The mock should be called with the resolved path as a keyword argument
     mock_sort.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()), dry_run=False
+        directory=str(Path(temp_dir).resolve()),
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
     )
 
 
-@patch("OrganiserPro.commands.sort_by_date_impl")
+@patch("OrganiserPro.sorter.sort_by_date")
 def test_cli_sort_date(mock_sort: MagicMock, runner: CliRunner, temp_dir: Path) -> None:
     """Test the sort-by-date command."""
     result = runner.invoke(cli_command, ["sort-by-date", str(temp_dir)])
     assert result.exit_code == 0
     # Check that the implementation was called with the correct arguments
     mock_sort.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()), date_format="%Y-%m", dry_run=False
+        directory=str(Path(temp_dir).resolve()),
+        date_format="%Y-%m",
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
     )
 
 
-@patch("OrganiserPro.commands.sort_by_date_impl")
+@patch("OrganiserPro.sorter.sort_by_date")
 def test_cli_sort_date_with_format(
     mock_sort: MagicMock, runner: CliRunner, temp_dir: Path
 ) -> None:
     """Test the sort-by-date command with a custom format."""
-    from OrganiserPro.cli import cli as cli_command
+    from OrganiserPro.main import cli as cli_command
 
     result = runner.invoke(
         cli_command,
@@ -103,23 +165,162 @@ def test_cli_sort_date_with_format(
     assert result.exit_code == 0
     # Check that the implementation was called with the correct arguments
     mock_sort.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()), date_format="%Y/%m", dry_run=False
+        directory=str(Path(temp_dir).resolve()),
+        date_format="%Y/%m",
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
     )
 
 
-@patch("OrganiserPro.commands.sort_by_type_impl")
+@patch("OrganiserPro.sorter.sort_by_type")
 def test_cli_sort_no_args_uses_default(
     mock_sort: MagicMock, runner: CliRunner, temp_dir: Path
 ) -> None:
     """Test that sort-by-type works with default options."""
-    from OrganiserPro.cli import cli as cli_command
+    from OrganiserPro.main import cli as cli_command
 
     result = runner.invoke(cli_command, ["sort-by-type", str(temp_dir)])
     assert result.exit_code == 0
     # The mock should be called with the resolved path
     mock_sort.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()), dry_run=False
+        directory=str(Path(temp_dir).resolve()),
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
+    )
+
+
+@patch("OrganiserPro.sorter.sort_by_date")
+def test_cli_sort_dry_run(
+    mock_sort: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test that --dry-run is passed on so the plan can be shown."""
+    result = runner.invoke(cli_command, ["sort-by-date", str(temp_dir), "--dry-run"])
+    assert result.exit_code == 0
+    mock_sort.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        date_format="%Y-%m",
+        dry_run=True,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
+    )
+
+
+@patch("OrganiserPro.sorter.sort_by_type")
+def test_cli_sort_workers(
+    mock_sort: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the sort --workers option."""
+    result = runner.invoke(
+        cli_command, ["sort-by-type", str(temp_dir), "--workers", "8"]
+    )
+    assert result.exit_code == 0
+    mock_sort.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        dry_run=False,
+        workers=8,
+        recursive=False,
+        state_file=None,
+        quiet=False,
+    )
+
+    result = runner.invoke(
+        cli_command, ["sort-by-type", str(temp_dir), "--workers", "0"]
+    )
+    assert result.exit_code != 0
+
+
+@patch("OrganiserPro.sorter.sort_by_type")
+def test_cli_sort_recursive(
+    mock_sort: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the sort --recursive option."""
+    result = runner.invoke(cli_command, ["sort-by-type", str(temp_dir), "--recursive"])
+    assert result.exit_code == 0
+    mock_sort.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        dry_run=False,
+        workers=1,
+        recursive=True,
+        state_file=None,
+        quiet=False,
+    )
+
+
+@patch("OrganiserPro.sorter.sort_by_size")
+def test_cli_sort_size(mock_sort: MagicMock, runner: CliRunner, temp_dir: Path) -> None:
+    """Test the sort-by-size command and its bucket options."""
+    result = runner.invoke(cli_command, ["sort-by-size", str(temp_dir)])
+    assert result.exit_code == 0
+    mock_sort.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        thresholds=(1024**2, 100 * 1024**2, 1024**3),
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
+    )
+
+    mock_sort.reset_mock()
+    result = runner.invoke(
+        cli_command, ["sort-by-size", str(temp_dir), "--thresholds", "10KB,1MB"]
+    )
+    assert result.exit_code == 0
+    assert mock_sort.call_args.kwargs["thresholds"] == [10 * 1024, 1024**2]
+
+    mock_sort.reset_mock()
+    result = runner.invoke(
+        cli_command, ["sort-by-size", str(temp_dir), "--log-base", "1024"]
+    )
+    assert result.exit_code == 0
+    assert mock_sort.call_args.kwargs["thresholds"] == [1024, 1024**2, 1024**3, 1024**4]
+
+    for args in (["--thresholds", "big"], ["--thresholds", "1MB", "--log-base", "10"]):
+        result = runner.invoke(cli_command, ["sort-by-size", str(temp_dir), *args])
+        assert result.exit_code != 0
+
+
+@patch("OrganiserPro.sorter.sort_by_type")
+def test_cli_sort_stats_json(
+    mock_sort: MagicMock,
+    runner: CliRunner,
+    temp_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that --stats-json and --profile write their files."""
+    monkeypatch.chdir(temp_dir)
+    stats_file = temp_dir / "stats.json"
+
+    result = runner.invoke(
+        cli_command,
+        [
+            "sort-by-type",
+            str(temp_dir),
+            "--stats",
+            "--stats-json",
+            str(stats_file),
+            "--profile",
+        ],
+    )
+    assert result.exit_code == 0
+    mock_sort.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        dry_run=False,
+        workers=1,
+        recursive=False,
+        state_file=None,
+        quiet=False,
     )
+    assert json.loads(stats_file.read_text())["command"] == "sort-by-type"
+    assert (temp_dir / "organiserpro-sort-by-type.prof").exists()
 
 
 @patch("OrganiserPro.dedupe.find_duplicates_cli")
@@ -129,13 +330,7 @@ def test_cli_dedup_recursive(
     """Test the dedupe --recursive flag."""
     result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--recursive"])
     assert result.exit_code == 0
-    mock_dedupe.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()),
-        recursive=True,
-        delete=False,
-        move_to=None,
-        dry_run=False,
-    )
+    mock_dedupe.assert_called_once_with(**dedupe_call(temp_dir))
 
 
 @patch("OrganiserPro.dedupe.find_duplicates_cli")
@@ -171,13 +366,8 @@ def test_cli_dedup_delete(
     """Test the dedupe --delete flag."""
     result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--delete"])
     assert result.exit_code == 0
-    mock_dedupe.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()),
-        recursive=True,  # Default is True
-        delete=True,
-        move_to=None,
-        dry_run=False,
-    )
+    # recursive defaults to True
+    mock_dedupe.assert_called_once_with(**dedupe_call(temp_dir, delete=True))
 
 
 @patch("OrganiserPro.dedupe.find_duplicates_cli")
@@ -199,11 +389,235 @@ def test_cli_dedup_move_to(
 
     # Check that find_duplicates was called with the correct arguments
     mock_dedupe.assert_called_once_with(
-        directory=str(Path(temp_dir).resolve()),
-        recursive=True,  # Default is True
-        delete=False,
-        move_to=str(Path(move_dir).resolve()),
-        dry_run=False,
+        **dedupe_call(temp_dir, move_to=str(Path(move_dir).resolve()))
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_link(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --link option."""
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--link", "hard"])
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(**dedupe_call(temp_dir, link="hard"))
+
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--link", "soft"])
+    assert result.exit_code != 0
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_verify(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test that dedupe verifies by default and --no-verify turns it off."""
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--delete"])
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, delete=True, verify=True)
+    )
+
+    mock_dedupe.reset_mock()
+    result = runner.invoke(
+        cli_command, ["dedupe", str(temp_dir), "--delete", "--no-verify"]
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, delete=True, verify=False)
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_sample_sizes(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --head-size and --tail-size options."""
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--head-size", "1024", "--tail-size", "0"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, head_size=1024, tail_size=0)
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_cache(
+    mock_dedupe: MagicMock,
+    runner: CliRunner,
+    temp_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that --cache uses the XDG cache dir and --cache-path overrides it."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir / "xdg"))
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--cache"])
+    assert result.exit_code == 0
+    expected = temp_dir / "xdg" / "organiserpro" / "hashes.sqlite3"
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, cache_path=str(expected))
+    )
+
+    mock_dedupe.reset_mock()
+    cache_file = temp_dir / "hashes.db"
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--cache-path", str(cache_file)],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, cache_path=str(cache_file.resolve()))
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_against_index(
+    mock_dedupe: MagicMock,
+    runner: CliRunner,
+    temp_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that --against-index uses the XDG data dir and --index-path overrides it."""
+    monkeypatch.setenv("XDG_DATA_HOME", str(temp_dir / "xdg"))
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--against-index"])
+    assert result.exit_code == 0
+    expected = temp_dir / "xdg" / "organiserpro" / "index.sqlite3"
+    # Hash settings not given are left to the index
+    index_defaults = {"algorithm": None, "head_size": None, "tail_size": None}
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, index_path=str(expected), **index_defaults)
+    )
+
+    mock_dedupe.reset_mock()
+    index_file = temp_dir / "index.db"
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--index-path", str(index_file), "--hash", "sha256"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(
+            temp_dir,
+            index_path=str(index_file.resolve()),
+            **dict(index_defaults, algorithm="sha256"),
+        )
+    )
+
+    # Options the index lookup doesn't use are rejected, not ignored
+    mock_dedupe.reset_mock()
+    result = runner.invoke(
+        cli_command,
+        [
+            "dedupe",
+            str(temp_dir),
+            "--against-index",
+            "--executor",
+            "process",
+            "--no-cache",
+            "--low-memory",
+        ],
+    )
+    assert result.exit_code == 2
+    assert (
+        "--cache, --executor, --low-memory can't be combined with --against-index"
+        in result.output
+    )
+    mock_dedupe.assert_not_called()
+
+
+def test_cli_index_build_update_query(runner: CliRunner, temp_dir: Path) -> None:
+    """Test the index subcommands against a real index."""
+    share, incoming = temp_dir / "share", temp_dir / "incoming"
+    for directory in (share, incoming):
+        directory.mkdir()
+        (directory / "file.txt").write_text("same content")
+    index_file = temp_dir / "index.sqlite3"
+    options = ["--index-path", str(index_file), "--quiet"]
+
+    result = runner.invoke(cli_command, ["index", "build", str(share), *options])
+    assert result.exit_code == 0
+    assert index_file.exists()
+    result = runner.invoke(cli_command, ["index", "update", *options])
+    assert result.exit_code == 0
+
+    with patch("OrganiserPro.dupindex.DuplicateIndex.find_duplicates") as find:
+        find.return_value = {}
+        result = runner.invoke(
+            cli_command,
+            ["index", "query", str(incoming), "--index-path", str(index_file)],
+        )
+    assert result.exit_code == 0
+    find.assert_called_once_with(str(incoming), recursive=False, workers=1)
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_workers(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --workers option."""
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--workers", "8"])
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(**dedupe_call(temp_dir, workers=8))
+
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--workers", "0"])
+    assert result.exit_code != 0
+
+    mock_dedupe.reset_mock()
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--workers", "4", "--executor", "process"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, workers=4, executor="process")
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_low_memory(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --low-memory and --memory-budget options."""
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--low-memory", "--memory-budget", "64"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, low_memory=True, memory_budget=64 * 1024 * 1024)
+    )
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_hash_options(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --hash and --block-size options."""
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--hash", "blake2b", "--block-size", "1048576"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, algorithm="blake2b", block_size=1048576)
+    )
+
+    result = runner.invoke(cli_command, ["dedupe", str(temp_dir), "--hash", "md4"])
+    assert result.exit_code != 0
+
+
+@patch("OrganiserPro.dedupe.find_duplicates_cli")
+def test_cli_dedup_io_options(
+    mock_dedupe: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test the dedupe --io-strategy and --drop-cache options."""
+    result = runner.invoke(
+        cli_command,
+        ["dedupe", str(temp_dir), "--io-strategy", "mmap", "--drop-cache"],
+    )
+    assert result.exit_code == 0
+    mock_dedupe.assert_called_once_with(
+        **dedupe_call(temp_dir, io_strategy="mmap", drop_cache=True)
     )
 
 
@@ -212,3 +626,43 @@ def test_cli_dedup_no_directory_fails(runner: CliRunner) -> None:
     result = runner.invoke(cli_command, ["dedupe"])
     assert result.exit_code != 0
     assert "Missing argument 'TARGET_DIR'" in result.output
+
+
+@patch("OrganiserPro.watcher.watch")
+def test_cli_watch(mock_watch: MagicMock, runner: CliRunner, temp_dir: Path) -> None:
+    """Test the watch command and its option checks."""
+    result = runner.invoke(
+        cli_command, ["watch", str(temp_dir), "--by", "none", "--dedupe"]
+    )
+    assert result.exit_code == 0
+    mock_watch.assert_called_once_with(
+        directory=str(Path(temp_dir).resolve()),
+        sort_by=None,
+        date_format="%Y-%m",
+        dedupe=True,
+        move_to=None,
+        backend="auto",
+        debounce=0.5,
+        poll_interval=1.0,
+        workers=1,
+    )
+
+    result = runner.invoke(cli_command, ["watch", str(temp_dir), "--by", "none"])
+    assert result.exit_code != 0
+    assert "Nothing to do" in result.output
+
+    result = runner.invoke(cli_command, ["watch", str(temp_dir), "--move-to", "x"])
+    assert result.exit_code != 0
+
+
+@patch("OrganiserPro.watcher.watch")
+def test_cli_watch_backend_unavailable(
+    mock_watch: MagicMock, runner: CliRunner, temp_dir: Path
+) -> None:
+    """Test that an unavailable backend is reported as an error."""
+    mock_watch.side_effect = OSError("watchdog is not installed")
+    result = runner.invoke(
+        cli_command, ["watch", str(temp_dir), "--backend", "watchdog"]
+    )
+    assert result.exit_code == 1
+    assert "watchdog is not installed" in result.output
@@ -3,13 +3,29 @@
 import hashlib
 import os
 import re
+import sys
 from pathlib import Path
 from typing import Generator, Tuple
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from OrganiserPro.dedupe import find_duplicates, get_file_hash, handle_duplicates
+from OrganiserPro.dedupe import (
+    HASH_ALGORITHMS,
+    IO_STRATEGIES,
+    DedupeStats,
+    find_duplicates,
+    find_duplicates_cli,
+    get_file_hash,
+    get_sample_hash,
+    handle_duplicates,
+    link_duplicate,
+    print_duplicate_report,
+    register_hash_algorithm,
+    verify_identical,
+)
+from OrganiserPro.dupindex import DuplicateIndex
+from OrganiserPro.hashcache import HashCache
 
 
 # Mock the console and Progress for all tests
@@ -22,7 +38,7 @@ def mock_console_and_progress() -> Generator[Tuple[MagicMock, MagicMock], None,
             A tuple containing the mock console and progress objects.
     """
     with patch("OrganiserPro.dedupe.console") as mock_console, patch(
-        "OrganiserPro.dedupe.Progress"
+        "rich.progress.Progress"
     ) as mock_progress:
 
         # Mock the console status context manager
@@ -79,6 +95,82 @@ def test_get_file_hash(temp_dir: Path) -> None:
     assert get_file_hash(test_file) == expected_hash
 
 
+@pytest.mark.parametrize("block_size", [1, 7, 65536])
+def test_get_file_hash_algorithms(temp_dir: Path, block_size: int) -> None:
+    """Test that get_file_hash uses the requested algorithm and block size."""
+    test_file = temp_dir / "test.bin"
+    content = bytes(range(256)) * 10
+    test_file.write_bytes(content)
+
+    assert get_file_hash(test_file, block_size=block_size, algorithm="blake2b") == (
+        hashlib.blake2b(content).hexdigest()
+    )
+    assert get_file_hash(test_file, block_size=block_size) == (
+        hashlib.sha256(content).hexdigest()
+    )
+
+
+@pytest.mark.parametrize("io_strategy", IO_STRATEGIES)
+@pytest.mark.parametrize("size", [0, 1, 4095, 65536, 200_001])
+def test_get_file_hash_io_strategies(
+    temp_dir: Path, io_strategy: str, size: int
+) -> None:
+    """Test that every I/O strategy produces the same digest."""
+    test_file = temp_dir / "test.bin"
+    content = os.urandom(size)
+    test_file.write_bytes(content)
+
+    assert get_file_hash(test_file, block_size=4096, io_strategy=io_strategy) == (
+        hashlib.sha256(content).hexdigest()
+    )
+
+
+def test_get_file_hash_drop_cache(temp_dir: Path) -> None:
+    """Test that --drop-cache advises the kernel after hashing."""
+    if not hasattr(os, "posix_fadvise"):
+        pytest.skip("posix_fadvise not available")
+    test_file = temp_dir / "test.bin"
+    test_file.write_bytes(b"content")
+
+    with patch("OrganiserPro.dedupe.os.posix_fadvise") as mock_fadvise:
+        get_file_hash(test_file, drop_cache=True)
+    advice = [c.args[3] for c in mock_fadvise.call_args_list]
+    assert advice == [os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_DONTNEED]
+
+
+def test_get_file_hash_unknown_io_strategy(temp_dir: Path) -> None:
+    """Test that an unknown I/O strategy is rejected."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_text("content")
+    with pytest.raises(ValueError, match="Unknown I/O strategy 'aio'"):
+        get_file_hash(test_file, io_strategy="aio")
+    with pytest.raises(ValueError):
+        find_duplicates(str(temp_dir), io_strategy="aio")
+
+
+def test_get_file_hash_unknown_algorithm(temp_dir: Path) -> None:
+    """Test that an unregistered algorithm is rejected."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_text("content")
+    with pytest.raises(ValueError, match="Unknown hash algorithm 'nope'"):
+        get_file_hash(test_file, algorithm="nope")
+    with pytest.raises(ValueError):
+        find_duplicates(str(temp_dir), algorithm="nope")
+
+
+def test_register_hash_algorithm(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that registered algorithms can be used by find_duplicates."""
+    monkeypatch.setitem(HASH_ALGORITHMS, "md5", hashlib.md5)
+    register_hash_algorithm("md5", hashlib.md5)
+    (temp_dir / "file1.txt").write_text("same")
+    (temp_dir / "file2.txt").write_text("same")
+
+    duplicates = find_duplicates(str(temp_dir), algorithm="md5")
+    assert list(duplicates) == [hashlib.md5(b"same").hexdigest()]
+
+
 def test_get_file_hash_nonexistent_file() -> None:
     """Test that get_file_hash handles non-existent files gracefully."""
     assert get_file_hash(Path("/nonexistent/file/path")) == ""
@@ -133,6 +225,215 @@ def test_find_duplicates_recursive(temp_dir: Path) -> None:
     assert find_duplicates(str(temp_dir), recursive=False) == {}
 
 
+def test_find_duplicates_skips_symlinked_files(temp_dir: Path) -> None:
+    """Test that a symlink isn't reported as a duplicate of its target."""
+    (temp_dir / "real.txt").write_text("content")
+    (temp_dir / "link.txt").symlink_to(temp_dir / "real.txt")
+
+    assert find_duplicates(str(temp_dir)) == {}
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_find_duplicates_skips_hard_links(temp_dir: Path, low_memory: bool) -> None:
+    """Test that files already hard-linked together aren't duplicates again."""
+    files = [temp_dir / "a.txt", temp_dir / "b.txt", temp_dir / "c.txt"]
+    for file in files:
+        file.write_text("same")
+
+    find_duplicates_cli(str(temp_dir), link="hard", quiet=True)
+    assert len({file.stat().st_ino for file in files}) == 1
+
+    # A second run finds one file under three names, not two duplicates
+    with patch("OrganiserPro.dedupe.handle_duplicates") as mock_handle:
+        find_duplicates_cli(
+            str(temp_dir),
+            link="hard",
+            quiet=True,
+            low_memory=low_memory,
+            memory_budget=1,
+        )
+    mock_handle.assert_not_called()
+    stats = DedupeStats()
+    assert find_duplicates(
+        str(temp_dir), stats=stats, low_memory=low_memory, memory_budget=1
+    ) == {}
+    assert stats.hard_links_skipped == 2
+
+
+def test_get_sample_hash_reads_head_and_tail(temp_dir: Path) -> None:
+    """Test that get_sample_hash only depends on the sampled bytes."""
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file1.write_bytes(b"head" + b"a" * 100 + b"tail")
+    file2.write_bytes(b"head" + b"b" * 100 + b"tail")
+
+    hash1 = get_sample_hash(file1, 108, head_size=4, tail_size=4)
+    hash2 = get_sample_hash(file2, 108, head_size=4, tail_size=4)
+    assert hash1 == hash2
+    assert hash1 == hashlib.sha256(b"headtail").hexdigest()
+
+    # A sample covering the whole file is the hash of the whole file
+    assert get_sample_hash(file1, 108, head_size=100, tail_size=100) == (
+        get_file_hash(file1)
+    )
+
+
+def test_find_duplicates_sample_stage_skips_full_hash(temp_dir: Path) -> None:
+    """Test that files with different heads are never hashed in full."""
+    (temp_dir / "file1.bin").write_bytes(b"x" + b"0" * 9999)
+    (temp_dir / "file2.bin").write_bytes(b"y" + b"0" * 9999)
+    (temp_dir / "file3.bin").write_bytes(b"z" * 10)
+
+    stats = DedupeStats()
+    with patch("OrganiserPro.dedupe.get_file_hash") as mock_hash:
+        assert find_duplicates(str(temp_dir), head_size=16, stats=stats) == {}
+    mock_hash.assert_not_called()
+
+    assert stats.files_scanned == 3
+    assert stats.size_candidates == 2
+    assert stats.sample_candidates == 0
+    assert stats.bytes_skipped_by_size == 10
+    assert stats.bytes_sampled == 2 * (16 + 4096)
+    assert stats.bytes_skipped_by_sample == 2 * (10000 - 16 - 4096)
+    assert stats.bytes_hashed == 0
+
+
+def test_find_duplicates_same_sample_different_middle(temp_dir: Path) -> None:
+    """Test that files sharing head and tail are told apart by the full hash."""
+    (temp_dir / "file1.bin").write_bytes(b"head" + b"a" * 100 + b"tail")
+    (temp_dir / "file2.bin").write_bytes(b"head" + b"b" * 100 + b"tail")
+    (temp_dir / "file3.bin").write_bytes(b"head" + b"b" * 100 + b"tail")
+
+    stats = DedupeStats()
+    duplicates = find_duplicates(str(temp_dir), head_size=4, tail_size=4, stats=stats)
+
+    assert len(duplicates) == 1
+    assert sorted(p.name for p in list(duplicates.values())[0]) == [
+        "file2.bin",
+        "file3.bin",
+    ]
+    assert stats.sample_candidates == 3
+    assert stats.bytes_hashed == 3 * 108
+
+
+def test_find_duplicates_workers_keep_order(temp_dir: Path) -> None:
+    """Test that hashing with a thread pool gives the same ordered result."""
+    for group in range(5):
+        for copy in range(4):
+            (temp_dir / f"file{group}_{copy}.bin").write_bytes(bytes([group]) * 1000)
+    (temp_dir / "unique.bin").write_bytes(b"u" * 1000)
+
+    serial = find_duplicates(str(temp_dir), workers=1)
+    parallel = find_duplicates(str(temp_dir), workers=4)
+
+    assert len(serial) == 5
+    assert list(serial.items()) == list(parallel.items())
+
+
+def test_small_files_skip_sample_stage(temp_dir: Path) -> None:
+    """Test that small files are read whole once, with the same digests."""
+    sizes = [0, 100, 8192, 8193, 65536, 65537]
+    for size in sizes:
+        for copy in range(2):
+            (temp_dir / f"{size}_{copy}.bin").write_bytes(b"s" * size)
+
+    stats = DedupeStats()
+    with patch(
+        "OrganiserPro.dedupe.get_sample_hash", side_effect=get_sample_hash
+    ) as sampled:
+        duplicates = find_duplicates(str(temp_dir), stats=stats)
+
+    # Only files bigger than the 4096 + 4096 byte sample are sampled
+    assert sorted(Path(call.args[0]).name for call in sampled.call_args_list) == sorted(
+        f"{size}_{copy}.bin" for size in sizes[3:] for copy in range(2)
+    )
+    assert len(duplicates) == len(sizes)
+    for digest, paths in duplicates.items():
+        assert all(get_file_hash(path) == digest for path in paths)
+
+
+def test_small_file_read_errors_are_recorded(temp_dir: Path) -> None:
+    """Test that errors on the small-file path reach stats.errors."""
+    (temp_dir / "a.txt").write_text("same")
+    (temp_dir / "b.txt").write_text("same")
+
+    stats = DedupeStats()
+    with patch("OrganiserPro.dedupe.os.read", side_effect=OSError(5, "I/O error")):
+        assert find_duplicates(str(temp_dir), stats=stats, quiet=True) == {}
+    assert sorted(Path(path).name for path, _ in stats.errors) == ["a.txt", "b.txt"]
+
+
+def test_find_duplicates_process_executor(temp_dir: Path) -> None:
+    """Test that batches hashed in worker processes come back in order."""
+    for group in range(5):
+        for copy in range(4):
+            (temp_dir / f"file{group}_{copy}.bin").write_bytes(bytes([group]) * 1000)
+    (temp_dir / "unique.bin").write_bytes(b"u" * 1000)
+
+    serial = find_duplicates(str(temp_dir), head_size=0, tail_size=0)
+    # Small batches, so each stage is split across several tasks
+    with patch("OrganiserPro.dedupe.PROCESS_BATCH_FILES", 3):
+        stats = DedupeStats()
+        parallel = find_duplicates(
+            str(temp_dir), workers=2, executor="process", stats=stats
+        )
+
+    assert len(serial) == 5
+    assert list(serial.items()) == list(parallel.items())
+    # 1000-byte files skip the sample stage, so unique.bin is hashed too
+    assert stats.bytes_hashed == 21 * 1000
+
+    with pytest.raises(ValueError, match="Unknown executor"):
+        find_duplicates(str(temp_dir), executor="fibers")
+
+
+def test_find_duplicates_low_memory_spills(temp_dir: Path) -> None:
+    """Test that spilling scan records to disk gives the same result."""
+    for group in range(3):
+        for copy in range(3):
+            (temp_dir / f"file{group}_{copy}.bin").write_bytes(bytes([group]) * 100)
+    (temp_dir / "unique.bin").write_bytes(b"u" * 50)
+
+    in_memory = DedupeStats()
+    expected = find_duplicates(str(temp_dir), stats=in_memory)
+    assert not in_memory.spilled
+
+    spilled = DedupeStats()
+    result = find_duplicates(
+        str(temp_dir), stats=spilled, low_memory=True, memory_budget=1
+    )
+    assert spilled.spilled
+    assert list(result.items()) == list(expected.items())
+    assert spilled.bytes_skipped_by_size == in_memory.bytes_skipped_by_size == 50
+    assert spilled.size_candidates == 9
+    assert spilled.peak_memory
+
+
+def test_find_duplicates_with_cache(temp_dir: Path) -> None:
+    """Test that a second run over an unchanged tree reads no file contents."""
+    content = "This is a duplicate file"
+    (temp_dir / "file1.txt").write_text(content)
+    (temp_dir / "file2.txt").write_text(content)
+
+    with HashCache(temp_dir / "cache" / "hashes.sqlite3") as cache:
+        first = DedupeStats()
+        duplicates = find_duplicates(str(temp_dir), stats=first, cache=cache)
+        assert first.cache_misses == 2  # Small files are only hashed in full
+
+        second = DedupeStats()
+        with patch("OrganiserPro.dedupe.open", side_effect=AssertionError):
+            assert find_duplicates(str(temp_dir), stats=second, cache=cache) == (
+                duplicates
+            )
+        assert (second.cache_hits, second.cache_misses) == (2, 0)
+        assert second.bytes_sampled == second.bytes_hashed == 0
+
+        # Digests made with another algorithm are stored separately
+        third = DedupeStats()
+        find_duplicates(str(temp_dir), stats=third, cache=cache, algorithm="blake2b")
+        assert (third.cache_hits, third.cache_misses) == (0, 2)
+
+
 def test_handle_duplicates_dry_run(
     temp_dir: Path,
     mock_console_and_progress: Tuple[MagicMock, MagicMock],
@@ -240,3 +541,255 @@ def test_handle_duplicates_move_to(temp_dir: Path) -> None:
     moved_files = list(dest_dir.glob("*"))
     assert len(moved_files) == 1  # One file should be in the destination
     assert moved_files[0].name == "file2.txt"  # The moved file should be file2.txt
+
+
+def test_handle_duplicates_returns_report(temp_dir: Path) -> None:
+    """Test that handle_duplicates describes what it did with each file."""
+    files = [temp_dir / f"file{i}.txt" for i in range(3)]
+    for file in files:
+        file.write_text("same")
+    dest_dir = temp_dir / "duplicates"
+
+    report = handle_duplicates({"hash1": files}, move_to=str(dest_dir), quiet=True)
+
+    assert (report.groups, report.mode, report.files_moved) == (1, "move", 2)
+    assert [action.path for action in report.actions] == files[1:]
+    assert all(action.original == files[0] for action in report.actions)
+    assert report.actions[0].destination == dest_dir.resolve() / "file1.txt"
+    assert report.errors == []
+
+    # A file that vanished in the meantime is reported as an error
+    report = handle_duplicates({"hash1": files}, delete=True, quiet=True)
+    assert report.files_deleted == 0
+    assert [action.path for action in report.errors] == files[1:]
+
+
+def test_quiet_mode_prints_nothing(
+    temp_dir: Path, mock_console_and_progress: Tuple[MagicMock, MagicMock]
+) -> None:
+    """Test that quiet mode records errors instead of printing anything."""
+    # Big enough not to take the small-file path around get_file_hash
+    (temp_dir / "a.txt").write_text("same" * 20_000)
+    (temp_dir / "b.txt").write_text("same" * 20_000)
+    mock_console, mock_progress = mock_console_and_progress
+    stats = DedupeStats()
+
+    with patch("OrganiserPro.dedupe.get_file_hash", return_value=""):
+        duplicates = find_duplicates(str(temp_dir), stats=stats, quiet=True)
+    missing = find_duplicates(str(temp_dir / "missing"), stats=stats, quiet=True)
+    report = handle_duplicates(
+        {"h": [temp_dir / "a.txt", temp_dir / "b.txt"]}, quiet=True
+    )
+
+    assert duplicates == {} and missing == {}
+    assert [path for path, _ in stats.errors] == [str(temp_dir / "missing")]
+    assert stats.seconds >= 0
+    assert report.mode == "report"
+    mock_console.print.assert_not_called()
+    mock_progress.assert_not_called()
+
+    # The report can still be rendered afterwards
+    print_duplicate_report(report)
+    printed = strip_ansi(
+        " ".join(str(c.args[0]) for c in mock_console.print.mock_calls)
+    )
+    assert "Found 1 duplicate file in 1 groups" in printed
+    assert f"Duplicate:[/] {temp_dir / 'b.txt'}" in printed
+
+
+def test_unreadable_files_are_recorded(temp_dir: Path) -> None:
+    """Test that read errors reach on_error and the stats."""
+    errors = []
+    digest = get_file_hash(
+        temp_dir / "missing", on_error=lambda path, e: errors.append(path)
+    )
+    assert digest == ""
+    assert errors == [str(temp_dir / "missing")]
+
+
+def test_handle_duplicates_hard_link(temp_dir: Path) -> None:
+    """Test that duplicates are replaced by hard links to the kept file."""
+    files = [temp_dir / "a.txt", temp_dir / "b.txt", temp_dir / "c.txt"]
+    for file in files:
+        file.write_text("same")
+
+    report = handle_duplicates({"hash1": files}, link="hard", quiet=True)
+
+    assert (report.mode, report.files_linked, report.errors) == ("link", 2, [])
+    inode = files[0].stat().st_ino
+    assert all(file.stat().st_ino == inode for file in files)
+    assert all(file.read_text() == "same" for file in files)
+    assert sorted(p.name for p in temp_dir.iterdir()) == ["a.txt", "b.txt", "c.txt"]
+
+    # Linking again is a no-op
+    link_duplicate(files[0], files[1], "hard")
+    assert files[1].stat().st_ino == inode
+
+
+def test_link_failure_leaves_duplicate(temp_dir: Path) -> None:
+    """Test that a failed link leaves the duplicate and no temporary file."""
+    original, duplicate = temp_dir / "a.txt", temp_dir / "b.txt"
+    original.write_text("same")
+    duplicate.write_text("same")
+
+    with patch("OrganiserPro.dedupe.os.link", side_effect=OSError(18, "EXDEV")):
+        report = handle_duplicates(
+            {"h": [original, duplicate]}, link="hard", quiet=True
+        )
+    assert [action.path for action in report.errors] == [duplicate]
+    assert report.files_linked == 0
+
+    assert sorted(p.name for p in temp_dir.iterdir()) == ["a.txt", "b.txt"]
+
+    with pytest.raises(ValueError, match="Unknown link mode"):
+        handle_duplicates({"h": [original, duplicate]}, link="soft")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="No fcntl on Windows")
+def test_reflink_failure_leaves_duplicate(temp_dir: Path) -> None:
+    """Test that a failed clone leaves the duplicate and no temporary file."""
+    original, duplicate = temp_dir / "a.txt", temp_dir / "b.txt"
+    original.write_text("same")
+    duplicate.write_text("same")
+
+    with patch("fcntl.ioctl", side_effect=OSError(95, "Operation not supported")):
+        with pytest.raises(OSError):
+            link_duplicate(original, duplicate, "reflink")
+    assert duplicate.read_text() == "same"
+    assert sorted(p.name for p in temp_dir.iterdir()) == ["a.txt", "b.txt"]
+
+
+def test_reflink_keeps_duplicate_owner(temp_dir: Path) -> None:
+    """Test that a clone is given the duplicate's owner, falling back to its group."""
+    original, duplicate = temp_dir / "a.bin", temp_dir / "b.bin"
+    original.write_bytes(b"x" * 100)
+    duplicate.write_bytes(b"x" * 100)
+    st = duplicate.stat()
+
+    def clone(source: Path, target: str) -> None:
+        Path(target).write_bytes(source.read_bytes())
+
+    with patch("OrganiserPro.dedupe._clone_file", side_effect=clone), patch(
+        "os.chown", side_effect=[PermissionError(1, "not root"), None]
+    ) as chown:
+        link_duplicate(original, duplicate, "reflink")
+    assert [call.args[1:] for call in chown.call_args_list] == [
+        (st.st_uid, st.st_gid),
+        (-1, st.st_gid),
+    ]
+    assert duplicate.read_bytes() == b"x" * 100
+
+
+def test_reflink_keeps_duplicate_metadata(temp_dir: Path) -> None:
+    """Test a reflink clone, where the filesystem supports one."""
+    original, duplicate = temp_dir / "a.bin", temp_dir / "b.bin"
+    original.write_bytes(b"x" * 8192)
+    duplicate.write_bytes(b"x" * 8192)
+    os.utime(duplicate, (1_600_000_000, 1_600_000_000))
+    try:
+        link_duplicate(original, duplicate, "reflink")
+    except OSError:
+        pytest.skip("filesystem doesn't support reflinks")
+    assert duplicate.read_bytes() == original.read_bytes()
+    assert duplicate.stat().st_ino != original.stat().st_ino
+    assert duplicate.stat().st_mtime == 1_600_000_000
+
+
+def test_verify_identical(temp_dir: Path) -> None:
+    """Test that a group is compared with the kept file in one pass."""
+    original = temp_dir / "a.bin"
+    original.write_bytes(b"x" * 10_000)
+    same = [temp_dir / f"same{i}.bin" for i in range(3)]
+    for file in same:
+        file.write_bytes(b"x" * 10_000)
+    changed, shorter, longer = (
+        temp_dir / "c.bin",
+        temp_dir / "s.bin",
+        temp_dir / "l.bin",
+    )
+    changed.write_bytes(b"x" * 9_999 + b"y")
+    shorter.write_bytes(b"x" * 9_999)
+    longer.write_bytes(b"x" * 10_001)
+    missing = temp_dir / "missing.bin"
+
+    candidates = [*same, changed, shorter, longer, missing]
+    mismatches = verify_identical(original, candidates, chunk_size=4096, max_open=2)
+
+    assert sorted(mismatches) == sorted([changed, shorter, longer, missing])
+    assert "contents differ" in mismatches[changed]
+
+    # An unreadable original fails every candidate rather than passing them
+    mismatches = verify_identical(missing, same)
+    assert sorted(mismatches) == same
+    assert all("could not read" in reason for reason in mismatches.values())
+
+
+def test_handle_duplicates_verify(temp_dir: Path) -> None:
+    """Test that verifying leaves files that only share a digest alone."""
+    original, duplicate, impostor = (
+        temp_dir / "a.txt",
+        temp_dir / "b.txt",
+        temp_dir / "c.txt",
+    )
+    original.write_text("same")
+    duplicate.write_text("same")
+    impostor.write_text("diff")
+
+    report = handle_duplicates(
+        {"h": [original, duplicate, impostor]}, delete=True, quiet=True
+    )
+
+    assert not duplicate.exists()
+    assert impostor.read_text() == "diff"
+    assert report.files_deleted == 1
+    assert [action.path for action in report.errors] == [impostor]
+    assert "contents differ" in report.errors[0].error
+
+    # Without verifying, the digests are trusted
+    duplicate.write_text("same")
+    report = handle_duplicates(
+        {"h": [original, duplicate, impostor]}, delete=True, quiet=True, verify=False
+    )
+    assert report.files_deleted == 2
+    assert not impostor.exists()
+
+
+def test_find_duplicates_cli_against_index(temp_dir: Path) -> None:
+    """Test that duplicates of indexed files are handled, keeping the indexed copy."""
+    share, incoming = temp_dir / "share", temp_dir / "incoming"
+    for directory in (share, incoming):
+        directory.mkdir()
+        (directory / "photo.jpg").write_text("same")
+    (incoming / "new.jpg").write_text("new!")
+    index_path = temp_dir / "index.sqlite3"
+    with DuplicateIndex(index_path) as index:
+        index.build(share, quiet=True)
+
+    find_duplicates_cli(
+        str(incoming), delete=True, index_path=str(index_path), quiet=True
+    )
+    assert (share / "photo.jpg").exists()
+    assert not (incoming / "photo.jpg").exists()
+    assert (incoming / "new.jpg").exists()
+
+
+def test_find_duplicates_cli_index_settings(temp_dir: Path) -> None:
+    """Test that index lookups reject settings they can't honour."""
+    index_path = temp_dir / "index.sqlite3"
+    with DuplicateIndex(index_path, algorithm="blake2b") as index:
+        index.build(temp_dir, quiet=True)
+
+    with pytest.raises(ValueError, match="built with algorithm blake2b, not sha256"):
+        find_duplicates_cli(
+            str(temp_dir), delete=True, index_path=str(index_path), algorithm="sha256"
+        )
+    with pytest.raises(ValueError, match="cache_path, executor can't be combined"):
+        find_duplicates_cli(
+            str(temp_dir),
+            delete=True,
+            index_path=str(index_path),
+            cache_path=str(temp_dir / "cache.sqlite3"),
+            executor="process",
+        )
+    # Without a hash setting, the index's own is used
+    find_duplicates_cli(str(temp_dir), delete=True, index_path=str(index_path))
@@ -0,0 +1,157 @@
+"""Tests for the OrganiserPro.dupindex module."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from OrganiserPro.dedupe import DedupeStats, get_file_hash
+from OrganiserPro.dupindex import DuplicateIndex, default_index_path
+
+
+@pytest.fixture
+def index(temp_dir: Path) -> DuplicateIndex:
+    """Return an index stored in the temporary directory."""
+    return DuplicateIndex(temp_dir / "index" / "index.sqlite3")
+
+
+def make_share(directory: Path, files: dict) -> Path:
+    """Create a directory holding files with the given contents."""
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    return directory
+
+
+def test_default_index_path_uses_xdg(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the default index lives under XDG_DATA_HOME."""
+    monkeypatch.setenv("XDG_DATA_HOME", str(temp_dir))
+    assert default_index_path() == temp_dir / "organiserpro" / "index.sqlite3"
+
+
+def test_build_and_find_duplicates(index: DuplicateIndex, temp_dir: Path) -> None:
+    """Test that files in another directory are matched against the index."""
+    share = make_share(
+        temp_dir / "share",
+        {"a.bin": b"a" * 10000, "sub/b.bin": b"b" * 10000, "c.bin": b"c" * 100},
+    )
+    stats = index.build(share, quiet=True)
+    assert (stats.files_scanned, stats.files_hashed, stats.errors) == (3, 3, [])
+    assert len(index) == 3
+    assert index.roots() == [str(share)]
+
+    incoming = make_share(
+        temp_dir / "incoming",
+        {"copy.bin": b"b" * 10000, "other.bin": b"x" * 10000, "unique.bin": b"u"},
+    )
+    dedupe_stats = DedupeStats()
+    duplicates = index.find_duplicates(incoming, stats=dedupe_stats, quiet=True)
+
+    digest = get_file_hash(incoming / "copy.bin")
+    assert duplicates == {digest: [share / "sub" / "b.bin", incoming / "copy.bin"]}
+    # unique.bin is ruled out by size, other.bin by its sample
+    assert dedupe_stats.size_candidates == 2
+    assert dedupe_stats.sample_candidates == 1
+    assert dedupe_stats.bytes_hashed == 10000
+
+
+def test_find_duplicates_hashes_small_files_once(
+    index: DuplicateIndex, temp_dir: Path
+) -> None:
+    """Test that files no bigger than the sample skip the sample stage."""
+    share = make_share(temp_dir / "share", {"a.bin": b"a" * 100, "b.bin": b"b" * 100})
+    index.build(share, quiet=True)
+    incoming = make_share(
+        temp_dir / "incoming", {"copy.bin": b"a" * 100, "other.bin": b"x" * 100}
+    )
+
+    dedupe_stats = DedupeStats()
+    with patch(
+        "OrganiserPro.dupindex.get_sample_hash", side_effect=AssertionError
+    ) as sampled:
+        duplicates = index.find_duplicates(incoming, stats=dedupe_stats, quiet=True)
+
+    digest = get_file_hash(incoming / "copy.bin")
+    assert duplicates == {digest: [share / "a.bin", incoming / "copy.bin"]}
+    sampled.assert_not_called()
+    assert dedupe_stats.bytes_sampled == 0
+    assert dedupe_stats.bytes_hashed == 200
+
+
+def test_update_only_rehashes_changed_files(
+    index: DuplicateIndex, temp_dir: Path
+) -> None:
+    """Test that updates compare stat data instead of rereading files."""
+    share = make_share(
+        temp_dir / "share",
+        {"keep.bin": b"k" * 10, "change.bin": b"c" * 10, "gone/x.bin": b"x"},
+    )
+    index.build(share, quiet=True)
+
+    (share / "change.bin").write_bytes(b"changed")
+    (share / "gone" / "x.bin").unlink()
+    (share / "gone").rmdir()
+    (share / "new.bin").write_bytes(b"new")
+
+    with patch(
+        "OrganiserPro.dupindex.get_file_hash", side_effect=get_file_hash
+    ) as hashed:
+        stats = index.update(share, quiet=True)
+
+    assert sorted(Path(call.args[0]).name for call in hashed.call_args_list) == [
+        "change.bin",
+        "new.bin",
+    ]
+    assert (stats.files_unchanged, stats.files_hashed, stats.files_removed) == (
+        1,
+        2,
+        1,
+    )
+    assert len(index) == 3
+
+
+def test_indexed_files_reuse_stored_digests(
+    index: DuplicateIndex, temp_dir: Path
+) -> None:
+    """Test that looking up an indexed directory reads nothing."""
+    share = make_share(temp_dir / "share", {"a.bin": b"a" * 100})
+    other = make_share(temp_dir / "other", {"a.bin": b"a" * 100})
+    index.build(share, quiet=True)
+    index.build(other, quiet=True)
+
+    with patch("OrganiserPro.dupindex.get_file_hash") as hashed:
+        duplicates = index.find_duplicates(other, quiet=True)
+    hashed.assert_not_called()
+    assert list(duplicates.values()) == [[share / "a.bin", other / "a.bin"]]
+
+
+def test_changed_indexed_files_are_not_matched(
+    index: DuplicateIndex, temp_dir: Path
+) -> None:
+    """Test that an indexed copy edited or removed since isn't kept."""
+    share = make_share(temp_dir / "share", {"a.bin": b"a" * 100, "b.bin": b"a" * 100})
+    index.build(share, quiet=True)
+    (share / "a.bin").write_bytes(b"z" * 100)
+    os.utime(share / "a.bin", ns=(0, 0))
+    (share / "b.bin").unlink()
+
+    incoming = make_share(temp_dir / "incoming", {"a.bin": b"a" * 100})
+    assert index.find_duplicates(incoming, quiet=True) == {}
+
+
+def test_settings_are_fixed(index: DuplicateIndex) -> None:
+    """Test that an index can't be reopened with other hash settings."""
+    index.close()
+    with pytest.raises(ValueError, match="algorithm"):
+        DuplicateIndex(index.path, algorithm="blake2b")
+    with DuplicateIndex(index.path, algorithm="sha256") as reopened:
+        assert reopened.head_size == 4096
+
+    with pytest.raises(FileNotFoundError):
+        DuplicateIndex(index.path.with_name("missing.sqlite3"), create=False)
+    with pytest.raises(ValueError, match="Unknown hash algorithm"):
+        DuplicateIndex(index.path.with_name("new.sqlite3"), algorithm="nope")
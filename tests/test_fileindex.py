@@ -0,0 +1,60 @@
+"""Tests for the OrganiserPro.fileindex module."""
+
+from pathlib import Path
+
+from OrganiserPro.fileindex import FileIndex
+from OrganiserPro.walker import walk, walk_by_directory
+
+
+def scan(directory: Path) -> FileIndex:
+    """Index every file under a directory, one directory at a time."""
+    index = FileIndex()
+    for current, files in walk_by_directory(directory, recursive=True):
+        if files:
+            index.extend_directory(current, files)
+    return index
+
+
+def test_index_matches_walker(temp_dir: Path) -> None:
+    """Test that indexing builds one row per walked file, in walk order."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "b.txt").write_text("bb")
+    (temp_dir / "sub" / "c.txt").write_text("ccc")
+
+    index = scan(temp_dir)
+    entries = list(walk(temp_dir, recursive=True))
+
+    assert len(index) == 3
+    for row, entry in enumerate(entries):
+        assert index.path(row) == entry.path
+        assert index.names[row] == entry.name
+        assert index.sizes[row] == entry.size
+        assert index.key(row) == entry.key
+    assert [e.path for e in index.entries()] == [e.path for e in entries]
+
+
+def test_directories_are_interned(temp_dir: Path) -> None:
+    """Test that each directory is stored once however many files it holds."""
+    for i in range(5):
+        (temp_dir / f"file{i}.txt").write_text(str(i))
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "other.txt").write_text("x")
+
+    index = scan(temp_dir)
+
+    assert index.directories == [str(temp_dir), str(temp_dir / "sub")]
+    assert list(index.dir_ids) == [0, 0, 0, 0, 0, 1]
+    assert index.directory(5) == str(temp_dir / "sub")
+
+
+def test_add_entry(temp_dir: Path) -> None:
+    """Test adding walker entries one at a time."""
+    (temp_dir / "a.txt").write_text("a")
+    (entry,) = walk(temp_dir)
+
+    index = FileIndex()
+    assert index.add_entry(entry) == 0
+    assert index.add_entry(entry) == 1
+    assert index.directories == [str(temp_dir)]
+    assert index.entry(1).path == entry.path
@@ -0,0 +1,71 @@
+"""Tests for the OrganiserPro.hashcache module."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from OrganiserPro.hashcache import HashCache, cache_key, default_cache_path
+
+
+@pytest.fixture
+def cache(temp_dir: Path) -> HashCache:
+    """Return a cache stored in the temporary directory."""
+    return HashCache(temp_dir / "cache" / "hashes.sqlite3")
+
+
+def test_default_cache_path_uses_xdg(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the default cache lives under XDG_CACHE_HOME."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir))
+    assert default_cache_path() == temp_dir / "organiserpro" / "hashes.sqlite3"
+
+
+def test_cache_round_trip(cache: HashCache, temp_dir: Path) -> None:
+    """Test that a stored digest is returned for an unchanged file."""
+    test_file = temp_dir / "file.txt"
+    test_file.write_text("content")
+    key = cache_key(test_file.stat())
+
+    assert cache.get(key, "full") is None
+    cache.put(key, "full", "abc123")
+    assert cache.get(key, "full") == "abc123"
+    assert cache.get(key, "sample:4096:4096") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Entries survive reopening the cache
+    cache.close()
+    with HashCache(cache.path) as reopened:
+        assert reopened.get(key, "full") == "abc123"
+
+
+def test_cache_invalidates_changed_file(cache: HashCache, temp_dir: Path) -> None:
+    """Test that a digest is dropped once the file's size or mtime changes."""
+    test_file = temp_dir / "file.txt"
+    test_file.write_text("content")
+    cache.put(cache_key(test_file.stat()), "full", "abc123")
+
+    test_file.write_text("new content")
+    os.utime(test_file, (1617235200, 1617235200))
+    assert cache.get(cache_key(test_file.stat()), "full") is None
+    assert len(cache) == 0
+
+
+def test_cache_prune(cache: HashCache) -> None:
+    """Test age and count based eviction."""
+    for inode in range(5):
+        cache.put((1, inode, 10, 100), "full", f"digest{inode}")
+    cache.flush()
+    # Make the first entry look old and the second recently used
+    cache._conn.execute(
+        "UPDATE hashes SET last_used = ? WHERE inode = 0", (time.time() - 86400 * 10,)
+    )
+    cache.get((1, 1, 10, 100), "full")
+
+    assert cache.prune(max_entries=None, max_age_days=5) == 1
+    assert len(cache) == 4
+
+    assert cache.prune(max_entries=1, max_age_days=None) == 3
+    assert cache.get((1, 1, 10, 100), "full") == "digest1"
@@ -0,0 +1,92 @@
+"""Tests for the OrganiserPro package namespace and its import cost."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import click
+import pytest
+
+import OrganiserPro
+from OrganiserPro import sorter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def modules_after(code: str) -> List[str]:
+    """Return the modules loaded in a fresh interpreter after running code."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{code}\nimport sys\nprint(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return out.stdout.split()
+
+
+def loaded_after(code: str) -> List[str]:
+    """Return the top-level packages loaded in a fresh interpreter after code."""
+    return sorted({name.split(".")[0] for name in modules_after(code)})
+
+
+def test_package_import_is_lightweight() -> None:
+    """Test that importing the package pulls in neither click nor rich."""
+    loaded = loaded_after("import OrganiserPro")
+    assert "rich" not in loaded
+    assert "click" not in loaded
+
+
+def test_cli_import_defers_rich() -> None:
+    """Test that rich is only imported once something is printed."""
+    loaded = loaded_after("import OrganiserPro.main, OrganiserPro.aio")
+    assert "rich" not in loaded
+    assert "click" in loaded
+
+
+def test_lazy_attributes() -> None:
+    """Test that public names resolve on first access."""
+    assert OrganiserPro.sort_by_type is sorter.sort_by_type
+    assert "find_duplicates" in dir(OrganiserPro)
+    with pytest.raises(AttributeError, match="no_such_name"):
+        OrganiserPro.no_such_name
+
+
+def test_cli_import_defers_commands() -> None:
+    """Test that the CLI loads the modules doing the work only when run."""
+    loaded = modules_after("import OrganiserPro.main")
+    assert "click" in loaded
+    for name in [
+        "OrganiserPro.dedupe",
+        "OrganiserPro.dupindex",
+        "OrganiserPro.hashcache",
+        "OrganiserPro.sorter",
+        "OrganiserPro.sortstate",
+        "OrganiserPro.watcher",
+        "cProfile",
+        "mmap",
+        "sqlite3",
+    ]:
+        assert name not in loaded
+
+
+def test_cli_is_the_command_group() -> None:
+    """Test that the package's cli is the group however it was imported."""
+    import OrganiserPro.main  # noqa: F401
+
+    assert OrganiserPro.cli is OrganiserPro.main.cli
+    assert isinstance(OrganiserPro.cli, click.Group)
+    assert "cli" in dir(OrganiserPro)
+    loaded = loaded_after(
+        "import OrganiserPro.main, click\n"
+        "import OrganiserPro\n"
+        "assert isinstance(OrganiserPro.cli, click.Group)"
+    )
+    assert "click" in loaded
@@ -0,0 +1,92 @@
+"""Tests for the OrganiserPro.instrument module."""
+
+import json
+from pathlib import Path
+
+from OrganiserPro import instrument
+from OrganiserPro.dedupe import find_duplicates
+from OrganiserPro.sorter import sort_by_type
+
+
+def test_phase_and_count_without_collector() -> None:
+    """Test that instrumentation is a no-op when no run is being collected."""
+    with instrument.phase("scan") as stats:
+        stats.files += 1
+    instrument.count("files_read")
+
+    with instrument.collect() as run:
+        pass
+    assert run.phases == {}
+    assert run.counters == {}
+
+
+def test_collect_accumulates_phases_and_counters() -> None:
+    """Test that repeated phases and counters add up."""
+    with instrument.collect("test") as run:
+        for _ in range(2):
+            with instrument.phase("hash") as stats:
+                stats.files += 1
+                stats.bytes += 100
+        instrument.count("files_read", 3)
+        instrument.count("files_read")
+
+    assert list(run.phases) == ["hash"]
+    assert run.phases["hash"].files == 2
+    assert run.phases["hash"].bytes == 200
+    assert run.counters == {"files_read": 4}
+    assert run.wall_seconds >= run.phases["hash"].seconds
+
+    # Recording stops when the block exits
+    instrument.count("files_read")
+    assert run.counters == {"files_read": 4}
+
+
+def test_find_duplicates_records_phases(temp_dir: Path) -> None:
+    """Test that dedupe reports its scan, sample and hash phases."""
+    for name in ["a.txt", "b.txt"]:
+        (temp_dir / name).write_text("same content")
+    (temp_dir / "c.txt").write_text("other")
+
+    with instrument.collect("dedupe") as run:
+        find_duplicates(str(temp_dir))
+
+    assert list(run.phases) == ["scan", "sample", "hash"]
+    assert run.phases["scan"].files == 3
+    assert run.phases["hash"].files == 2
+    assert run.phases["hash"].bytes == 2 * len("same content")
+    assert run.counters["files_scanned"] == 3
+    assert run.counters["directories_scanned"] == 1
+    # Files smaller than the head/tail sample are only read once, in full
+    assert run.counters["files_read"] == 2
+
+
+def test_sort_records_moves(temp_dir: Path) -> None:
+    """Test that sorting reports moved files and created directories."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "b.jpg").write_text("bb")
+
+    with instrument.collect("sort-by-type") as run:
+        sort_by_type(str(temp_dir))
+
+    assert list(run.phases) == ["scan", "plan", "move"]
+    assert run.phases["move"].files == 2
+    assert run.counters["files_moved"] == 2
+    assert run.counters["directories_created"] == 2
+
+
+def test_write_json(temp_dir: Path) -> None:
+    """Test the machine-readable output."""
+    with instrument.collect("dedupe") as run:
+        with instrument.phase("hash") as stats:
+            stats.files = 1
+            stats.bytes = 1024
+        instrument.count("cache_hits", 5)
+
+    out = temp_dir / "stats.json"
+    instrument.write_json(run, out)
+    data = json.loads(out.read_text())
+    assert data["command"] == "dedupe"
+    assert data["phases"]["hash"]["files"] == 1
+    assert data["phases"]["hash"]["bytes"] == 1024
+    assert "bytes_per_second" in data["phases"]["hash"]
+    assert data["counters"] == {"cache_hits": 5}
@@ -0,0 +1,155 @@
+"""Tests for the OrganiserPro.planner module."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from OrganiserPro.planner import Move, MovePlan, execute_plan
+
+
+def test_plan_resolves_conflicts_in_memory(temp_dir: Path) -> None:
+    """Test that colliding names get _N suffixes without stat calls."""
+    target = temp_dir / "jpg"
+    target.mkdir()
+    (target / "IMG_0001.jpg").write_text("existing")
+    (target / "IMG_0001_2.jpg").write_text("existing")
+    sources = [str(temp_dir / f"src{i}" / "IMG_0001.jpg") for i in range(4)]
+
+    plan = MovePlan()
+    with patch("os.path.exists") as mock_exists, patch("os.stat") as mock_stat:
+        for source in sources:
+            plan.add(source, str(target))
+    mock_exists.assert_not_called()
+    mock_stat.assert_not_called()
+
+    assert [os.path.basename(m.destination) for m in plan] == [
+        "IMG_0001_1.jpg",
+        "IMG_0001_3.jpg",
+        "IMG_0001_4.jpg",
+        "IMG_0001_5.jpg",
+    ]
+    assert plan.directories == []
+
+
+def test_plan_skips_files_already_in_place(temp_dir: Path) -> None:
+    """Test that files already in their target directory aren't moved."""
+    plan = MovePlan()
+    assert plan.add(str(temp_dir / "a.txt"), str(temp_dir)) is None
+    assert plan.unchanged == 1
+    assert len(plan) == 0
+
+
+def test_plan_unusable_target(temp_dir: Path) -> None:
+    """Test that a target path that is a file is reported, not moved into."""
+    (temp_dir / "README").write_text("not a directory")
+    plan = MovePlan()
+    assert plan.add(str(temp_dir / "x" / "README"), str(temp_dir / "README")) is None
+    assert plan.add(str(temp_dir / "a.txt"), str(temp_dir / "txt")) is not None
+    assert len(plan) == 1
+    assert [source for source, _ in plan.errors] == [str(temp_dir / "x" / "README")]
+
+
+def test_execute_plan_creates_nested_directories(temp_dir: Path) -> None:
+    """Test that missing target directories are created with their parents."""
+    source = temp_dir / "photo.jpg"
+    source.write_text("photo")
+    target = temp_dir / "2024" / "05"
+
+    plan = MovePlan()
+    move = plan.add(str(source), str(target))
+    assert move == Move(str(source), str(target / "photo.jpg"))
+    assert plan.directories == [str(target)]
+
+    assert execute_plan(plan) == 1
+    assert (target / "photo.jpg").read_text() == "photo"
+    assert not source.exists()
+
+
+def test_execute_plan_reports_errors(temp_dir: Path) -> None:
+    """Test that failed moves are reported and the rest still happen."""
+    (temp_dir / "a.txt").write_text("a")
+    plan = MovePlan()
+    plan.add(str(temp_dir / "missing.txt"), str(temp_dir / "txt"))
+    plan.add(str(temp_dir / "a.txt"), str(temp_dir / "txt"))
+
+    errors = []
+    moved = execute_plan(plan, on_error=lambda move, e: errors.append(move.source))
+    assert moved == 1
+    assert errors == [str(temp_dir / "missing.txt")]
+    assert (temp_dir / "txt" / "a.txt").exists()
+
+
+def test_execute_plan_never_overwrites(temp_dir: Path) -> None:
+    """Test that a destination created after planning is left alone."""
+    (temp_dir / "a.txt").write_text("new")
+    plan = MovePlan()
+    move = plan.add(str(temp_dir / "a.txt"), str(temp_dir / "txt"))
+    assert move is not None
+    (temp_dir / "txt").mkdir()
+    (temp_dir / "txt" / "a.txt").write_text("arrived meanwhile")
+
+    errors = []
+    assert execute_plan(plan, on_error=lambda move, e: errors.append(e)) == 0
+    assert len(errors) == 1 and isinstance(errors[0], FileExistsError)
+    assert (temp_dir / "txt" / "a.txt").read_text() == "arrived meanwhile"
+    assert (temp_dir / "a.txt").read_text() == "new"
+
+
+def test_by_directory(temp_dir: Path) -> None:
+    """Test grouping planned moves by destination directory."""
+    plan = MovePlan()
+    plan.add(str(temp_dir / "a.txt"), str(temp_dir / "txt"))
+    plan.add(str(temp_dir / "b.jpg"), str(temp_dir / "jpg"))
+    plan.add(str(temp_dir / "c.txt"), str(temp_dir / "txt"))
+
+    groups = plan.by_directory()
+    assert list(groups) == [str(temp_dir / "txt"), str(temp_dir / "jpg")]
+    assert len(groups[str(temp_dir / "txt")]) == 2
+
+
+def test_execute_plan_with_workers(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a thread pool gives the same result as a serial run."""
+    monkeypatch.setattr("OrganiserPro.planner.MOVE_BATCH_SIZE", 3)
+    plan = MovePlan()
+    for i in range(20):
+        ext = "txt" if i % 4 else "jpg"
+        source = temp_dir / f"file{i}.{ext}"
+        source.write_text(str(i))
+        plan.add(str(source), str(temp_dir / ext))
+    plan.add(str(temp_dir / "missing1.txt"), str(temp_dir / "txt"))
+    plan.add(str(temp_dir / "missing2.jpg"), str(temp_dir / "jpg"))
+
+    errors = []
+    moved = execute_plan(
+        plan, on_error=lambda move, e: errors.append(move.source), workers=4
+    )
+    assert moved == 20
+    # Reported once all moves are done, grouped by target directory in the
+    # order the directories were first planned ("jpg" came first)
+    assert errors == [str(temp_dir / "missing2.jpg"), str(temp_dir / "missing1.txt")]
+    for i in range(20):
+        ext = "txt" if i % 4 else "jpg"
+        assert (temp_dir / ext / f"file{i}.{ext}").read_text() == str(i)
+
+
+def test_plan_chunks(temp_dir: Path) -> None:
+    """Test splitting a plan into chunks that each create their directories."""
+    (temp_dir / "README").write_text("not a directory")
+    plan = MovePlan()
+    plan.add(str(temp_dir / "x" / "README"), str(temp_dir / "README"))
+    for name in ["a.txt", "b.txt", "c.jpg"]:
+        (temp_dir / name).write_text(name)
+        plan.add(str(temp_dir / name), str(temp_dir / name.split(".")[1]))
+
+    chunks = list(plan.chunks(2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[0].directories == [str(temp_dir / "txt")]
+    assert chunks[1].directories == [str(temp_dir / "jpg")]
+    assert len(chunks[0].errors) == 1
+    assert chunks[1].errors == []
+    assert sum(execute_plan(chunk) for chunk in chunks) == 3
+    assert (temp_dir / "jpg" / "c.jpg").exists()
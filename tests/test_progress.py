@@ -0,0 +1,89 @@
+"""Tests for the OrganiserPro.progress module."""
+
+import io
+from typing import Generator, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from rich.console import Console
+
+from OrganiserPro.progress import ProgressReporter
+
+
+@pytest.fixture
+def mock_progress() -> Generator[MagicMock, None, None]:
+    """Replace the rich Progress display with a mock."""
+    with patch("rich.progress.Progress") as mock_progress:
+        yield mock_progress.return_value
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def terminal() -> Console:
+    return Console(file=io.StringIO(), force_terminal=True)
+
+
+def test_disabled_without_terminal(mock_progress: MagicMock) -> None:
+    """Test that nothing is drawn when output isn't a terminal or if quiet."""
+    for reporter in [
+        ProgressReporter(Console(file=io.StringIO())),
+        ProgressReporter(terminal(), enabled=False),
+    ]:
+        with reporter:
+            reporter.start("Scanning files...")
+            reporter.advance(10, 100)
+        assert not reporter.enabled
+        assert (reporter.completed, reporter.bytes) == (10, 100)
+    mock_progress.start.assert_not_called()
+    mock_progress.refresh.assert_not_called()
+
+
+def test_refresh_is_throttled(mock_progress: MagicMock) -> None:
+    """Test that the clock is checked in batches and redraws are rate limited."""
+    clock = FakeClock()
+    calls: List[float] = []
+
+    def counting_clock() -> float:
+        calls.append(clock.now)
+        return clock()
+
+    reporter = ProgressReporter(
+        terminal(), refresh_per_second=4, check_every=10, clock=counting_clock
+    )
+    with reporter:
+        reporter.start("Checking for duplicates...", total=1000)
+        refreshes = mock_progress.refresh.call_count
+        calls.clear()
+        for _ in range(100):
+            reporter.advance()
+        assert len(calls) == 10
+        assert mock_progress.refresh.call_count == refreshes
+
+        clock.now = 1.0
+        for _ in range(10):
+            reporter.advance()
+        assert mock_progress.refresh.call_count == refreshes + 1
+    assert mock_progress.stop.called
+
+
+def test_rate_and_eta(mock_progress: MagicMock) -> None:
+    """Test that throughput and the time remaining are shown."""
+    clock = FakeClock()
+    reporter = ProgressReporter(terminal(), check_every=1, clock=clock)
+    with reporter:
+        reporter.start("Checking for duplicates...", total=100)
+        clock.now = 2.0
+        reporter.advance(50, 50 * 1024 * 1024)
+
+    fields = mock_progress.update.call_args.kwargs
+    assert fields["completed"] == 50
+    assert fields["rate"] == "25.0 MB/s"
+    assert fields["eta"] == "ETA 0:00:02"
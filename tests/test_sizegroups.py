@@ -0,0 +1,72 @@
+"""Tests for the OrganiserPro.sizegroups module."""
+
+import os
+from typing import List, Optional, Tuple
+
+import pytest
+
+from OrganiserPro.sizegroups import SizeGroups
+from OrganiserPro.walker import FileEntry
+
+
+def entry(path: str, size: int, inode: Optional[int] = None) -> FileEntry:
+    """Build a FileEntry without touching the filesystem."""
+    if inode is None:
+        inode = sum(map(ord, path))  # Distinct for the paths used here
+    return FileEntry(path, os.path.basename(path), size, 1000, 1, inode)
+
+
+def collect(groups: SizeGroups) -> List[Tuple[int, List[str]]]:
+    """Return the groups as (size, paths) pairs."""
+    return [(size, [e.path for e in group]) for size, group in groups.groups()]
+
+
+@pytest.mark.parametrize("budget", [None, 1, 500])
+def test_size_groups_order_and_uniques(budget: Optional[int]) -> None:
+    """Test grouping is the same whether or not (or when) the store spills."""
+    with SizeGroups(memory_budget=budget) as groups:
+        for path, size in [
+            ("/a", 10),
+            ("/b", 20),
+            ("/c", 30),
+            ("/d", 20),
+            ("/e", 10),
+            ("/f", 10),
+        ]:
+            groups.add(entry(path, size))
+
+        assert collect(groups) == [(10, ["/a", "/e", "/f"]), (20, ["/b", "/d"])]
+        assert groups.unique_bytes() == 30
+        assert groups.spilled == (budget is not None)
+
+
+def test_size_groups_removes_spill_file() -> None:
+    """Test that the spill file is deleted on close."""
+    groups = SizeGroups(memory_budget=1)
+    groups.add(entry("/a", 10))
+    assert groups.spill_path is not None
+    spill_path = groups.spill_path
+    assert os.path.exists(spill_path)
+
+    # Entries read back from the spill store keep their stat data
+    groups.add(entry("/b", 10))
+    ((_, restored),) = groups.groups()
+    assert [(e.name, e.size, e.mtime_ns) for e in restored] == [
+        ("a", 10, 1000),
+        ("b", 10, 1000),
+    ]
+
+    groups.close()
+    assert not os.path.exists(spill_path)
+
+
+@pytest.mark.parametrize("budget", [None, 1])
+def test_size_groups_collapse_hard_links(budget: Optional[int]) -> None:
+    """Test that names of an already added (device, inode) are skipped."""
+    with SizeGroups(memory_budget=budget) as groups:
+        groups.add(entry("/a", 10, inode=7))
+        groups.add(entry("/b", 10, inode=7))
+        groups.add(entry("/c", 10, inode=8))
+
+        assert collect(groups) == [(10, ["/a", "/c"])]
+        assert groups.hard_links == 1
@@ -7,7 +7,16 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from OrganiserPro.sorter import get_file_extension, sort_by_date, sort_by_type
+from OrganiserPro import instrument
+from OrganiserPro.sorter import (
+    get_file_extension,
+    log_size_thresholds,
+    parse_size,
+    size_bucket_names,
+    sort_by_date,
+    sort_by_size,
+    sort_by_type,
+)
 
 
 # Mock the console object for all tests
@@ -185,3 +194,209 @@ def test_sort_nonexistent_directory() -> None:
         sort_by_date("/non/existent/path")
     except Exception as e:
         pytest.fail(f"Function raised an exception: {e}")
+
+
+def test_sort_by_type_renames_conflicts(temp_dir: Path) -> None:
+    """Test that files colliding with existing ones get a numeric suffix."""
+    (temp_dir / "txt").mkdir()
+    (temp_dir / "txt" / "notes.txt").write_text("already sorted")
+    (temp_dir / "notes.txt").write_text("new")
+
+    sort_by_type(str(temp_dir))
+
+    assert (temp_dir / "txt" / "notes.txt").read_text() == "already sorted"
+    assert (temp_dir / "txt" / "notes_1.txt").read_text() == "new"
+
+
+def test_sort_skips_symlinked_files(temp_dir: Path) -> None:
+    """Test that symlinked files are left in place rather than followed."""
+    (temp_dir / "real.txt").write_text("content")
+    (temp_dir / "link.txt").symlink_to(temp_dir / "real.txt")
+
+    sort_by_type(str(temp_dir))
+
+    assert (temp_dir / "txt" / "real.txt").read_text() == "content"
+    assert (temp_dir / "link.txt").is_symlink()
+    assert not (temp_dir / "txt" / "link.txt").exists()
+
+
+def test_sort_by_date_nested_format(temp_dir: Path) -> None:
+    """Test that formats with a separator create nested directories."""
+    file_path = temp_dir / "photo.jpg"
+    file_path.write_text("photo")
+    timestamp = 1642204800  # 2022-01-15
+    os.utime(file_path, (timestamp, timestamp))
+
+    sort_by_date(str(temp_dir), "%Y/%m")
+
+    assert (temp_dir / "2022" / "01" / "photo.jpg").exists()
+
+
+def test_sort_dry_run_shows_destinations(
+    temp_dir: Path, mock_console: MagicMock
+) -> None:
+    """Test that a dry run prints each destination and moves nothing."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "b.jpg").write_text("b")
+
+    sort_by_type(str(temp_dir), dry_run=True)
+
+    assert (temp_dir / "a.txt").exists()
+    assert not (temp_dir / "txt").exists()
+    printed = [str(call.args[0]) for call in mock_console.print.call_args_list]
+    assert f"  a.txt -> {os.path.join('txt', 'a.txt')}" in printed
+    assert f"  b.jpg -> {os.path.join('jpg', 'b.jpg')}" in printed
+
+
+def test_sort_returns_result(temp_dir: Path) -> None:
+    """Test that a sort reports its moves, counts and errors."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "b.jpg").write_text("b")
+
+    result = sort_by_type(str(temp_dir))
+
+    assert (result.files_scanned, result.files_moved, result.directories) == (2, 2, 2)
+    assert sorted(os.path.basename(move.source) for move in result.moves) == [
+        "a.txt",
+        "b.jpg",
+    ]
+    assert result.errors == []
+    assert result.seconds >= 0
+
+    missing = sort_by_type(str(temp_dir / "missing"), quiet=True)
+    assert missing.files_scanned == 0
+    assert [path for path, _ in missing.errors] == [str(temp_dir / "missing")]
+
+
+def test_sort_quiet_prints_nothing(temp_dir: Path, mock_console: MagicMock) -> None:
+    """Test that a quiet sort neither prints nor shows a spinner."""
+    (temp_dir / "a.txt").write_text("a")
+
+    result = sort_by_type(str(temp_dir), dry_run=True, quiet=True)
+
+    assert len(result.moves) == 1
+    assert result.files_moved == 0
+    mock_console.print.assert_not_called()
+    mock_console.status.assert_not_called()
+
+
+def test_sort_by_type_recursive(temp_dir: Path) -> None:
+    """Test that each subdirectory is sorted into its own buckets."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "sub" / "deeper").mkdir(parents=True)
+    (temp_dir / "sub" / "b.jpg").write_text("b")
+    (temp_dir / "sub" / "deeper" / "c.txt").write_text("c")
+
+    sort_by_type(str(temp_dir), recursive=True)
+
+    assert (temp_dir / "txt" / "a.txt").exists()
+    assert (temp_dir / "sub" / "jpg" / "b.jpg").exists()
+    assert (temp_dir / "sub" / "deeper" / "txt" / "c.txt").exists()
+
+
+def test_sort_recursive_leaves_sorted_files_alone(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a second recursive run doesn't sort buckets into themselves."""
+    monkeypatch.setattr("OrganiserPro.sorter.SORT_BATCH_SIZE", 1)
+    for name in ["a.txt", "b.txt", "c.jpg"]:
+        (temp_dir / name).write_text(name)
+        (temp_dir / "sub").mkdir(exist_ok=True)
+        (temp_dir / "sub" / name).write_text(name)
+    for path in temp_dir.rglob("*.*"):
+        os.utime(path, (1642204800, 1642204800))  # 2022-01-15
+
+    sort_by_date(str(temp_dir), "%Y/%m", recursive=True)
+    first = sorted(p.relative_to(temp_dir) for p in temp_dir.rglob("*"))
+    sort_by_date(str(temp_dir), "%Y/%m", recursive=True)
+    second = sorted(p.relative_to(temp_dir) for p in temp_dir.rglob("*"))
+
+    assert (temp_dir / "2022" / "01" / "a.txt").exists()
+    assert (temp_dir / "sub" / "2022" / "01" / "c.jpg").exists()
+    assert first == second
+
+
+def test_sort_incremental_skips_unchanged_directories(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that incremental runs only list directories that changed."""
+    monkeypatch.setattr("OrganiserPro.sortstate.RACY_WINDOW_NS", -(10**9))
+    tree = temp_dir / "tree"
+    (tree / "sub").mkdir(parents=True)
+    (tree / "a.txt").write_text("a")
+    (tree / "sub" / "b.jpg").write_text("b")
+    state_file = str(temp_dir / "state.json")
+
+    # The first run sorts; the second records the new buckets
+    for _ in range(2):
+        sort_by_type(str(tree), recursive=True, state_file=state_file)
+    assert (tree / "txt" / "a.txt").exists()
+    assert (tree / "sub" / "jpg" / "b.jpg").exists()
+
+    with instrument.collect() as run:
+        sort_by_type(str(tree), recursive=True, state_file=state_file)
+    assert run.counters.get("directories_scanned", 0) == 0
+    assert run.counters["directories_skipped"] == 4
+
+    (tree / "sub" / "new.txt").write_text("new")
+    with instrument.collect() as run:
+        sort_by_type(str(tree), recursive=True, state_file=state_file)
+    assert run.counters["directories_scanned"] == 1
+    assert (tree / "sub" / "txt" / "new.txt").exists()
+
+
+def test_sort_incremental_dry_run_keeps_state(temp_dir: Path) -> None:
+    """Test that a dry run doesn't write the state file."""
+    (temp_dir / "tree").mkdir()
+    (temp_dir / "tree" / "a.txt").write_text("a")
+    state_file = temp_dir / "state.json"
+
+    sort_by_type(str(temp_dir / "tree"), dry_run=True, state_file=str(state_file))
+    assert not state_file.exists()
+    sort_by_type(str(temp_dir / "tree"), state_file=str(state_file))
+    assert state_file.exists()
+
+
+def test_parse_size() -> None:
+    """Test parsing human-readable sizes."""
+    assert parse_size("512") == 512
+    assert parse_size("100kb") == 100 * 1024
+    assert parse_size("1.5GB") == 1536 * 1024 * 1024
+    assert parse_size(" 2 MB ") == 2 * 1024 * 1024
+    with pytest.raises(ValueError):
+        parse_size("lots")
+    with pytest.raises(ValueError):
+        parse_size("-1MB")
+
+
+def test_size_buckets() -> None:
+    """Test bucket names for thresholds and logarithmic buckets."""
+    assert size_bucket_names([1024**2, 1536 * 1024**2]) == [
+        "under-1MB",
+        "1MB-1.5GB",
+        "1.5GB-and-over",
+    ]
+    thresholds = log_size_thresholds(1024)
+    assert thresholds == [1024, 1024**2, 1024**3, 1024**4]
+    assert size_bucket_names(thresholds)[:2] == ["under-1KB", "1KB-1MB"]
+    with pytest.raises(ValueError):
+        log_size_thresholds(1)
+
+
+def test_sort_by_size(temp_dir: Path) -> None:
+    """Test that files are sorted into buckets by size, without re-stat'ing."""
+    (temp_dir / "tiny.txt").write_bytes(b"x" * 10)
+    (temp_dir / "edge.bin").write_bytes(b"x" * 100)
+    (temp_dir / "big.bin").write_bytes(b"x" * 5000)
+
+    with patch("os.stat", wraps=os.stat) as mock_stat:
+        sort_by_size(str(temp_dir), thresholds=[1000, 100], dry_run=True)
+    stat_paths = {str(call.args[0]) for call in mock_stat.call_args_list}
+    assert not any(path.endswith((".txt", ".bin")) for path in stat_paths)
+
+    sort_by_size(str(temp_dir), thresholds=[1000, 100])
+
+    assert (temp_dir / "under-100B" / "tiny.txt").exists()
+    # A file exactly at a threshold goes into the bucket above it
+    assert (temp_dir / "100B-1000B" / "edge.bin").exists()
+    assert (temp_dir / "1000B-and-over" / "big.bin").exists()
@@ -0,0 +1,80 @@
+"""Tests for the OrganiserPro.sortstate module."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from OrganiserPro import sortstate
+from OrganiserPro.sortstate import SortState, default_state_path
+
+
+@pytest.fixture
+def no_racy_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Trust directory mtimes however recently they were recorded."""
+    monkeypatch.setattr(sortstate, "RACY_WINDOW_NS", -(10**9))
+
+
+def test_default_state_path(temp_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that state files live under XDG_CACHE_HOME, one per directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir))
+    path = default_state_path(temp_dir / "photos")
+    assert path.parent == temp_dir / "organiserpro" / "sort-state"
+    assert path != default_state_path(temp_dir / "music")
+
+
+def test_unchanged_directory_is_skipped(temp_dir: Path, no_racy_window: None) -> None:
+    """Test that a recorded directory is skipped until it changes."""
+    tree = temp_dir / "tree"
+    (tree / "sub").mkdir(parents=True)
+    (tree / "a.txt").write_text("a")
+    state_file = temp_dir / "state.json"
+
+    state = SortState(state_file, "type")
+    assert state.unchanged_subdirectories(str(tree)) is None
+    state.record(str(tree), {"a.txt"})
+    state.save()
+
+    state = SortState(state_file, "type")
+    assert state.unchanged_subdirectories(str(tree)) == [str(tree / "sub")]
+
+    (tree / "b.txt").write_text("b")
+    state = SortState(state_file, "type")
+    assert state.unchanged_subdirectories(str(tree)) is None
+
+
+def test_recent_mtime_is_not_trusted(temp_dir: Path) -> None:
+    """Test that a directory recorded right after it changed is listed again."""
+    (temp_dir / "a.txt").write_text("a")
+    state = SortState(temp_dir / "state.json", "type")
+    state.record(str(temp_dir), {"a.txt"})
+    state.save()
+
+    state = SortState(temp_dir / "state.json", "type")
+    assert state.unchanged_subdirectories(str(temp_dir)) is None
+
+
+def test_new_arrivals_are_not_recorded(temp_dir: Path, no_racy_window: None) -> None:
+    """Test that files that weren't seen keep the directory from being recorded."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "late.txt").write_text("late")
+    state = SortState(temp_dir / "state.json", "type")
+    state.record(str(temp_dir), {"a.txt"})
+    state.save()
+
+    data = json.loads((temp_dir / "state.json").read_text())
+    assert data["directories"] == {}
+
+
+def test_config_change_discards_state(temp_dir: Path, no_racy_window: None) -> None:
+    """Test that state recorded with other sort options is ignored."""
+    tree = temp_dir / "tree"
+    tree.mkdir()
+    state = SortState(temp_dir / "state.json", "date:%Y-%m")
+    state.record(str(tree), set())
+    state.save()
+
+    state = SortState(temp_dir / "state.json", "date:%Y")
+    assert state.unchanged_subdirectories(str(tree)) is None
+    state = SortState(temp_dir / "state.json", "date:%Y-%m")
+    assert state.unchanged_subdirectories(str(tree)) == []
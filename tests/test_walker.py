@@ -0,0 +1,106 @@
+"""Tests for the OrganiserPro.walker module."""
+
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pytest
+
+from OrganiserPro.walker import walk, walk_by_directory
+
+
+def names(directory: Path, **kwargs: bool) -> List[str]:
+    """Return walked paths relative to directory, in walk order."""
+    return [
+        Path(entry.path).relative_to(directory).as_posix()
+        for entry in walk(directory, **kwargs)
+    ]
+
+
+@pytest.fixture
+def tree(temp_dir: Path) -> Path:
+    """Create a small tree with nested, hidden and symlinked entries."""
+    (temp_dir / "a.txt").write_text("a")
+    (temp_dir / "sub" / "deeper").mkdir(parents=True)
+    (temp_dir / "sub" / "b.txt").write_text("bb")
+    (temp_dir / "sub" / "deeper" / "c.txt").write_text("ccc")
+    (temp_dir / ".hidden").mkdir()
+    (temp_dir / ".hidden" / "d.txt").write_text("d")
+    (temp_dir / ".e.txt").write_text("e")
+    return temp_dir
+
+
+def test_walk_top_level_only(tree: Path) -> None:
+    """Test that only top-level, non-hidden files are yielded by default."""
+    assert names(tree) == ["a.txt"]
+
+
+def test_walk_recursive(tree: Path) -> None:
+    """Test recursion and that a directory's files precede its subdirectories."""
+    assert names(tree, recursive=True) == ["a.txt", "sub/b.txt", "sub/deeper/c.txt"]
+
+
+def test_walk_include_hidden(tree: Path) -> None:
+    """Test that hidden files and directories can be included."""
+    found = names(tree, recursive=True, include_hidden=True)
+    assert sorted(found) == [
+        ".e.txt",
+        ".hidden/d.txt",
+        "a.txt",
+        "sub/b.txt",
+        "sub/deeper/c.txt",
+    ]
+
+
+def test_walk_entry_stat_data(tree: Path) -> None:
+    """Test that entries carry the file's stat data."""
+    os.utime(tree / "a.txt", (1617235200, 1617235200))
+    (entry,) = walk(tree)
+    st = (tree / "a.txt").stat()
+    assert entry.name == "a.txt"
+    assert entry.size == 1
+    assert entry.mtime == 1617235200
+    assert entry.key == (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    assert entry.as_path() == tree / "a.txt"
+
+
+def test_walk_symlink_policy(tree: Path) -> None:
+    """Test that symlinks are skipped unless followed, without looping."""
+    (tree / "link.txt").symlink_to(tree / "a.txt")
+    (tree / "sub" / "loop").symlink_to(tree)
+
+    assert names(tree, recursive=True) == ["a.txt", "sub/b.txt", "sub/deeper/c.txt"]
+
+    followed = names(tree, recursive=True, follow_symlinks=True)
+    assert sorted(followed) == [
+        "a.txt",
+        "link.txt",
+        "sub/b.txt",
+        "sub/deeper/c.txt",
+    ]
+
+
+def test_walk_reports_errors(temp_dir: Path) -> None:
+    """Test that unreadable directories are passed to on_error."""
+    errors: List[Tuple[str, OSError]] = []
+    missing = temp_dir / "missing"
+    assert list(walk(missing, on_error=lambda p, e: errors.append((p, e)))) == []
+    assert len(errors) == 1
+    assert errors[0][0] == str(missing)
+    assert isinstance(errors[0][1], FileNotFoundError)
+
+
+def test_walk_by_directory_cached_listing(tree: Path) -> None:
+    """Test that directories with a cached listing are skipped but descended."""
+    sub = str(tree / "sub")
+
+    def cached(directory: str) -> Optional[List[str]]:
+        return [str(tree / "sub" / "deeper")] if directory == sub else None
+
+    walked = [
+        Path(directory).relative_to(tree).as_posix()
+        for directory, _ in walk_by_directory(
+            tree, recursive=True, cached_listing=cached
+        )
+    ]
+    assert walked == [".", "sub/deeper"]
@@ -0,0 +1,216 @@
+"""Tests for the OrganiserPro.watcher module."""
+
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Generator, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from OrganiserPro import instrument
+from OrganiserPro.sorter import type_bucket
+from OrganiserPro.watcher import (
+    ArrivalIndex,
+    InotifySource,
+    PollingSource,
+    Watcher,
+    open_event_source,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_console() -> Generator[MagicMock, None, None]:
+    """Mock the console object for all tests."""
+    with patch("OrganiserPro.watcher.console") as mock_console:
+        yield mock_console
+
+
+class ScriptedSource:
+    """Event source returning prepared batches of paths, then stopping."""
+
+    def __init__(self, batches: List[List[str]], stop: threading.Event) -> None:
+        self.batches = batches
+        self.stop = stop
+
+    def read(self, timeout: float) -> List[str]:
+        if not self.batches:
+            self.stop.set()
+            return []
+        return self.batches.pop(0)
+
+    def close(self) -> None:
+        pass
+
+
+def test_process_sorts_arrivals(temp_dir: Path) -> None:
+    """Test that a batch of arrivals is sorted into buckets."""
+    paths = []
+    for name in ["a.txt", "b.jpg", "c.txt", ".hidden.txt"]:
+        (temp_dir / name).write_text(name)
+        paths.append(str(temp_dir / name))
+    paths.append(str(temp_dir / "gone.txt"))
+
+    watcher = Watcher(str(temp_dir), bucket_of=type_bucket)
+    assert watcher.process(paths) == (3, 0)
+    assert (temp_dir / "txt" / "a.txt").exists()
+    assert (temp_dir / "txt" / "c.txt").exists()
+    assert (temp_dir / "jpg" / "b.jpg").exists()
+    assert (temp_dir / ".hidden.txt").exists()
+
+
+def test_process_finds_duplicates(temp_dir: Path) -> None:
+    """Test duplicates of existing files and within a batch."""
+    (temp_dir / "txt").mkdir()
+    (temp_dir / "txt" / "original.txt").write_text("same")
+    watcher = Watcher(
+        str(temp_dir),
+        bucket_of=type_bucket,
+        dedupe=True,
+        move_to=str(temp_dir / "dups"),
+    )
+
+    for name, content in [("copy.txt", "same"), ("new.txt", "new!"), ("b.txt", "new!")]:
+        (temp_dir / name).write_text(content)
+    paths = [str(temp_dir / name) for name in ["copy.txt", "new.txt", "b.txt"]]
+    assert watcher.process(paths) == (1, 2)
+
+    assert (temp_dir / "txt" / "new.txt").exists()
+    assert sorted(p.name for p in (temp_dir / "dups").iterdir()) == [
+        "b.txt",
+        "copy.txt",
+    ]
+
+    # The sorted file is indexed where it was moved to
+    (temp_dir / "again.txt").write_text("new!")
+    assert watcher.process([str(temp_dir / "again.txt")]) == (0, 1)
+
+
+def test_rewritten_file_is_not_its_own_duplicate(temp_dir: Path) -> None:
+    """Test that a file arriving again isn't matched against its old entry."""
+    watcher = Watcher(str(temp_dir), dedupe=True, move_to=str(temp_dir / "dups"))
+    path = temp_dir / "notes.txt"
+    path.write_text("draft")
+    assert watcher.process([str(path)]) == (0, 0)
+
+    # Closed again unchanged, then rewritten with other content of the same size
+    assert watcher.process([str(path)]) == (0, 0)
+    path.write_text("final")
+    assert watcher.process([str(path)]) == (0, 0)
+    assert path.read_text() == "final"
+    assert not (temp_dir / "dups").exists()
+    assert watcher.index is not None and len(watcher.index) == 1
+
+    # A hard link to it isn't a duplicate either, but a real copy is
+    os.link(path, temp_dir / "link.txt")
+    (temp_dir / "copy.txt").write_text("final")
+    links = [str(temp_dir / "link.txt"), str(temp_dir / "copy.txt")]
+    assert watcher.process(links) == (0, 1)
+    assert (temp_dir / "dups" / "copy.txt").exists()
+
+
+def test_duplicate_moves_report_only_successes(
+    temp_dir: Path, mock_console: MagicMock
+) -> None:
+    """Test that failed or unplanned moves of duplicates aren't reported as moved."""
+    (temp_dir / "original.txt").write_text("same")
+    watcher = Watcher(str(temp_dir), dedupe=True, move_to=str(temp_dir / "dups"))
+    for name in ["a.txt", "b.txt"]:
+        (temp_dir / name).write_text("same")
+    paths = [str(temp_dir / "a.txt"), str(temp_dir / "b.txt")]
+
+    real_move = shutil.move
+
+    def move(source: str, destination: str) -> str:
+        if source.endswith("a.txt"):
+            raise PermissionError("denied")
+        return real_move(source, destination)
+
+    with patch("OrganiserPro.planner.shutil.move", side_effect=move):
+        assert watcher.process(paths) == (0, 2)
+    printed = [str(call.args[0]) for call in mock_console.print.call_args_list]
+    assert [line for line in printed if "->" in line] == [
+        f"[yellow]Duplicate:[/] {temp_dir / 'b.txt'} (of {temp_dir / 'original.txt'})"
+        f" -> {temp_dir / 'dups' / 'b.txt'}"
+    ]
+    assert any("Error moving a.txt" in line for line in printed)
+
+    # A move_to that can't be used reports the plan's errors instead
+    mock_console.reset_mock()
+    (temp_dir / "blocked").write_text("not a directory")
+    watcher.move_to = str(temp_dir / "blocked")
+    assert watcher.process([str(temp_dir / "a.txt")]) == (0, 1)
+    printed = [str(call.args[0]) for call in mock_console.print.call_args_list]
+    assert len(printed) == 1 and printed[0].startswith("[red]Error processing a.txt")
+
+
+def test_duplicate_index_hashes_lazily(temp_dir: Path) -> None:
+    """Test that files are only hashed once a file of the same size shows up."""
+    (temp_dir / "a").write_text("aaaa")
+    (temp_dir / "b").write_text("bbbbbbbb")
+    index = ArrivalIndex()
+    index.add(str(temp_dir / "a"), 4)
+
+    with instrument.collect() as run:
+        assert index.find_duplicate(str(temp_dir / "b"), 8) == (None, "")
+    assert "files_hashed" not in run.counters
+
+    (temp_dir / "c").write_text("aaaa")
+    with instrument.collect() as run:
+        original, digest = index.find_duplicate(str(temp_dir / "c"), 4)
+    assert original == str(temp_dir / "a")
+    assert digest
+    assert run.counters["files_hashed"] == 2
+
+
+def test_run_debounces_arrivals(temp_dir: Path) -> None:
+    """Test that arrivals reported in bursts are processed in one batch."""
+    for name in ["a.txt", "b.txt", "c.jpg"]:
+        (temp_dir / name).write_text(name)
+    stop = threading.Event()
+    source = ScriptedSource(
+        [[str(temp_dir / "a.txt")], [str(temp_dir / "b.txt"), str(temp_dir / "c.jpg")]],
+        stop,
+    )
+    watcher = Watcher(str(temp_dir), bucket_of=type_bucket, debounce=60)
+
+    with patch.object(watcher, "process", wraps=watcher.process) as process:
+        watcher.run(source, stop)
+    process.assert_called_once()
+    assert len(process.call_args[0][0]) == 3
+    assert (temp_dir / "jpg" / "c.jpg").exists()
+
+
+def test_polling_source_reports_settled_files(temp_dir: Path) -> None:
+    """Test that polling skips existing files and waits for writes to settle."""
+    (temp_dir / "old.txt").write_text("old")
+    source = PollingSource(str(temp_dir), interval=0)
+
+    (temp_dir / "new.txt").write_text("new")
+    assert source.read(0) == []
+    assert source.read(0) == [str(temp_dir / "new.txt")]
+    assert source.read(0) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+def test_inotify_source_reports_arrivals(temp_dir: Path) -> None:
+    """Test that inotify reports closed and renamed files, not directories."""
+    source = open_event_source(str(temp_dir), "inotify")
+    assert isinstance(source, InotifySource)
+    try:
+        (temp_dir / "a.txt").write_text("a")
+        (temp_dir / "sub").mkdir()
+        (temp_dir / "sub" / "b.txt").write_text("b")
+        (temp_dir / "sub" / "b.txt").rename(temp_dir / "b.txt")
+        assert source.read(1) == [str(temp_dir / "a.txt"), str(temp_dir / "b.txt")]
+        assert source.read(0) == []
+    finally:
+        source.close()
+
+
+def test_open_event_source_unknown_backend(temp_dir: Path) -> None:
+    """Test that unknown backends are rejected."""
+    with pytest.raises(ValueError, match="Unknown watch backend"):
+        open_event_source(str(temp_dir), "kqueue")